@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Compare the legacy full-mode XLSX conversion with the streaming one.
+
+Generates pricing-template-like workbooks (5000 x 60 by default, with merges,
+column widths and row heights), converts them with both implementations, checks
+that they produce the same spreadsheet JSON and reports wall time and peak
+Python memory (tracemalloc) for each. Two layouts are generated: a dense one
+where every row holds data and a sparse one where only one row out of
+``--sparse-step`` does, the used range being kept by a footer cell.
+
+    python benchmarks/bench_xlsx_conversion.py [--rows 5000] [--cols 60] [--sparse-step 10] [--file template.xlsx]
+
+Only openpyxl is required, Odoo is not imported.
+"""
+import argparse
+import datetime
+import importlib.util
+import os
+import re
+import time
+import tracemalloc
+import zipfile
+from io import BytesIO
+
+import openpyxl
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+MODULE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    os.pardir, 'crm_spreadsheet_enhancement', 'tools', 'xlsx_import.py',
+)
+
+
+def load_xlsx_import():
+    spec = importlib.util.spec_from_file_location('xlsx_import', MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def legacy_convert(content):
+    """The former ProductCategory._convert_excel_to_spreadsheet, minus logging."""
+    wb = openpyxl.load_workbook(BytesIO(content), data_only=False)
+    spreadsheet = {"version": 16, "sheets": [], "revisionId": 1, "settings": {}, "lists": {}}
+    for sheet in wb.worksheets:
+        max_row = sheet.max_row or 1
+        max_col = sheet.max_column or 1
+        sheet_json = {
+            "id": ("template_" + (sheet.title or "Sheet")).replace(" ", "_")[:60],
+            "name": (sheet.title or "Sheet")[:31],
+            "colNumber": int(max_col),
+            "rowNumber": int(max_row),
+            "cells": {},
+            "merges": [],
+            "rows": {},
+            "cols": {},
+        }
+        for merged in sheet.merged_cells.ranges:
+            min_col, min_row, max_c, max_r = merged.bounds
+            sheet_json["merges"].append({'top': min_row - 1, 'left': min_col - 1,
+                                         'bottom': max_r - 1, 'right': max_c - 1})
+        for col_letter, col_dim in sheet.column_dimensions.items():
+            if col_dim.width is not None:
+                sheet_json["cols"][str(column_index_from_string(col_letter) - 1)] = {"width": float(col_dim.width)}
+        for r_idx, row_dim in sheet.row_dimensions.items():
+            if row_dim.height is not None:
+                sheet_json["rows"][str(int(r_idx) - 1)] = {"size": float(row_dim.height)}
+        for r in range(1, max_row + 1):
+            for c in range(1, max_col + 1):
+                cell = sheet.cell(row=r, column=c)
+                if cell.value is None:
+                    continue
+                if cell.data_type == 'f':
+                    raw = str(cell.value)
+                    content_ = raw if raw.startswith('=') else '=' + raw
+                else:
+                    v = cell.value
+                    content_ = v.isoformat() if isinstance(v, (datetime.date, datetime.datetime)) else v
+                sheet_json["cells"][f"{get_column_letter(c)}{r}"] = {"content": content_, "format": 1}
+        spreadsheet["sheets"].append(sheet_json)
+    return spreadsheet
+
+
+def build_workbook(rows, cols, step=1):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Pricing"
+    for r in range(1, rows + 1):
+        if (r - 1) % step:
+            ws.append([])
+            continue
+        row = []
+        for c in range(1, cols + 1):
+            if c % 7 == 0:
+                row.append(f"=SUM(A{r}:{get_column_letter(c - 1)}{r})")
+            elif c % 5 == 0 and c != cols:
+                row.append(None)  # sparse columns, like real templates
+            elif c % 3 == 0:
+                row.append(f"label {r}-{c}")
+            else:
+                row.append(r * c * 0.5)
+        ws.append(row)
+    ws.cell(row=rows, column=cols, value="Total")
+    for c in range(1, cols + 1, 4):
+        ws.column_dimensions[get_column_letter(c)].width = 12 + c % 5
+    for r in range(1, rows + 1, 50):
+        ws.row_dimensions[r].height = 18
+        ws.merge_cells(start_row=r, start_column=1, end_row=r, end_column=3)
+    notes = wb.create_sheet("Notes")
+    notes["A1"] = "Generated on"
+    notes["B1"] = datetime.date(2024, 1, 1)
+    out = BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def with_stale_dimension(content, ref='A1'):
+    """Rewrite the <dimension> of every worksheet to ``ref``, as some tools
+    write it: read-only openpyxl trusts it unless the dimensions are reset."""
+    out = BytesIO()
+    with zipfile.ZipFile(BytesIO(content)) as source, zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if item.filename.startswith('xl/worksheets/sheet'):
+                data = re.sub(rb'<dimension ref="[^"]*"', b'<dimension ref="%s"' % ref.encode(), data)
+            target.writestr(item, data)
+    return out.getvalue()
+
+
+def measure(func, content):
+    # timed and traced separately: tracemalloc slows allocations down a lot
+    start = time.perf_counter()
+    result = func(content)
+    duration = time.perf_counter() - start
+    tracemalloc.start()
+    func(content)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak
+
+
+def normalize(spreadsheet):
+    for sheet in spreadsheet["sheets"]:
+        sheet["merges"].sort(key=lambda m: (m['top'], m['left']))
+    return spreadsheet
+
+
+def run(content, label):
+    print(f"{label}: {len(content) / 1024:.0f} KiB")
+    xlsx_import = load_xlsx_import()
+    legacy, legacy_time, legacy_peak = measure(legacy_convert, content)
+    streaming, streaming_time, streaming_peak = measure(xlsx_import.xlsx_to_spreadsheet, content)
+
+    cells = sum(len(s["cells"]) for s in streaming["sheets"])
+    print(f"{'':10} {'time (s)':>10} {'peak (MiB)':>12}   ({cells} populated cells)")
+    print(f"{'legacy':10} {legacy_time:10.2f} {legacy_peak / 2**20:12.1f}")
+    print(f"{'streaming':10} {streaming_time:10.2f} {streaming_peak / 2**20:12.1f}")
+    print(f"speedup x{legacy_time / streaming_time:.1f}, memory /{legacy_peak / max(streaming_peak, 1):.1f}")
+    if normalize(legacy) != normalize(streaming):
+        raise SystemExit("outputs differ")
+    print("outputs identical\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--cols', type=int, default=60)
+    parser.add_argument('--sparse-step', type=int, default=10)
+    parser.add_argument('--file', help="benchmark an existing .xlsx instead of a generated one")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'rb') as f:
+            run(f.read(), args.file)
+    else:
+        run(build_workbook(args.rows, args.cols), f"dense {args.rows}x{args.cols}")
+        run(build_workbook(args.rows, args.cols, args.sparse_step),
+            f"sparse {args.rows}x{args.cols} (1 row out of {args.sparse_step})")
+        run(with_stale_dimension(build_workbook(100, 15)), "stale dimension 100x15 (declared A1)")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,7 @@
     'author': "Entrivis Tech",
     'website': "https://www.entrivistech.com",
     'category': 'CRM',
-    'version': '18.0.1.0.0',
+    'version': '18.0.1.3.0',
     'depends': [
         'base',
         'crm_customisation',
@@ -15,6 +15,7 @@
     ],
     'data': [
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         'views/crm_lead_views.xml',
         'views/res_config_settings_view.xml',
         'views/crm_quatation_template_view.xml',
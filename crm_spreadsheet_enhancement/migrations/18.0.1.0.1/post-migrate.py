@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Move the converted category templates to the template cache.
+
+Categories used to store their converted template in
+product_category.spreadsheet_data. It now lives in a
+crm.spreadsheet.template.cache entry referenced by template_cache_id, which
+nothing fills for existing categories: build the entry from the stored JSON
+instead of converting the file again.
+"""
+import base64
+import json
+import logging
+
+from odoo import api, SUPERUSER_ID
+from odoo.tools.sql import column_exists
+
+from odoo.addons.crm_spreadsheet_enhancement.tools import spreadsheet_codec
+
+_logger = logging.getLogger(__name__)
+
+
+def _compact(text):
+    try:
+        return spreadsheet_codec.dumps(json.loads(text))
+    except ValueError:
+        return text
+
+
+def _migrate_category_templates(env):
+    """Categories converted before the template cache existed keep their JSON in
+    product_category.spreadsheet_data: move it to a cache entry instead of
+    converting the file again."""
+    if not column_exists(env.cr, 'product_category', 'spreadsheet_data'):
+        return
+    Cache = env['crm.spreadsheet.template.cache']
+    categories = env['product.category'].search([('template_file', '!=', False), ('template_cache_id', '=', False)])
+    to_convert = env['product.category']
+    for category in categories:
+        env.cr.execute('SELECT spreadsheet_data FROM product_category WHERE id = %s', [category.id])
+        legacy_data = env.cr.fetchone()[0]
+        if not legacy_data:
+            to_convert |= category
+            continue
+        checksum = Cache._get_checksum(base64.b64decode(category.template_file))
+        cache = Cache.search([('checksum', '=', checksum)], limit=1) or Cache.create({
+            'checksum': checksum,
+            'spreadsheet_data': _compact(legacy_data),
+        })
+        category.write({'template_cache_id': cache.id, 'template_conversion_state': 'done'})
+    if to_convert:
+        to_convert._schedule_template_conversion()
+    env.cr.execute('ALTER TABLE product_category DROP COLUMN spreadsheet_data')
+    _logger.info("product.category: %s templates moved to the template cache, %s scheduled for conversion",
+                 len(categories) - len(to_convert), len(to_convert))
+
+
+def migrate(cr, version):
+    _migrate_category_templates(api.Environment(cr, SUPERUSER_ID, {}))
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Move the plain-text spreadsheet JSON columns to compressed attachments.
+
+Rows are converted in batches, the size reduction and the encode/decode cost
+are logged for each table. The legacy columns are dropped once converted.
+Category templates were already moved to the template cache (18.0.1.0.1).
+"""
+import base64
+import json
+import logging
+import time
+
+from odoo import api, SUPERUSER_ID
+from odoo.tools.sql import column_exists
+
+from odoo.addons.crm_spreadsheet_enhancement.tools import spreadsheet_codec
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+# (model, legacy text column, compressed binary field)
+LEGACY_COLUMNS = [
+    ('crm.lead.spreadsheet', 'raw_spreadsheet_data', 'raw_spreadsheet_data_compressed'),
+    ('sale.order.spreadsheet', 'raw_spreadsheet_data', 'raw_spreadsheet_data_compressed'),
+    ('crm.spreadsheet.template.cache', 'spreadsheet_data', 'spreadsheet_data_compressed'),
+]
+
+
+def _compact(text):
+    try:
+        return spreadsheet_codec.dumps(json.loads(text))
+    except ValueError:
+        return text
+
+
+def _split_batches(ids):
+    for index in range(0, len(ids), BATCH_SIZE):
+        yield ids[index:index + BATCH_SIZE]
+
+
+def _migrate_column(env, model_name, column, field_name):
+    Model = env[model_name]
+    table = Model._table
+    if not column_exists(env.cr, table, column):
+        return
+    env.cr.execute(f'SELECT id FROM "{table}" WHERE "{column}" IS NOT NULL ORDER BY id')
+    ids = [row[0] for row in env.cr.fetchall()]
+
+    size_before = size_after = done = 0
+    encode_time = decode_time = 0.0
+    for batch_ids in _split_batches(ids):
+        env.cr.execute(f'SELECT id, "{column}" FROM "{table}" WHERE id IN %s', [tuple(batch_ids)])
+        for record_id, text in env.cr.fetchall():
+            start = time.perf_counter()
+            compressed = spreadsheet_codec.compress(_compact(text))
+            encode_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            spreadsheet_codec.decompress(compressed)
+            decode_time += time.perf_counter() - start
+
+            size_before += len(text.encode())
+            size_after += len(compressed)
+            Model.browse(record_id).write({field_name: base64.b64encode(compressed)})
+        env.flush_all()
+        env.invalidate_all()
+        done += len(batch_ids)
+        _logger.info("%s: %s/%s rows compressed", model_name, done, len(ids))
+
+    env.cr.execute(f'ALTER TABLE "{table}" DROP COLUMN "{column}"')
+    if ids:
+        _logger.info(
+            "%s: %s rows, %.1f MiB -> %.1f MiB (x%.1f), encode %.1f ms/row, decode %.1f ms/row",
+            model_name, len(ids), size_before / 2**20, size_after / 2**20, size_before / max(size_after, 1),
+            encode_time * 1000 / len(ids), decode_time * 1000 / len(ids),
+        )
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    for model_name, column, field_name in LEGACY_COLUMNS:
+        _migrate_column(env, model_name, column, field_name)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""Detach duplicate quote calculators before unique(lead_id) is added.
+
+The oldest calculator of each lead stays linked to it, the others are kept
+(their data is not lost) but no longer point to the lead.
+"""
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    cr.execute("""
+        UPDATE crm_lead_spreadsheet spreadsheet
+           SET lead_id = NULL
+          FROM (
+                SELECT lead_id, min(id) AS keep_id
+                  FROM crm_lead_spreadsheet
+                 WHERE lead_id IS NOT NULL
+              GROUP BY lead_id
+                HAVING count(*) > 1
+          ) duplicate
+         WHERE spreadsheet.lead_id = duplicate.lead_id
+           AND spreadsheet.id != duplicate.keep_id
+    """)
+    if cr.rowcount:
+        _logger.warning("%s duplicate quote calculators detached from their opportunity", cr.rowcount)
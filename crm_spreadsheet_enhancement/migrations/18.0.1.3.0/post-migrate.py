@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Initialize the replay cost counters of the existing quote calculators."""
+
+CALCULATOR_TABLES = {
+    'crm.lead.spreadsheet': 'crm_lead_spreadsheet',
+    'sale.order.spreadsheet': 'sale_order_spreadsheet',
+}
+
+
+def migrate(cr, version):
+    for res_model, table in CALCULATOR_TABLES.items():
+        cr.execute(f"""
+            UPDATE "{table}" calculator
+               SET replay_revision_count = cost.revision_count,
+                   replay_revision_bytes = cost.revision_bytes
+              FROM (
+                    SELECT res_id, count(*) AS revision_count,
+                           coalesce(sum(octet_length(commands)), 0) AS revision_bytes
+                      FROM spreadsheet_revision
+                     WHERE res_model = %s
+                       AND active
+                  GROUP BY res_id
+              ) cost
+             WHERE calculator.id = cost.res_id
+        """, [res_model])
@@ -6,4 +6,6 @@ from . import crm_quote_spreadsheet
 from . import res_config_settings
 from . import sale_spreadsheet
 from . import res_company
-from . import product_category
\ No newline at end of file
+from . import product_category
+from . import spreadsheet_template_cache
+from . import spreadsheet_revision
@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, fields, models
+from odoo import api, fields, models, modules, _
+from odoo.tools import split_every
 import logging
 _logger = logging.getLogger(__name__)
 
+# Leads (or calculators) handled between two commits of the provisioning cron
+PROVISIONING_CHUNK_SIZE = 50
+
 class CrmLead(models.Model):
     _inherit = "crm.lead"
     
@@ -31,9 +35,17 @@ class CrmLead(models.Model):
     spreadsheet_id = fields.Many2one(
         'crm.lead.spreadsheet',
         compute='_compute_spreadsheet_id',
-        store=False,
+        store=True,
+        index='btree_not_null',
         export_string_translation=False,
     )
+    spreadsheet_provisioning_failed = fields.Boolean(
+        "Quote Calculator Provisioning Failed",
+        copy=False,
+        readonly=True,
+        help="The quote calculator could not be created by the provisioning cron, which no longer picks "
+             "the opportunity. Opening the calculator retries.",
+    )
     
     @api.depends('template_id')
     def _compute_quote_calculator_id(self):
@@ -46,13 +58,11 @@ class CrmLead(models.Model):
     def default_get(self, fields_list):
         """Pre-fill the template_id field with the one set in CRM Settings"""
         res = super().default_get(fields_list)
-        IrConfig = self.env['ir.config_parameter'].sudo()
-
-        enable_templates = IrConfig.get_param('crm_spreadsheet_enhancement.enable_crm_quotation_templates', 'False')
-        if enable_templates in ['True', True, '1', 1]:
-            template_id_str = IrConfig.get_param('crm_spreadsheet_enhancement.crm_quotation_template_id', False)
-            if template_id_str and template_id_str.isdigit():
-                res['template_id'] = int(template_id_str)
+        if 'template_id' in fields_list:
+            enabled, template_id = self.env['crm.quotation.template']._get_quotation_template_settings(
+                self.env.company.id)
+            if enabled and template_id:
+                res['template_id'] = template_id
         return res
 
     @api.depends('spreadsheet_ids')
@@ -63,30 +73,125 @@ class CrmLead(models.Model):
     def action_open_lead_spreadsheet(self):
         """Open the quote calculator spreadsheet."""
         self.ensure_one()
+        spreadsheet = self._get_or_create_spreadsheets()[self.id]
+        return spreadsheet.action_open_spreadsheet()
 
+    def _prepare_spreadsheet_vals(self):
+        self.ensure_one()
         # 1️⃣ Product category from first material line
-        category_id = False
-        if self.material_line_ids:
-            category_id = self.material_line_ids[0].product_category_id.id
-            print("DEBUG: Auto category from line =", category_id)
-
-        # 2️⃣ Existing spreadsheet?
-        spreadsheet = self.env['crm.lead.spreadsheet'].search([
-            ('lead_id', '=', self.id)
-        ], limit=1)
-
-        # 3️⃣ Create new with category
-        if not spreadsheet:
-            spreadsheet = self.env['crm.lead.spreadsheet'].create({
-                'name': f"{self.name or 'Quote'} - Calculator",
-                'lead_id': self.id,
-                'product_category_id': category_id,   # 🔥 CRITICAL FIX
-            })
-            print("DEBUG: Spreadsheet created with category =", category_id)
+        return {
+            'name': f"{self.name or 'Quote'} - Calculator",
+            'lead_id': self.id,
+            'product_category_id': self.material_line_ids[:1].product_category_id.id,   # 🔥 CRITICAL FIX
+        }
 
-        return spreadsheet.action_open_spreadsheet()
+    def _get_or_create_spreadsheets(self):
+        """Return a dict lead id -> quote calculator, creating the missing ones.
+
+        Existing calculators are read from the stored spreadsheet_id and the
+        missing ones are created with a single ``create``. The leads lacking
+        one are locked first: a concurrent get-or-create on the same lead (e.g.
+        a double click) waits, then fails with a serialization error and is
+        retried, finding the calculator created by the first one. The unique
+        lead_id constraint on crm.lead.spreadsheet backs this up.
+        """
+        spreadsheet_by_lead = {lead.id: lead.spreadsheet_id for lead in self if lead.spreadsheet_id}
+
+        missing_leads = self.filtered(lambda lead: lead.id not in spreadsheet_by_lead)
+        if missing_leads:
+            self.env.cr.execute("SELECT id FROM crm_lead WHERE id IN %s FOR NO KEY UPDATE",
+                                [tuple(missing_leads.ids)])
+            Spreadsheet = self.env['crm.lead.spreadsheet']
+            created = Spreadsheet.create([lead._prepare_spreadsheet_vals() for lead in missing_leads])
+            spreadsheet_by_lead.update(zip(missing_leads.ids, created))
+            missing_leads.filtered('spreadsheet_provisioning_failed').spreadsheet_provisioning_failed = False
+            _logger.debug("%s quote calculators created for leads %s", len(created), missing_leads.ids)
+        return spreadsheet_by_lead
+
+    def action_provision_lead_spreadsheets(self):
+        """Create the quote calculators of the selected leads and build their
+        material line sheets. Large selections are left to the provisioning
+        cron, which commits between chunks."""
+        spreadsheets = self.env['crm.lead.spreadsheet'].concat(*self._get_or_create_spreadsheets().values())
+        to_materialize = spreadsheets._filtered_to_materialize()
+        if len(to_materialize) <= PROVISIONING_CHUNK_SIZE:
+            to_materialize._materialize_material_line_sheets()
+            message = _("%(count)s quote calculators are ready.", count=len(spreadsheets))
+        else:
+            self.env.ref('crm_spreadsheet_enhancement.ir_cron_provision_lead_spreadsheets')._trigger()
+            message = _("%(count)s quote calculators created, their sheets are being built in the background.",
+                        count=len(spreadsheets))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'success',
+                'message': message,
+                'next': {'type': 'ir.actions.act_window_close'},
+            },
+        }
+
+    @api.model
+    def _cron_provision_lead_spreadsheets(self):
+        """Pre-build the quote calculators of the opportunities, e.g. after an
+        import: create the missing calculators, then build their material line
+        sheets by chunks, committing after each one."""
+        limit = int(self.env['ir.config_parameter'].sudo().get_param(
+            'crm_spreadsheet_enhancement.provisioning_batch_size', 1000))
+        leads = self.search([
+            ('type', '=', 'opportunity'),
+            ('template_id', '!=', False),
+            ('material_line_ids', '!=', False),
+            ('spreadsheet_id', '=', False),
+            ('spreadsheet_provisioning_failed', '=', False),
+        ], limit=limit)
+        for lead_chunk in split_every(PROVISIONING_CHUNK_SIZE, leads.ids, self.browse):
+            failed_leads = lead_chunk._provision_spreadsheets_isolated()
+            if failed_leads:
+                _logger.warning("Quote calculators of leads %s not created, skipped by the next provisioning runs",
+                                failed_leads.ids)
+                failed_leads.write({'spreadsheet_provisioning_failed': True})
+            self._commit_provisioning()
+
+        Spreadsheet = self.env['crm.lead.spreadsheet']
+        to_materialize = Spreadsheet.search(Spreadsheet._get_to_materialize_domain(), limit=limit)
+        for spreadsheet_chunk in split_every(PROVISIONING_CHUNK_SIZE, to_materialize.ids, Spreadsheet.browse):
+            spreadsheet_chunk._materialize_material_line_sheets()
+            self._commit_provisioning()
+
+        # leads and calculators that failed are flagged and no longer picked
+        if len(leads) == limit or len(to_materialize) == limit:
+            self.env.ref('crm_spreadsheet_enhancement.ir_cron_provision_lead_spreadsheets')._trigger()
+
+    def _provision_spreadsheets_isolated(self):
+        """Create the missing quote calculators of the leads in one go, or one
+        lead at a time when that fails so that one bad lead does not block the
+        others.
+
+        :return: the leads whose calculator could not be created
+        """
+        try:
+            with self.env.cr.savepoint():
+                self._get_or_create_spreadsheets()
+            return self.browse()
+        except Exception:
+            _logger.warning("Failed to create the quote calculators of leads %s, retrying one by one", self.ids,
+                            exc_info=True)
+        failed = self.browse()
+        for lead in self:
+            try:
+                with self.env.cr.savepoint():
+                    lead._get_or_create_spreadsheets()
+            except Exception:
+                _logger.exception("Failed to create the quote calculator of lead %s", lead.id)
+                failed |= lead
+        return failed
+
+    def _commit_provisioning(self):
+        if not modules.module.current_test:
+            self.env.cr.commit()
+            self.env.invalidate_all()
 
-    
     def unlink(self):
         """Delete all related spreadsheets when lead is deleted."""
         for lead in self:
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+from odoo.tools import str2bool
 import logging
 
 _logger = logging.getLogger(__name__)
 
+ENABLE_TEMPLATES_PARAM = 'crm_spreadsheet_enhancement.enable_crm_quotation_templates'
+
 
 class CrmQuotationTemplate(models.Model):
     _name = 'crm.quotation.template'
@@ -42,6 +45,39 @@ class CrmQuotationTemplate(models.Model):
         copy=True
     )
 
+    # -----------------------------
+    # SETTINGS
+    # -----------------------------
+    @api.model
+    @tools.ormcache('company_id')
+    def _get_quotation_template_settings(self, company_id):
+        """Return ``(enabled, template_id)`` of the CRM quotation template
+        settings of ``company_id``: templates are enabled for the whole
+        database, the default template is set per company.
+
+        Cached: lead creation (default_get) reads them on every new lead. Any
+        ir.config_parameter change clears the cache, a change of the default
+        template of a company (see res.company) or the deletion of a default
+        template clear it explicitly.
+        """
+        enabled = str2bool(self.env['ir.config_parameter'].sudo().get_param(ENABLE_TEMPLATES_PARAM, 'False'), False)
+        company = self.env['res.company'].sudo().browse(company_id)
+        return enabled, company.crm_quotation_template_id.id
+
+    @api.model
+    def _set_quotation_template_settings(self, enabled):
+        # set_param clears the cache when the value changes
+        self.env['ir.config_parameter'].sudo().set_param(ENABLE_TEMPLATES_PARAM, enabled)
+
+    def unlink(self):
+        # companies defaulting to a deleted template are reset by the database
+        is_default = bool(self.env['res.company'].sudo().search_count(
+            [('crm_quotation_template_id', 'in', self.ids)], limit=1))
+        res = super().unlink()
+        if is_default:
+            self.env.registry.clear_cache()
+        return res
+
 
 class CrmQuotationTemplateLine(models.Model):
     _name = 'crm.quotation.template.line'
@@ -1,17 +1,35 @@
 # -*- coding: utf-8 -*-
-from odoo import api, fields, models, _
-from odoo.exceptions import UserError
+from odoo import api, fields, models, tools, _
+from odoo.exceptions import AccessError, UserError
+from odoo.tools import str2bool
+import hashlib
 import json
+import logging
 
-CRM_MATERIAL_LINE_FIELDS = [
-    'product_template_id',
-    'attributes_description',
-    'quantity',
-    'width',
-    'height',
-    'length',
-    'thickness',
-]
+from ..tools import calculator_models, instrumentation, spreadsheet_codec
+from ..tools.spreadsheet_document import SpreadsheetDocument
+
+_logger = logging.getLogger(__name__)
+
+CRM_MATERIAL_LINE_FIELDS = calculator_models.get_fields('crm.material.line')
+
+# Keys returned by get_crm_material_lines, mapped to the field they are read from
+MATERIAL_LINE_ITEM_FIELDS = {
+    'name': 'product_template_id',
+    'quantity': 'quantity',
+    'width': 'width',
+    'height': 'height',
+    'length': 'length',
+    'thickness': 'thickness',
+    'description': 'product_template_attribute_value_ids',
+    'attributes_description': 'product_template_attribute_value_ids',
+}
+
+# Marks a stored sheet that is unchanged from the template one (see raw_spreadsheet_data_compressed)
+TEMPLATE_SHEET_KEY = '__template_sheet__'
+
+# Single list over all the material lines of the lead, see _is_consolidated_layout
+MATERIAL_LINES_LIST_ID = 'material_lines'
 
 
 class CrmLeadSpreadsheet(models.Model):
@@ -23,18 +41,64 @@ class CrmLeadSpreadsheet(models.Model):
     lead_id = fields.Many2one('crm.lead', string="Opportunity", ondelete='cascade')
     product_category_id = fields.Many2one("product.category",string="Product Category",store=True)
     company_id = fields.Many2one('res.company', default=lambda self: self.env.company)
-    raw_spreadsheet_data = fields.Text("Raw Spreadsheet Data")
+    raw_spreadsheet_data = fields.Text(
+        "Raw Spreadsheet Data",
+        compute='_compute_raw_spreadsheet_data',
+        inverse='_inverse_raw_spreadsheet_data',
+        help="Whole document, the sheets of the category template included.",
+    )
+    raw_spreadsheet_data_compressed = fields.Binary(
+        "Compressed Raw Spreadsheet Data",
+        attachment=True,
+        help="Per-lead part of the document: sheets of the category template that were not "
+             "modified are only stored as a reference to it (see template_cache_id).",
+    )
+    template_cache_id = fields.Many2one(
+        'crm.spreadsheet.template.cache',
+        string="Calculation Template",
+        readonly=True,
+        index=True,
+        ondelete='restrict',
+        help="Converted category template the spreadsheet was created from.",
+    )
+    material_lines_fingerprint = fields.Char(
+        "Material Lines Fingerprint",
+        copy=False,
+        readonly=True,
+        help="Digest of the material lines the spreadsheet was synced with at the last session join.",
+    )
+    provisioning_failed = fields.Boolean(
+        "Provisioning Failed",
+        copy=False,
+        readonly=True,
+        help="The material line sheets could not be built ahead of the first opening, the provisioning "
+             "cron no longer picks the spreadsheet. Opening it retries.",
+    )
+    replay_revision_count = fields.Integer(
+        "Revisions to Replay",
+        copy=False,
+        readonly=True,
+        help="Active revisions replayed when opening the spreadsheet (see spreadsheet.revision).",
+    )
+    replay_revision_bytes = fields.Integer(
+        "Revision Bytes to Replay",
+        copy=False,
+        readonly=True,
+        help="Size of the commands of the active revisions replayed when opening the spreadsheet.",
+    )
+
+    _sql_constraints = [
+        ('lead_id_unique', 'unique(lead_id)', "An opportunity can only have one quote calculator."),
+    ]
 
     # -------------------------------------------------------------
     # ACTIONS
     # -------------------------------------------------------------
     def get_formview_action(self, access_uid=None):
-        print("DEBUG: get_formview_action called for spreadsheet id(s):", self.ids)
         return self.action_open_spreadsheet()
 
     def action_open_spreadsheet(self):
         self.ensure_one()
-        print(f"DEBUG: action_open_spreadsheet -> id: {self.id}, name: {self.name}")
         return {
             'type': 'ir.actions.client',
             'tag': 'action_crm_lead_spreadsheet',
@@ -49,141 +113,261 @@ class CrmLeadSpreadsheet(models.Model):
     # -------------------------------------------------------------
     @api.model_create_multi
     def create(self, vals_list):
-        print("DEBUG: create() called with vals_list:", vals_list)
-        records = super().create(vals_list)
+        # Reference the category template instead of copying its data: only the
+        # per-lead changes end up in raw_spreadsheet_data.
+        category_ids = {vals['product_category_id'] for vals in vals_list
+                        if vals.get('product_category_id') and 'template_cache_id' not in vals}
+        if category_ids:
+            categories = self.env['product.category'].browse(category_ids)
+            template_by_category = {category.id: category.template_cache_id.id for category in categories}
+            for vals in vals_list:
+                if vals.get('product_category_id') and 'template_cache_id' not in vals:
+                    vals['template_cache_id'] = template_by_category.get(vals['product_category_id'], False)
+        return super().create(vals_list)
 
-        for rec in records:
-            print(f"DEBUG: post-create for record id={rec.id} - product_category_id:",
-                rec.product_category_id.id if rec.product_category_id else False)
+    # -------------------------------------------------------------
+    # STORED DOCUMENT (TEMPLATE + PER-LEAD OVERLAY)
+    # -------------------------------------------------------------
+    @api.depends('raw_spreadsheet_data_compressed', 'template_cache_id')
+    def _compute_raw_spreadsheet_data(self):
+        for spreadsheet in self:
+            document = spreadsheet._load_raw_spreadsheet_data()
+            spreadsheet.raw_spreadsheet_data = spreadsheet_codec.dumps(document) if document else False
 
+    def _inverse_raw_spreadsheet_data(self):
+        for spreadsheet in self:
+            text = spreadsheet.raw_spreadsheet_data
             try:
-                # ✔️ correct field used: product_category_id
-                category = rec.product_category_id
+                document = json.loads(text) if text else None
+            except ValueError:
+                document = None
+            if document is not None:
+                text = spreadsheet._serialize_raw_spreadsheet_data(document)
+            spreadsheet.raw_spreadsheet_data_compressed = spreadsheet_codec.to_binary_field(text)
 
-                if category and category.spreadsheet_data:
-                    rec.raw_spreadsheet_data = category.spreadsheet_data
-                    print(f"DEBUG: 🎉 Template applied for spreadsheet {rec.id} from category {category.id}")
-                else:
-                    print(f"DEBUG: No template available for rec {rec.id} (product_category_id={category.id if category else False})")
+    def _get_stored_raw_spreadsheet_data(self):
+        """Return the stored per-lead part of the document (JSON string), False if none."""
+        self.ensure_one()
+        return spreadsheet_codec.from_binary_field(
+            self.with_context(bin_size=False).raw_spreadsheet_data_compressed)
+
+    def _get_template_document(self):
+        self.ensure_one()
+        if not self.template_cache_id.spreadsheet_data:
+            return {}
+        try:
+            return json.loads(self.template_cache_id.spreadsheet_data)
+        except Exception:
+            _logger.warning("Invalid template data on spreadsheet %s, ignoring it", self.id, exc_info=True)
+            return {}
 
-            except Exception as e:
-                print("DEBUG: Exception while applying spreadsheet template for rec", rec.id, "error:", e)
+    def _load_raw_spreadsheet_data(self):
+        """Return the stored document, template sheets included.
 
-        return records
+        Sheets referenced with TEMPLATE_SHEET_KEY are taken from the template.
+        Without any stored data, the document is the template itself.
+        """
+        self.ensure_one()
+        with instrumentation.phase('crm.raw.load', spreadsheet=self.id):
+            overlay = None
+            stored_data = self._get_stored_raw_spreadsheet_data()
+            if stored_data:
+                try:
+                    overlay = json.loads(stored_data)
+                except Exception:
+                    _logger.warning("Invalid raw_spreadsheet_data on spreadsheet %s, ignoring it", self.id,
+                                    exc_info=True)
+            template = self._get_template_document()
+            if overlay is None:
+                return template
+            if not any(sheet.get(TEMPLATE_SHEET_KEY) for sheet in overlay.get('sheets', [])):
+                return overlay
+
+            template_sheets = {sheet.get('id'): sheet for sheet in template.get('sheets', [])}
+            sheets = []
+            for sheet in overlay.get('sheets', []):
+                if not sheet.get(TEMPLATE_SHEET_KEY):
+                    sheets.append(sheet)
+                elif sheet.get('id') in template_sheets:
+                    sheets.append(template_sheets[sheet['id']])
+            return dict(overlay, sheets=sheets)
+
+    def _serialize_raw_spreadsheet_data(self, document):
+        """Serialize ``document`` for raw_spreadsheet_data_compressed, replacing
+        the sheets identical to the template ones by a reference."""
+        self.ensure_one()
+        template_sheets = {sheet.get('id'): sheet for sheet in self._get_template_document().get('sheets', [])}
+        if template_sheets:
+            document = dict(document, sheets=[
+                {'id': sheet['id'], TEMPLATE_SHEET_KEY: True}
+                if template_sheets.get(sheet.get('id')) == sheet else sheet
+                for sheet in document.get('sheets', [])
+            ])
+        return spreadsheet_codec.dumps(document)
+
+    def _save_raw_spreadsheet_data(self, document):
+        self.ensure_one()
+        with instrumentation.phase('crm.raw.save', spreadsheet=self.id):
+            self.raw_spreadsheet_data_compressed = spreadsheet_codec.to_binary_field(
+                self._serialize_raw_spreadsheet_data(document))
 
     # -------------------------------------------------------------
     # SESSION JOIN
     # -------------------------------------------------------------
+    def _get_material_lines_fingerprint(self):
+        """Return a cheap digest of the material lines of the lead.
+
+        Only the line ids are taken into account: sheets and lists are added
+        and removed per line, so the set of ids is all the join depends on.
+        """
+        self.ensure_one()
+        line_ids = sorted(self.lead_id.material_line_ids.ids) if self.lead_id else []
+        key = ",".join(map(str, line_ids))
+        if self._is_consolidated_layout():
+            # switching layout must trigger the migration of the document
+            key = f"{MATERIAL_LINES_LIST_ID}:{key}"
+        return hashlib.sha1(key.encode()).hexdigest()
+
     def join_spreadsheet_session(self, access_token=None):
-        """Ensure spreadsheet stays in sync with CRM material lines (add/remove only)."""
+        """Ensure spreadsheet stays in sync with CRM material lines (add/remove only).
+
+        When the material lines did not change since the last join (same
+        fingerprint), the stored document is neither parsed nor rewritten. The
+        fingerprint is only saved once the sync succeeded, so that a failed
+        sync is retried on the next join.
+        """
         self.ensure_one()
-        print(f"\nDEBUG: join_spreadsheet_session start for spreadsheet id={self.id}, lead_id={self.lead_id.id if self.lead_id else False}")
+        _logger.debug("join_spreadsheet_session start for spreadsheet %s (lead %s)", self.id, self.lead_id.id)
 
-        try:
-            self._sync_sheets_with_material_lines()
-        except Exception as e:
-            print("DEBUG: _sync_sheets_with_material_lines raised:", e)
+        fingerprint, synced = self._dispatch_material_lines_sync()
 
-        data = super().join_spreadsheet_session(access_token)
-        print("DEBUG: Raw data from super().join_spreadsheet_session keys:", list(data.keys()))
+        with instrumentation.phase('crm.join.load_json', spreadsheet=self.id):
+            data = super().join_spreadsheet_session(access_token)
         data.update({
             'lead_id': self.lead_id.id if self.lead_id else False,
             'lead_display_name': self.lead_id.display_name if self.lead_id else False,
-            'sheet_id': self.id
+            'sheet_id': self.id,
+            'field_sync_schema': calculator_models.get_field_sync_schema(self.env),
         })
 
-        spreadsheet_json = data.get('data') or {}
-        print("DEBUG: spreadsheet_json keys before manipulation:", list(spreadsheet_json.keys()))
-        lists = spreadsheet_json.get('lists') or {}
-        sheets = spreadsheet_json.get('sheets') or []
+        if fingerprint is None:
+            _logger.debug("Material lines of spreadsheet %s unchanged since last join", self.id)
+            instrumentation.increment('crm.join.unchanged')
+            return data
+
+        data['data'], _synced = self._store_material_lines_sync(data.get('data'), fingerprint, synced)
+        return data
+
+    def _dispatch_material_lines_sync(self):
+        """Dispatch the sync revision of the material lines when they changed
+        since the last sync (first step of the session join).
 
-        current_line_ids = set(self.lead_id.material_line_ids.ids) if self.lead_id else set()
-        existing_list_ids = {int(list_id) for list_id in lists.keys() if list_id.isdigit()}
+        :return: ``(fingerprint, synced)``, ``fingerprint`` being None when
+            the lines did not change
+        """
+        self.ensure_one()
+        fingerprint = self._get_material_lines_fingerprint()
+        if fingerprint == self.material_lines_fingerprint:
+            return None, True
+        try:
+            synced = self._sync_sheets_with_material_lines()
+        except Exception:
+            _logger.exception("Failed to sync the sheets of spreadsheet %s with its material lines", self.id)
+            synced = False
+        return fingerprint, synced
+
+    def _store_material_lines_sync(self, data, fingerprint, synced):
+        """Add and remove the material line sheets of the session snapshot
+        ``data`` and store it (second step of the session join). The new
+        ``fingerprint`` is only saved when everything was synced.
+
+        :return: ``(updated data, synced)``
+        """
+        self.ensure_one()
+        document = SpreadsheetDocument(data)
+        consolidated = self._is_consolidated_layout(document)
+        if consolidated and not synced:
+            # the sync revision was rolled back: keep the stored document as is
+            # (see _sync_sheets_with_material_lines), the join retries the sync
+            return data, False
 
-        print("DEBUG: current_line_ids:", current_line_ids)
-        print("DEBUG: existing_list_ids:", existing_list_ids)
+        with instrumentation.phase('crm.join.line_diff', spreadsheet=self.id):
+            current_line_ids = set(self.lead_id.material_line_ids.ids) if self.lead_id else set()
+            existing_list_ids = self._get_list_line_ids(document)
+            existing_line_ids = self._get_sheet_line_ids(document) if consolidated else existing_list_ids
 
-        missing_ids = current_line_ids - existing_list_ids
-        removed_ids = existing_list_ids - current_line_ids
+            missing_ids = current_line_ids - existing_line_ids
+            removed_ids = existing_line_ids - current_line_ids
+            # per-line lists replaced by the consolidated list
+            migrated_ids = existing_list_ids if consolidated else set()
 
-        print("DEBUG: missing_ids (to ADD):", missing_ids)
-        print("DEBUG: removed_ids (to REMOVE):", removed_ids)
+        _logger.debug("Spreadsheet %s: lines to add %s, lines to remove %s", self.id, missing_ids, removed_ids)
 
         # --- ADD NEW SHEETS ---
-        for line_id in missing_ids:
-            try:
-                # ✅ IMPROVEMENT: Check if sheet already exists in category template
-                sheet_id = f"sheet_{line_id}"
-                existing_sheet = next((s for s in sheets if s.get('id') == sheet_id), None)
-                
-                if existing_sheet:
-                    print(f"DEBUG: ✅ Sheet already exists in template for line {line_id}, only adding list")
-                    # Sheet already exists in category template, just add list
-                    list_data = self._create_list_for_material_line(line_id)
-                    lists[str(line_id)] = list_data
-                else:
-                    # Sheet doesn't exist, create both sheet and list
-                    new_sheet_data = self._create_sheet_for_material_line(line_id)
-                    lists[str(line_id)] = new_sheet_data['list']
-                    sheets.append(new_sheet_data['sheet'])
-                    print(f"DEBUG: Added sheet/list for material_line {line_id}")
-                    
-            except Exception as e:
-                print("DEBUG: Error adding sheet for line_id", line_id, "error:", e)
+        with instrumentation.phase('crm.join.add_sheets', spreadsheet=self.id, lines=len(missing_ids)):
+            definitions = self._prepare_material_line_sheets(missing_ids)
+            for line_id, definition in definitions.items():
+                if not consolidated:
+                    document.set_list(str(line_id), definition['list'])
+                # the sheet may already exist (e.g. in the category template): keep it
+                document.add_sheet(definition['sheet'])
+            if consolidated:
+                document.set_list(MATERIAL_LINES_LIST_ID, self._get_material_lines_list_definition())
+                document.remove_lists(str(line_id) for line_id in migrated_ids)
+        instrumentation.increment('crm.join.sheets_added', len(definitions))
 
         # --- REMOVE DELETED SHEETS ---
         if removed_ids:
-            for rid in removed_ids:
-                if str(rid) in lists:
-                    del lists[str(rid)]
-                    print(f"DEBUG: Removed list entry for {rid}")
-                # ✅ IMPROVEMENT: Don't remove sheets from category template
-                # Only remove sheets that were specifically created for material lines
-            
-            # ✅ IMPROVEMENT: Only remove sheet objects that were created for material lines
-            sheets_before = len(sheets)
-            sheets_to_remove = []
-            for s in sheets:
-                sheet_id = s.get('id', '')
-                if sheet_id.startswith('sheet_'):
-                    try:
-                        line_id = int(sheet_id.replace('sheet_', ''))
-                        if line_id in removed_ids:
-                            sheets_to_remove.append(s)
-                    except ValueError:
-                        continue
-            
-            for sheet in sheets_to_remove:
-                sheets.remove(sheet)
-                
-            print(f"DEBUG: Removed {len(sheets_to_remove)} sheets from sheets array")
-
-        # Save back
-        spreadsheet_json['lists'] = lists
-        spreadsheet_json['sheets'] = sheets
-        data['data'] = spreadsheet_json
-        try:
-            self.raw_spreadsheet_data = json.dumps(spreadsheet_json)
-            print("DEBUG: raw_spreadsheet_data updated (length):", len(self.raw_spreadsheet_data or ""))
-        except Exception as e:
-            print("DEBUG: Error saving raw_spreadsheet_data:", e)
+            with instrumentation.phase('crm.join.remove_sheets', spreadsheet=self.id, lines=len(removed_ids)):
+                document.remove_lists(str(rid) for rid in removed_ids)
+                # only the sheets created for material lines, never the template ones
+                removed_sheets = document.remove_sheets(f"sheet_{rid}" for rid in removed_ids)
+                _logger.debug("Removed %s sheets from spreadsheet %s", removed_sheets, self.id)
+        instrumentation.increment('crm.join.sheets_removed', len(removed_ids))
+
+        # Save back (only rewrite the stored document when it changed)
+        spreadsheet_json = document.data
+        with instrumentation.phase('crm.join.save', spreadsheet=self.id):
+            vals = {}
+            if missing_ids or removed_ids or migrated_ids or not self.raw_spreadsheet_data_compressed:
+                try:
+                    vals['raw_spreadsheet_data_compressed'] = spreadsheet_codec.to_binary_field(
+                        self._serialize_raw_spreadsheet_data(spreadsheet_json))
+                except Exception:
+                    _logger.exception("Failed to serialize the data of spreadsheet %s", self.id)
+                    synced = False
+            if synced:
+                vals['material_lines_fingerprint'] = fingerprint
+                if self.provisioning_failed:
+                    vals['provisioning_failed'] = False
+            if vals:
+                self.write(vals)
+        return spreadsheet_json, synced
+
+    def _should_be_snapshotted(self):
+        """Also snapshot once the history replayed on open exceeds the revision budget."""
+        if super()._should_be_snapshotted():
+            return True
+        return self.env['spreadsheet.revision']._exceeds_revision_budget(
+            self.replay_revision_count, self.replay_revision_bytes,
+        )
 
-        print(f"DEBUG: join_spreadsheet_session end for spreadsheet id={self.id}\n")
-        return data
     # -------------------------------------------------------------
     # EMPTY DATA
     # -------------------------------------------------------------
     def _empty_spreadsheet_data(self):
         """Return a base spreadsheet JSON structure with one sheet per material line."""
-        print("DEBUG: _empty_spreadsheet_data called for id(s):", self.ids)
         data = super()._empty_spreadsheet_data() or {}
         data.setdefault('lists', {})
         data['sheets'] = []
 
         if not self.lead_id or not self.lead_id.material_line_ids:
-            print("DEBUG: No lead or material lines, returning base empty data")
             return data
 
+        consolidated = self._is_consolidated_layout()
+        if consolidated:
+            data['lists'][MATERIAL_LINES_LIST_ID] = self._get_material_lines_list_definition()
+
         for line in self.lead_id.material_line_ids:
             sheet_id = f"sheet_{line.id}"
             list_id = str(line.id)
@@ -193,6 +377,8 @@ class CrmLeadSpreadsheet(models.Model):
                 'id': sheet_id,
                 'name': product_name,
             })
+            if consolidated:
+                continue
 
             data['lists'][list_id] = {
                 'id': list_id,
@@ -207,9 +393,7 @@ class CrmLeadSpreadsheet(models.Model):
                     'material_line_ids': {'chain': 'lead_id', 'type': 'many2one'},
                 },
             }
-            print(f"DEBUG: _empty_spreadsheet_data -> added sheet/list for line.id={line.id}, product='{product_name}'")
 
-        print("DEBUG: _empty_spreadsheet_data completed, sheets count:", len(data['sheets']))
         return data
 
     # -------------------------------------------------------------
@@ -218,27 +402,88 @@ class CrmLeadSpreadsheet(models.Model):
     def _dispatch_insert_list_revision(self):
         self.ensure_one()
         line_id = self._context.get('material_line_id')
-        print("DEBUG: _dispatch_insert_list_revision context material_line_id:", line_id)
         if not line_id:
-            print("DEBUG: No material_line_id in context, returning")
+            return
+        if self._is_consolidated_layout():
+            # positions in the consolidated list depend on the other lines
+            self._sync_sheets_with_material_lines()
             return
 
-        line = self.env['crm.material.line'].browse(line_id)
-        if not line.exists():
-            print("DEBUG: Line not exists for id:", line_id)
+        definition = self._prepare_material_line_sheets([line_id]).get(line_id)
+        if not definition:
+            _logger.debug("Material line %s does not exist, no sheet inserted", line_id)
             return
 
-        sheet_id = f"sheet_{line.id}"
-        list_id = str(line.id)
-        product_name = (line.product_template_id.display_name or "Item")[:31]
+        commands = self._get_insert_list_commands(definition)
+        try:
+            self._dispatch_commands(commands)
+        except Exception:
+            _logger.exception("Failed to dispatch the insert revision of material line %s", line_id)
+
+    @api.model
+    @tools.ormcache()
+    def _get_material_line_field_types(self):
+        """Return ``(name, type)`` of CRM_MATERIAL_LINE_FIELDS.
 
-        columns = [
-            {'name': f, 'type': self.env['crm.material.line']._fields.get(f).type if self.env['crm.material.line']._fields.get(f) else 'unknown'}
-            for f in CRM_MATERIAL_LINE_FIELDS
-        ]
-        print("DEBUG: _dispatch_insert_list_revision -> building commands for line:", line_id, "columns:", columns)
+        Field types only depend on the registry, so they are computed once.
+        """
+        line_fields = self.env['crm.material.line']._fields
+        return tuple((f, line_fields[f].type if f in line_fields else 'unknown') for f in CRM_MATERIAL_LINE_FIELDS)
+
+    @api.model
+    def _get_material_line_columns(self):
+        """Return the list columns (name and field type) of CRM_MATERIAL_LINE_FIELDS."""
+        return [{'name': name, 'type': field_type} for name, field_type in self._get_material_line_field_types()]
+
+    def _prepare_material_line_sheets(self, material_line_ids):
+        """Build the sheet and list definitions of several material lines at once.
+
+        Lines are fetched in a single query and column metadata is computed once.
+        Ids of lines that no longer exist are skipped.
+
+        :param material_line_ids: iterable of ``crm.material.line`` ids
+        :return: dict mapping each line id to ``{'sheet', 'list', 'columns'}``
+        """
+        lines = self.env['crm.material.line'].browse(material_line_ids).exists()
+        if not lines:
+            return {}
+        lines.fetch(['product_template_id'])
+        columns = self._get_material_line_columns()
+
+        definitions = {}
+        for line in lines:
+            sheet_id = f"sheet_{line.id}"
+            list_id = str(line.id)
+            product_name = (line.product_template_id.display_name or "Item")[:31]
+            definitions[line.id] = {
+                'sheet': {'id': sheet_id, 'name': product_name},
+                'list': {
+                    'id': list_id,
+                    'model': 'crm.material.line',
+                    'columns': CRM_MATERIAL_LINE_FIELDS,
+                    'domain': [['id', '=', line.id]],
+                    'sheetId': sheet_id,
+                    'name': product_name,
+                    'context': {},
+                    'orderBy': [],
+                    'fieldMatching': {'material_line_ids': {'chain': 'lead_id', 'type': 'many2one'}},
+                },
+                'columns': columns,
+            }
+        return definitions
 
-        commands = [
+    def _get_insert_list_commands(self, definition):
+        """Return the revision commands creating the sheet, list and table of a material line.
+
+        :param definition: one value of :meth:`_prepare_material_line_sheets`
+        """
+        sheet_id = definition['sheet']['id']
+        list_id = definition['list']['id']
+        product_name = definition['sheet']['name']
+        columns = definition['columns']
+        line_domain = definition['list']['domain']
+
+        return [
             {
                 'type': 'CREATE_SHEET',
                 'sheetId': sheet_id,
@@ -249,7 +494,7 @@ class CrmLeadSpreadsheet(models.Model):
                 'listId': list_id,
                 'model': 'crm.material.line',
                 'columns': CRM_MATERIAL_LINE_FIELDS,
-                'domain': [['id', '=', line.id]],
+                'domain': line_domain,
                 'context': {},
                 'orderBy': [],
             },
@@ -262,166 +507,337 @@ class CrmLeadSpreadsheet(models.Model):
                 'linesNumber': 1,
                 'columns': columns,
             },
-            {
-                'type': 'CREATE_TABLE',
-                'sheetId': sheet_id,
-                'tableType': 'static',
-                'ranges': [{
-                    '_sheetId': sheet_id,
-                    '_zone': {'top': 0, 'bottom': 1, 'left': 0, 'right': len(columns) - 1}
-                }],
-                'config': {
-                    'firstColumn': False,
-                    'hasFilters': True,
-                    'totalRow': False,
-                    'bandedRows': True,
-                    'styleId': 'TableStyleMedium5',
-                }
-            },
+            self._get_line_table_command(sheet_id, columns),
             {
                 'type': 'UPDATE_ODOO_LIST_DATA',
                 'listId': list_id,
             }
         ]
-        try:
-            self._dispatch_commands(commands)
-            print(f"DEBUG: _dispatch_insert_list_revision dispatched commands for line {line_id}")
-        except Exception as e:
-            print("DEBUG: Error dispatching commands for line", line_id, "error:", e)
+
+    def _get_line_table_command(self, sheet_id, columns):
+        """Return the command creating the table over the header and row of a line sheet."""
+        return {
+            'type': 'CREATE_TABLE',
+            'sheetId': sheet_id,
+            'tableType': 'static',
+            'ranges': [{
+                '_sheetId': sheet_id,
+                '_zone': {'top': 0, 'bottom': 1, 'left': 0, 'right': len(columns) - 1}
+            }],
+            'config': {
+                'firstColumn': False,
+                'hasFilters': True,
+                'totalRow': False,
+                'bandedRows': True,
+                'styleId': 'TableStyleMedium5',
+            }
+        }
+
+    # -------------------------------------------------------------
+    # CONSOLIDATED LAYOUT
+    # -------------------------------------------------------------
+    def _is_consolidated_layout(self, document=None):
+        """Whether the material lines are read through the single MATERIAL_LINES_LIST_ID list.
+
+        Line sheets then address their line by position in that list (lines
+        ordered by id), so opening the calculator loads one list instead of one
+        per line. Enabled by a setting; a document converted to it stays so.
+        """
+        if document is not None and MATERIAL_LINES_LIST_ID in document.lists:
+            return True
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param(
+            'crm_spreadsheet_enhancement.consolidated_material_list', 'False'), False)
+
+    def _get_material_lines_list_definition(self):
+        self.ensure_one()
+        return {
+            'id': MATERIAL_LINES_LIST_ID,
+            'model': 'crm.material.line',
+            'columns': CRM_MATERIAL_LINE_FIELDS,
+            'domain': [['lead_id', '=', self.lead_id.id]],
+            'name': _("Material Lines"),
+            'context': {},
+            'orderBy': [{'name': 'id', 'asc': True}],
+            'fieldMatching': {'material_line_ids': {'chain': 'lead_id', 'type': 'many2one'}},
+        }
+
+    @staticmethod
+    def _get_sheet_line_ids(document):
+        """Return the ids of the material lines having a sheet in ``document``."""
+        return {int(sheet_id[len('sheet_'):]) for sheet_id in document.sheet_ids()
+                if sheet_id and sheet_id.startswith('sheet_') and sheet_id[len('sheet_'):].isdigit()}
+
+    @staticmethod
+    def _get_list_line_ids(document):
+        """Return the ids of the material lines having their own list in ``document``."""
+        return {int(list_id) for list_id in document.list_ids() if list_id.isdigit()}
+
+    def _get_line_cell_commands(self, sheet_id, position):
+        """Return the commands writing the header and the row of the line at
+        ``position`` (1-based) of the consolidated list in its sheet."""
+        commands = []
+        for col, field_name in enumerate(CRM_MATERIAL_LINE_FIELDS):
+            commands.append({
+                'type': 'UPDATE_CELL', 'sheetId': sheet_id, 'col': col, 'row': 0,
+                'content': f'=ODOO.LIST.HEADER("{MATERIAL_LINES_LIST_ID}","{field_name}")',
+            })
+            commands.append({
+                'type': 'UPDATE_CELL', 'sheetId': sheet_id, 'col': col, 'row': 1,
+                'content': f'=ODOO.LIST("{MATERIAL_LINES_LIST_ID}",{position},"{field_name}")',
+            })
+        return commands
+
+    def _get_consolidated_sync_commands(self, document, current_line_ids):
+        """Return the commands bringing ``document`` to the consolidated layout
+        for ``current_line_ids``, as a single revision.
+
+        Per-line lists are replaced by the consolidated list, the sheets of the
+        removed lines are deleted and the sheets of the remaining lines whose
+        position changed get their formulas and field syncs (REMAP_FIELD_SYNCS)
+        pointed to the new position.
+        """
+        sheet_line_ids = self._get_sheet_line_ids(document)
+        list_line_ids = self._get_list_line_ids(document)
+        positions_before = {line_id: index for index, line_id in enumerate(sorted(sheet_line_ids), 1)}
+        positions = {line_id: index for index, line_id in enumerate(sorted(current_line_ids), 1)}
+
+        commands = []
+        if MATERIAL_LINES_LIST_ID not in document.lists:
+            definition = self._get_material_lines_list_definition()
+            commands.append({
+                'type': 'REGISTER_ODOO_LIST',
+                'listId': MATERIAL_LINES_LIST_ID,
+                'model': definition['model'],
+                'columns': definition['columns'],
+                'domain': definition['domain'],
+                'context': {},
+                'orderBy': definition['orderBy'],
+            })
+
+        remaps = []
+        for line_id in sorted(sheet_line_ids):
+            migrated = line_id in list_line_ids
+            if line_id not in current_line_ids:
+                if not migrated:
+                    remaps.append({
+                        'fromListId': MATERIAL_LINES_LIST_ID, 'fromIndex': positions_before[line_id] - 1,
+                        'toListId': None, 'toIndex': None,
+                    })
+                continue
+            if not migrated and positions_before[line_id] == positions[line_id]:
+                continue
+            commands.extend(self._get_line_cell_commands(f"sheet_{line_id}", positions[line_id]))
+            remaps.append({
+                'fromListId': str(line_id) if migrated else MATERIAL_LINES_LIST_ID,
+                'fromIndex': 0 if migrated else positions_before[line_id] - 1,
+                'toListId': MATERIAL_LINES_LIST_ID,
+                'toIndex': positions[line_id] - 1,
+            })
+        if remaps:
+            commands.append({'type': 'REMAP_FIELD_SYNCS', 'remaps': remaps})
+
+        for line_id in sorted(list_line_ids):
+            commands.append({'type': 'UNREGISTER_ODOO_LIST', 'listId': str(line_id)})
+        for line_id in sorted(sheet_line_ids - current_line_ids):
+            commands.append({'type': 'DELETE_SHEET', 'sheetId': f"sheet_{line_id}"})
+
+        definitions = self._prepare_material_line_sheets(current_line_ids - sheet_line_ids)
+        for line_id, definition in sorted(definitions.items()):
+            sheet_id = definition['sheet']['id']
+            commands.append({'type': 'CREATE_SHEET', 'sheetId': sheet_id, 'name': definition['sheet']['name']})
+            commands.extend(self._get_line_cell_commands(sheet_id, positions[line_id]))
+            commands.append(self._get_line_table_command(sheet_id, definition['columns']))
+
+        if commands:
+            commands.append({'type': 'UPDATE_ODOO_LIST_DATA', 'listId': MATERIAL_LINES_LIST_ID})
+        return commands
 
     # -------------------------------------------------------------
     # SYNC METHODS
     # -------------------------------------------------------------
     def _sync_sheets_with_material_lines(self):
+        """Add and remove the sheets of the material lines added to and removed
+        from the lead since the last sync.
+
+        :return: whether the spreadsheet is in sync with the material lines
+        """
         self.ensure_one()
-        print("DEBUG: _sync_sheets_with_material_lines called for spreadsheet id:", self.id)
         if not self.lead_id:
-            print("DEBUG: No lead_id set on spreadsheet, returning")
-            return
-
+            return True
+
+        document = SpreadsheetDocument(self._load_raw_spreadsheet_data())
+
+        if self._is_consolidated_layout(document):
+            current_line_ids = set(self.lead_id.material_line_ids.ids)
+            with instrumentation.phase('crm.sync.line_diff', spreadsheet=self.id):
+                commands = self._get_consolidated_sync_commands(document, current_line_ids)
+            # All or nothing: the remaining line sheets address their line by
+            # position, removing sheets without renumbering them would point
+            # them to another line. A failed revision is rolled back and the
+            # sync retried on the next join.
+            return self._dispatch_sync_revision(commands)
+
+        with instrumentation.phase('crm.sync.line_diff', spreadsheet=self.id):
+            current_line_ids = set(self.lead_id.material_line_ids.ids)
+
+            # Only the sheets and lists created for material lines are considered,
+            # template sheets are left alone
+            sheet_line_ids = self._get_sheet_line_ids(document)
+            list_line_ids = self._get_list_line_ids(document)
+
+            # Gather every add and delete so that the whole sync is a single revision
+            removed_line_ids = (sheet_line_ids | list_line_ids) - current_line_ids
+            missing_line_ids = [line_id for line_id in self.lead_id.material_line_ids.ids
+                                if line_id not in sheet_line_ids]
+
+        commands_per_line = [(line_id, self._get_delete_sheet_commands(line_id))
+                             for line_id in sorted(removed_line_ids)]
+        definitions = self._prepare_material_line_sheets(missing_line_ids)
+        commands_per_line += [(line_id, self._get_insert_list_commands(definition))
+                              for line_id, definition in definitions.items()]
+
+        _logger.debug("Spreadsheet %s: %s sheets to add, %s to remove",
+                      self.id, len(definitions), len(removed_line_ids))
+        return self._dispatch_sync_commands(commands_per_line, removed_line_ids)
+
+    def _dispatch_sync_revision(self, commands):
+        """Dispatch ``commands`` as one revision and return whether it succeeded."""
+        self.ensure_one()
+        if not commands:
+            return True
         try:
-            current_data = json.loads(self.raw_spreadsheet_data) if self.raw_spreadsheet_data else {}
-        except Exception as e:
-            print("DEBUG: raw_spreadsheet_data JSON load failed:", e)
-            current_data = {}
-
-        current_sheets = current_data.get('sheets', [])
-        current_lists = current_data.get('lists', {})
-        current_line_ids = set(self.lead_id.material_line_ids.ids)
-
-        print("DEBUG: current_sheets count:", len(current_sheets))
-        print("DEBUG: current_lists keys:", list(current_lists.keys()))
-        print("DEBUG: current_line_ids:", current_line_ids)
-
-        # ✅ IMPROVEMENT: Only delete material line sheets that are specifically created for removed lines
-        for sheet in list(current_sheets):
-            sheet_id = sheet.get('id', '')
-            if sheet_id.startswith('sheet_'):
-                try:
-                    line_id = int(sheet_id.replace('sheet_', ''))
-                    if line_id not in current_line_ids:
-                        print("DEBUG: Deleting sheet for line_id not present:", line_id)
-                        self._delete_sheet_for_material_line(line_id)
-                except ValueError:
-                    print("DEBUG: Skipping non-numeric sheet id:", sheet_id)
-                    continue
-                    
-        # ✅ IMPROVEMENT: Only delete lists for removed material lines
-        for list_id in list(current_lists.keys()):
-            try:
-                line_id = int(list_id)
-                if line_id not in current_line_ids:
-                    print("DEBUG: Deleting list for line_id not present:", line_id)
-                    self._delete_sheet_for_material_line(line_id)
-            except ValueError:
-                print("DEBUG: Skipping non-numeric list id:", list_id)
-                continue
-
-        existing_sheet_ids = {int(sheet['id'].replace('sheet_', '')) for sheet in current_sheets
-                            if sheet.get('id', '').startswith('sheet_')}
-        print("DEBUG: existing_sheet_ids extracted:", existing_sheet_ids)
-        
-        # ✅ IMPROVEMENT: Check if sheet exists before creating
-        for line in self.lead_id.material_line_ids:
-            if line.id not in existing_sheet_ids:
-                print("DEBUG: Missing sheet for line.id=", line.id, "-> will dispatch insert")
-                self.with_context(material_line_id=line.id)._dispatch_insert_list_revision()
-            else:
-                print(f"DEBUG: ✅ Sheet already exists for line.id={line.id} in category template")
+            with self.env.cr.savepoint(), instrumentation.phase(
+                    'crm.sync.dispatch_revisions', spreadsheet=self.id, commands=len(commands)):
+                self._dispatch_commands(commands)
+        except Exception:
+            _logger.warning("Failed to dispatch a sync revision of spreadsheet %s", self.id, exc_info=True)
+            return False
+        return True
+
+    def _dispatch_sync_commands(self, commands_per_line, removed_line_ids):
+        """Dispatch the sync commands of all the lines as one revision.
+
+        If that revision fails, each line gets its own revision so that one
+        bad line does not block the others. The removed lines whose revision
+        still fails are removed from the stored document instead.
+
+        :param commands_per_line: list of ``(line_id, commands)``
+        :return: whether every line was synced
+        """
+        self.ensure_one()
+        if self._dispatch_sync_revision([command for _line_id, commands in commands_per_line for command in commands]):
+            return True
+        if len(commands_per_line) == 1:
+            failed_line_ids = {commands_per_line[0][0]}
+        else:
+            _logger.info("Dispatching the sync of spreadsheet %s line by line", self.id)
+            failed_line_ids = {line_id for line_id, commands in commands_per_line
+                               if not self._dispatch_sync_revision(commands)}
+
+        failed_removed_ids = failed_line_ids & set(removed_line_ids)
+        if failed_removed_ids and not self._cleanup_deleted_sheets_from_data(failed_removed_ids):
+            return False
+        return not failed_line_ids - failed_removed_ids
 
     def _create_sheet_for_material_line(self, material_line_id):
         self.ensure_one()
-        print("DEBUG: _create_sheet_for_material_line called for id:", material_line_id)
-        line = self.env['crm.material.line'].browse(material_line_id)
-        if not line.exists():
-            print("DEBUG: _create_sheet_for_material_line: line does not exist:", material_line_id)
+        definition = self._prepare_material_line_sheets([material_line_id]).get(material_line_id)
+        if not definition:
             return {'sheet': {}, 'list': {}}
+        return {'sheet': definition['sheet'], 'list': definition['list']}
 
-        sheet_id = f"sheet_{line.id}"
-        list_id = str(line.id)
-        product_name = (line.product_template_id.display_name or "Item")[:31]
-
-        sheet_data = {'id': sheet_id, 'name': product_name}
-        list_data = {
-            'id': list_id,
-            'model': 'crm.material.line',
-            'columns': CRM_MATERIAL_LINE_FIELDS,
-            'domain': [['id', '=', line.id]],
-            'sheetId': sheet_id,
-            'name': product_name,
-            'context': {},
-            'orderBy': [],
-            'fieldMatching': {'material_line_ids': {'chain': 'lead_id', 'type': 'many2one'}},
-        }
-        print("DEBUG: _create_sheet_for_material_line -> returning sheet/list for line:", material_line_id)
-        return {'sheet': sheet_data, 'list': list_data}
+    def _get_delete_sheet_commands(self, material_line_id):
+        """Return the revision commands removing the sheet and list of a material line."""
+        return [
+            {'type': 'DELETE_SHEET', 'sheetId': f"sheet_{material_line_id}"},
+            {'type': 'UNREGISTER_ODOO_LIST', 'listId': str(material_line_id)},
+        ]
 
     def _delete_sheet_for_material_line(self, material_line_id):
         self.ensure_one()
-        sheet_id = f"sheet_{material_line_id}"
-        list_id = str(material_line_id)
-        print("DEBUG: _delete_sheet_for_material_line called for id:", material_line_id, " -> sheet_id:", sheet_id)
-
-        commands = [
-            {'type': 'DELETE_SHEET', 'sheetId': sheet_id},
-            {'type': 'UNREGISTER_ODOO_LIST', 'listId': list_id},
-        ]
+        commands = self._get_delete_sheet_commands(material_line_id)
 
         try:
             self._dispatch_commands(commands)
-            print("DEBUG: _delete_sheet_for_material_line dispatched delete commands for", material_line_id)
-        except Exception as e:
-            print("DEBUG: _delete_sheet_for_material_line dispatch failed, falling back to cleanup. error:", e)
-            self._cleanup_deleted_sheets_from_data(material_line_id)
+        except Exception:
+            _logger.warning("Failed to dispatch the delete revision of material line %s, cleaning up stored data",
+                            material_line_id, exc_info=True)
+            self._cleanup_deleted_sheets_from_data([material_line_id])
 
-    def _cleanup_deleted_sheets_from_data(self, material_line_id):
+    def _cleanup_deleted_sheets_from_data(self, material_line_ids):
+        """Remove the sheets and lists of ``material_line_ids`` from the stored
+        document, in one pass and one save.
+
+        :return: whether the stored document no longer has them
+        """
         self.ensure_one()
-        print("DEBUG: _cleanup_deleted_sheets_from_data for id:", material_line_id)
-        if not self.raw_spreadsheet_data:
-            print("DEBUG: No raw_spreadsheet_data to cleanup")
-            return
+        if not material_line_ids or (not self.raw_spreadsheet_data_compressed and not self.template_cache_id):
+            return True
         try:
-            data = json.loads(self.raw_spreadsheet_data)
-            sheet_id = f"sheet_{material_line_id}"
-            list_id = str(material_line_id)
-            if 'sheets' in data:
-                before = len(data['sheets'])
-                data['sheets'] = [s for s in data['sheets'] if s.get('id') != sheet_id]
-                after = len(data['sheets'])
-                print(f"DEBUG: cleaned sheets: removed {before - after} entries")
-            if 'lists' in data and list_id in data['lists']:
-                del data['lists'][list_id]
-                print("DEBUG: removed list entry", list_id)
-            self.raw_spreadsheet_data = json.dumps(data)
-            print("DEBUG: raw_spreadsheet_data updated after cleanup (length):", len(self.raw_spreadsheet_data))
-        except Exception as e:
-            print("DEBUG: Exception during cleanup:", e)
+            document = SpreadsheetDocument(self._load_raw_spreadsheet_data())
+            removed = document.remove_sheets(f"sheet_{line_id}" for line_id in material_line_ids)
+            removed += document.remove_lists(str(line_id) for line_id in material_line_ids)
+            if removed:
+                self._save_raw_spreadsheet_data(document.data)
+        except Exception:
+            _logger.exception("Failed to clean up material lines %s from spreadsheet %s", material_line_ids, self.id)
+            return False
+        return True
+
+    # -------------------------------------------------------------
+    # PROVISIONING
+    # -------------------------------------------------------------
+    @api.model
+    def _get_to_materialize_domain(self):
+        """Calculators never opened whose lead has material lines."""
+        return [
+            ('lead_id', '!=', False),
+            ('material_lines_fingerprint', '=', False),
+            ('provisioning_failed', '=', False),
+            ('lead_id.material_line_ids', '!=', False),
+        ]
+
+    def _get_spreadsheet_snapshot_data(self):
+        """Parsed snapshot a session join would start from."""
+        self.ensure_one()
+        snapshot = self._get_spreadsheet_serialized_snapshot()
+        return json.loads(snapshot) if snapshot else self._empty_spreadsheet_data()
+
+    def _filtered_to_materialize(self):
+        return self.filtered_domain(self._get_to_materialize_domain())
+
+    def _materialize_material_line_sheets(self):
+        """Build the material line sheets ahead of the first opening, with the
+        sync of the first session join but without building a session.
+
+        Each calculator is synced in its own savepoint: one that fails is
+        logged and flagged (provisioning_failed) instead of rolling back the
+        others and being picked again by every provisioning run.
+        """
+        failed = self.browse()
+        for spreadsheet in self:
+            try:
+                with self.env.cr.savepoint(), \
+                        instrumentation.phase('crm.provision.materialize', spreadsheet=spreadsheet.id):
+                    fingerprint, synced = spreadsheet._dispatch_material_lines_sync()
+                    if fingerprint is not None:
+                        _data, synced = spreadsheet._store_material_lines_sync(
+                            spreadsheet._get_spreadsheet_snapshot_data(), fingerprint, synced)
+            except Exception:
+                _logger.exception("Failed to build the material line sheets of spreadsheet %s", spreadsheet.id)
+                synced = False
+            if not synced:
+                failed |= spreadsheet
+        if failed:
+            _logger.warning("Material line sheets of spreadsheets %s not built, skipped by the next provisioning runs",
+                            failed.ids)
+            failed.write({'provisioning_failed': True})
+        return self - failed
 
     # -------------------------------------------------------------
     # MANUAL SYNC ACTION
     # -------------------------------------------------------------
     def action_sync_sheets(self):
-        print("DEBUG: action_sync_sheets called for ids:", self.ids)
         for spreadsheet in self:
             spreadsheet._sync_sheets_with_material_lines()
         return {
@@ -439,7 +855,6 @@ class CrmLeadSpreadsheet(models.Model):
     # -------------------------------------------------------------
     @api.model
     def _get_spreadsheet_selector(self):
-        print("DEBUG: _get_spreadsheet_selector called for model:", self._name)
         return {
             'model': self._name,
             'display_name': _("CRM Quote Spreadsheets"),
@@ -447,55 +862,85 @@ class CrmLeadSpreadsheet(models.Model):
             'allow_create': False,
         }
 
+    # -------------------------------------------------------------
+    # INSTRUMENTATION
+    # -------------------------------------------------------------
+    @api.model
+    def get_spreadsheet_performance_stats(self, reset=False):
+        """Return the phase counters and latency histograms of the current worker.
+
+        Statistics are kept per process, so each worker reports its own.
+        """
+        if not self.env.is_system():
+            raise AccessError(_("Only administrators can read spreadsheet performance statistics."))
+        stats = instrumentation.get_stats()
+        if reset:
+            instrumentation.reset_stats()
+        return stats
+
     # -------------------------------------------------------------
     # DATA PROVIDERS
     # -------------------------------------------------------------
 
-    @api.model
-    def get_crm_material_lines(self):
-        # NOTE: this method is called from client side via rpc - ensure it logs properly
-        print("DEBUG: get_crm_material_lines called - self:", getattr(self, 'id', None))
+    def get_crm_material_lines(self, offset=0, limit=None, field_names=None):
+        """Return the material lines of the lead, optionally one page at a time.
+
+        Lines are read in a single batched ``read`` and attribute descriptions
+        are built from one prefetched map of the attribute values.
+
+        :param offset: number of lines to skip
+        :param limit: maximum number of lines to return (all remaining when falsy)
+        :param field_names: item keys to return (all when falsy); ``id`` is always included
+        """
+        # NOTE: this method is called from client side via rpc
         self.ensure_one()
         if not self.lead_id:
-            print("DEBUG: get_crm_material_lines -> no lead_id, returning []")
             return []
-        
+
+        lines = self.lead_id.material_line_ids
+        lines = lines[offset:offset + limit] if limit else lines[offset:]
+        if not lines:
+            return []
+
+        keys = set(field_names or MATERIAL_LINE_ITEM_FIELDS) & set(MATERIAL_LINE_ITEM_FIELDS)
+        read_fields = {MATERIAL_LINE_ITEM_FIELDS[key] for key in keys}
+        with_description = 'product_template_attribute_value_ids' in read_fields
+        records = lines.read(sorted(read_fields))
+
+        descriptions = {}
+        if with_description:
+            value_ids = {value_id for record in records for value_id in record['product_template_attribute_value_ids']}
+            descriptions = self._get_attribute_value_descriptions(value_ids)
+
         result = []
-        for line in self.lead_id.material_line_ids:
-            # Build proper attribute description with all selected attributes
-            attribute_description = ""
-            if line.product_template_attribute_value_ids:
-                # Combine all attribute values into a formatted string
-                attribute_parts = []
-                for attr_value in line.product_template_attribute_value_ids:
-                    attribute_parts.append(f"{attr_value.attribute_id.name}: {attr_value.name}")
-                
-                attribute_description = ", ".join(attribute_parts)
-            
-            item = {
-                'id': line.id,
-                'name': line.product_template_id.display_name if line.product_template_id else '',
-                'quantity': line.quantity,
-                'width': line.width,
-                'height': line.height,
-                'length': line.length,
-                'thickness': line.thickness,
-                'description': attribute_description,
-                'attributes_description': attribute_description,
-            }
-            print("DEBUG: get_crm_material_lines -> prepared item:", item)
+        for record in records:
+            item = {'id': record['id']}
+            for key in keys:
+                source = MATERIAL_LINE_ITEM_FIELDS[key]
+                if source == 'product_template_attribute_value_ids':
+                    # Combine all attribute values into a formatted string
+                    item[key] = ", ".join(descriptions[value_id] for value_id in record[source])
+                elif source == 'product_template_id':
+                    item[key] = record[source][1] if record[source] else ''
+                else:
+                    item[key] = record[source]
             result.append(item)
-        
-        print("DEBUG: get_crm_material_lines -> returning", len(result), "items")
         return result
 
+    @api.model
+    def _get_attribute_value_descriptions(self, value_ids):
+        """Map product template attribute value ids to ``"<attribute>: <value>"`` labels."""
+        values = self.env['product.template.attribute.value'].browse(value_ids)
+        return {
+            value['id']: f"{value['attribute_id'][1] if value['attribute_id'] else ''}: {value['name']}"
+            for value in values.read(['attribute_id', 'name'])
+        }
+
     def getMainCrmMaterialLineLists(self):
-        print("DEBUG: getMainCrmMaterialLineLists called for id:", getattr(self, 'id', None))
         self.ensure_one()
         if not self.lead_id or not self.lead_id.material_line_ids:
-            print("DEBUG: getMainCrmMaterialLineLists -> no material lines")
             return []
-        lists = [
+        return [
             {
                 'id': str(line.id),
                 'model': 'crm.material.line',
@@ -506,32 +951,11 @@ class CrmLeadSpreadsheet(models.Model):
             }
             for line in self.lead_id.material_line_ids
         ]
-        print("DEBUG: getMainCrmMaterialLineLists -> built lists for", len(lists), "lines")
-        return lists
     
     def _create_list_for_material_line(self, material_line_id):
         """Create only list data for material line when sheet already exists in template."""
         self.ensure_one()
-        print("DEBUG: _create_list_for_material_line called for id:", material_line_id)
-        line = self.env['crm.material.line'].browse(material_line_id)
-        if not line.exists():
-            print("DEBUG: _create_list_for_material_line: line does not exist:", material_line_id)
+        definition = self._prepare_material_line_sheets([material_line_id]).get(material_line_id)
+        if not definition:
             return {}
-
-        sheet_id = f"sheet_{line.id}"
-        list_id = str(line.id)
-        product_name = (line.product_template_id.display_name or "Item")[:31]
-
-        list_data = {
-            'id': list_id,
-            'model': 'crm.material.line',
-            'columns': CRM_MATERIAL_LINE_FIELDS,
-            'domain': [['id', '=', line.id]],
-            'sheetId': sheet_id,
-            'name': product_name,
-            'context': {},
-            'orderBy': [],
-            'fieldMatching': {'material_line_ids': {'chain': 'lead_id', 'type': 'many2one'}},
-        }
-        print("DEBUG: _create_list_for_material_line -> returning list for line:", material_line_id)
-        return list_data
+        return definition['list']
@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
-import json
-import openpyxl
+from odoo import models, fields, api, modules, _
+from odoo.tools import str2bool
 import base64
-from io import BytesIO
-from openpyxl.utils import get_column_letter, column_index_from_string
+import logging
+import time
+
+from psycopg2 import IntegrityError
+
+_logger = logging.getLogger(__name__)
+
+# A conversion still running after this many starts keeps killing the worker
+# (memory, time limit), it is marked failed instead of being retried
+MAX_CONVERSION_ATTEMPTS = 3
 
 class ProductCategory(models.Model):
     _inherit = "product.category"
@@ -12,201 +19,172 @@ class ProductCategory(models.Model):
     template_file = fields.Binary(string="Upload Calculation Template")
     template_filename = fields.Char(string="Template Filename")
     
+    template_cache_id = fields.Many2one(
+        'crm.spreadsheet.template.cache',
+        string="Converted Template",
+        readonly=True,
+        copy=False,
+        index=True,
+        ondelete='set null',
+    )
     spreadsheet_data = fields.Text(
         string="Spreadsheet Data",
-        compute='_compute_spreadsheet_data',
-        store=True
+        related='template_cache_id.spreadsheet_data',
     )
-    
-    @api.depends('template_file')
-    def _compute_spreadsheet_data(self):
+    template_conversion_state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string="Conversion Status", readonly=True, copy=False)
+    template_conversion_error = fields.Text(string="Conversion Error", readonly=True, copy=False)
+    template_conversion_duration = fields.Float(
+        string="Conversion Time (s)",
+        readonly=True,
+        copy=False,
+        digits=(16, 3),
+    )
+    template_conversion_attempts = fields.Integer(
+        string="Conversion Attempts",
+        readonly=True,
+        copy=False,
+        help="Number of times the conversion cron started converting the current template.",
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        categories = super().create(vals_list)
+        categories.filtered('template_file')._schedule_template_conversion()
+        return categories
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'template_file' in vals:
+            self._schedule_template_conversion()
+        return res
+
+    def unlink(self):
+        previous_caches = self.template_cache_id
+        res = super().unlink()
+        previous_caches._unlink_unreferenced()
+        return res
+
+    # -------------------------------------------------------------
+    # TEMPLATE CONVERSION
+    # -------------------------------------------------------------
+    @api.model
+    def _is_template_conversion_async(self):
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param(
+            'crm_spreadsheet_enhancement.async_template_conversion', 'False'))
+
+    def _schedule_template_conversion(self):
+        """Convert the uploaded templates, right away or through the conversion
+        cron when the background conversion is enabled. The previous
+        conversion stays in use until the new one is done."""
+        without_file = self.filtered(lambda c: not c.template_file)
+        if without_file:
+            previous_caches = without_file.template_cache_id
+            without_file.write({
+                'template_cache_id': False,
+                'template_conversion_state': False,
+                'template_conversion_error': False,
+                'template_conversion_duration': 0.0,
+                'template_conversion_attempts': 0,
+            })
+            previous_caches._unlink_unreferenced()
+
+        with_file = self - without_file
+        if not with_file:
+            return
+        with_file.write({
+            'template_conversion_state': 'pending',
+            'template_conversion_error': False,
+            'template_conversion_attempts': 0,
+        })
+        if self._is_template_conversion_async():
+            self.env.ref('crm_spreadsheet_enhancement.ir_cron_convert_category_templates')._trigger()
+        else:
+            with_file._convert_templates()
+
+    def _convert_templates(self):
+        """Convert the template of each category and record the outcome. A
+        failed conversion clears the previous one instead of keeping stale
+        data."""
+        Cache = self.env['crm.spreadsheet.template.cache']
         for category in self:
-            print("\n=========== DEBUG: _compute_spreadsheet_data ===========")
-            print("CATEGORY:", category.name)
-            print("template_file present?:", bool(category.template_file))
-            
-            if category.template_file:
-                excel_data = category._convert_excel_to_spreadsheet(category.template_file)
-                
-                if excel_data:
-                    category.spreadsheet_data = json.dumps(excel_data)
-                    # small checksum for debugging
-                    total_cells = sum(len(s.get('cells', {})) for s in excel_data.get('sheets', []))
-                    total_merges = sum(len(s.get('merges', [])) for s in excel_data.get('sheets', []))
-                    print("DEBUG: spreadsheet_data saved successfully! sheets:", len(excel_data.get('sheets', [])),
-                          "cells:", total_cells, "merges:", total_merges)
-                else:
-                    print("DEBUG: excel_data conversion failed!")
+            previous_cache = category.template_cache_id
+            start = time.perf_counter()
+            try:
+                with self.env.cr.savepoint():
+                    cache = Cache._get_for_content(base64.b64decode(category.template_file))
+            except IntegrityError:
+                # converted concurrently but committed after this transaction
+                # started: the conversion cron finds it on its next run
+                _logger.info("Calculation template of category %s converted concurrently, retried by the cron",
+                             category.id)
+                category.write({'template_conversion_state': 'pending'})
+                self.env.ref('crm_spreadsheet_enhancement.ir_cron_convert_category_templates')._trigger()
+                continue
+            except Exception as e:
+                _logger.warning("Calculation template of category %s could not be converted", category.id,
+                                exc_info=True)
+                vals = {
+                    'template_cache_id': False,
+                    'template_conversion_state': 'failed',
+                    'template_conversion_error': str(e) or repr(e),
+                }
             else:
-                print("DEBUG: template_file is empty!")
-                category.spreadsheet_data = False
-            
-            print("========================================================\n")
-    
-
-    def _parse_merge_range(self, range_str):
-        """
-        Convert 'A1:B3' -> dict {'top':0,'left':0,'bottom':2,'right':1}
-        (0-based indices)
-        """
-        try:
-            parts = range_str.split(':')
-            if len(parts) == 1:
-                # single cell treated as no-merge
-                col = ''.join([c for c in parts[0] if c.isalpha()])
-                row = ''.join([c for c in parts[0] if c.isdigit()])
-                left = column_index_from_string(col) - 1
-                top = int(row) - 1
-                return {'top': top, 'left': left, 'bottom': top, 'right': left}
-            start, end = parts
-            col1 = ''.join([c for c in start if c.isalpha()])
-            row1 = ''.join([c for c in start if c.isdigit()])
-            col2 = ''.join([c for c in end if c.isalpha()])
-            row2 = ''.join([c for c in end if c.isdigit()])
-            left = column_index_from_string(col1) - 1
-            top = int(row1) - 1
-            right = column_index_from_string(col2) - 1
-            bottom = int(row2) - 1
-            return {'top': top, 'left': left, 'bottom': bottom, 'right': right}
-        except Exception as e:
-            # fallback: return None so caller can ignore
-            print("DEBUG: parse_merge_range failed for", range_str, "error:", e)
-            return None
-
-
-    def _convert_excel_to_spreadsheet(self, file_data):
-        """
-        Convert uploaded XLSX (binary base64) into Odoo Spreadsheet JSON structure.
-        Returns dict or None on failure.
-        """
-        try:
-            print("\n******** DEBUG: Converting XLSX → Odoo Spreadsheet (openpyxl) ********")
-
-            # decode and load workbook
-            file_content = base64.b64decode(file_data)
-            wb = openpyxl.load_workbook(BytesIO(file_content), data_only=False)
-
-            spreadsheet = {
-                "version": 16,
-                "sheets": [],
-                "revisionId": 1,
-                "settings": {},
-                "lists": {}
-            }
-
-            for sheet in wb.worksheets:
-                # determine dimensions (fallbacks)
-                max_row = sheet.max_row or 1
-                max_col = sheet.max_column or 1
-
-                # build sheet_json
-                sheet_json = {
-                    # unique id to avoid collision with sheet_<line.id>: prefix template_
-                    "id": ("template_" + (sheet.title or "Sheet")).replace(" ", "_")[:60],
-                    "name": (sheet.title or "Sheet")[:31],
-                    # colNumber/rowNumber : use counts (Odoo expects integer)
-                    "colNumber": int(max_col),
-                    "rowNumber": int(max_row),
-                    "cells": {},
-                    "merges": [],
-                    "rows": {},  # numeric-string keys: "0","1"
-                    "cols": {},  # numeric-string keys: "0","1"
+                vals = {
+                    'template_cache_id': cache.id,
+                    'template_conversion_state': 'done',
+                    'template_conversion_error': False,
                 }
-
-                # -------------------------
-                # merges: convert to numeric boxes
-                # -------------------------
-                try:
-                    for merged in getattr(sheet, "merged_cells").ranges:
-                        rng = str(merged)  # like 'A1:B3'
-                        parsed = self._parse_merge_range(rng)
-                        if parsed:
-                            sheet_json["merges"].append(parsed)
-                except Exception as e:
-                    # if no merges or failure, ignore but log
-                    print("DEBUG: reading merges failed for sheet", sheet.title, "error:", e)
-
-                # -------------------------
-                # column widths -> Odoo expects numeric index keys as strings
-                # openpyxl.column_dimensions keys are letters like 'A'
-                # convert: letter -> index-1 -> string key
-                # -------------------------
-                try:
-                    for col_letter, col_dim in sheet.column_dimensions.items():
-                        width = getattr(col_dim, "width", None)
-                        if width is not None:
-                            try:
-                                idx = column_index_from_string(col_letter) - 1
-                                sheet_json["cols"][str(idx)] = {"width": float(width)}
-                            except Exception:
-                                continue
-                except Exception as e:
-                    print("DEBUG: reading column_dimensions failed for sheet", sheet.title, "error:", e)
-
-                # -------------------------
-                # row heights -> numeric-string keys
-                # -------------------------
-                try:
-                    for r_idx, row_dim in sheet.row_dimensions.items():
-                        height = getattr(row_dim, "height", None)
-                        if height is not None:
-                            try:
-                                sheet_json["rows"][str(int(r_idx) - 1)] = {"size": float(height)}
-                            except Exception:
-                                continue
-                except Exception as e:
-                    print("DEBUG: reading row_dimensions failed for sheet", sheet.title, "error:", e)
-
-                # -------------------------
-                # cells: iterate full rectangle so positions align
-                # -------------------------
-                for r in range(1, max_row + 1):
-                    for c in range(1, max_col + 1):
-                        cell = sheet.cell(row=r, column=c)
-                        if cell is None:
-                            continue
-                        if cell.value is None:
-                            # skip fully empty cells
-                            continue
-
-                        # key as A1 etc. Odoo expects A1-style keys inside cells dict
-                        col_letter = get_column_letter(c)
-                        key = f"{col_letter}{r}"
-
-                        # decide content: formula vs value
-                        if cell.data_type == 'f':
-                            # openpyxl may return formula string without '='
-                            raw = str(cell.value) if cell.value is not None else ""
-                            content = raw if raw.startswith('=') else '=' + raw
-                        else:
-                            # preserve native python types for numbers/bool
-                            v = cell.value
-                            # openpyxl may return datetime objects for dates — keep them as isoformat strings
-                            try:
-                                import datetime
-                                if isinstance(v, (datetime.date, datetime.datetime)):
-                                    content = v.isoformat()
-                                else:
-                                    content = v
-                            except Exception:
-                                content = v
-
-                        # minimal format hint: 1 = default/text (we keep it simple)
-                        sheet_json["cells"][key] = {
-                            "content": content,
-                            "format": 1,
-                        }
-
-                # append sheet
-                spreadsheet["sheets"].append(sheet_json)
-                print("DEBUG: parsed sheet:", sheet.title, "cells:", len(sheet_json["cells"]),
-                      "merges:", len(sheet_json["merges"]),
-                      "cols_meta:", len(sheet_json["cols"]),
-                      "rows_meta:", len(sheet_json["rows"]))
-
-            print("DEBUG: XLSX parsed. Total sheets:", len(spreadsheet["sheets"]))
-            return spreadsheet
-
-        except Exception as e:
-            print("DEBUG: Excel conversion failed:", e)
-            return None
+            vals['template_conversion_duration'] = time.perf_counter() - start
+            category.write(vals)
+            previous_cache._unlink_unreferenced()
+
+    @api.model
+    def _cron_convert_templates(self):
+        """Convert a batch of pending templates. ``running`` ones are only left
+        behind by an interrupted run, the cron never runs twice at once: they
+        are retried after the pending ones, and marked failed once they were
+        started MAX_CONVERSION_ATTEMPTS times."""
+        interrupted = self.search([
+            ('template_conversion_state', '=', 'running'),
+            ('template_conversion_attempts', '>=', MAX_CONVERSION_ATTEMPTS),
+        ])
+        if interrupted:
+            _logger.warning("Calculation templates of categories %s interrupted %s times, giving up",
+                            interrupted.ids, MAX_CONVERSION_ATTEMPTS)
+            interrupted.write({
+                'template_conversion_state': 'failed',
+                'template_conversion_error': _(
+                    "The conversion was interrupted %s times (worker killed, e.g. out of memory or time).",
+                    MAX_CONVERSION_ATTEMPTS),
+            })
+            self._commit_template_conversion()
+
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param(
+            'crm_spreadsheet_enhancement.template_conversion_batch_size', 5))
+        categories = self.search([('template_conversion_state', 'in', ('pending', 'running'))],
+                                 order='template_conversion_attempts, id', limit=batch_size)
+        if not categories:
+            return
+
+        for category in categories:
+            # counted before converting: a conversion killing the worker never returns
+            category.write({
+                'template_conversion_state': 'running',
+                'template_conversion_attempts': category.template_conversion_attempts + 1,
+            })
+            self._commit_template_conversion()
+            category._convert_templates()
+            self._commit_template_conversion()
+
+        if self.search_count([('template_conversion_state', '=', 'pending')], limit=1):
+            self.env.ref('crm_spreadsheet_enhancement.ir_cron_convert_category_templates')._trigger()
+
+    def _commit_template_conversion(self):
+        # each converted category is kept even if a later one kills the worker
+        if not modules.module.current_test:
+            self.env.cr.commit()
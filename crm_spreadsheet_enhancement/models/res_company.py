@@ -6,4 +6,15 @@ class ResCompany(models.Model):
     crm_quotation_template_id = fields.Many2one(
         'crm.quotation.template',
         string="CRM Quotation Template",
-    )
\ No newline at end of file
+    )
+
+    def write(self, vals):
+        changed = 'crm_quotation_template_id' in vals and any(
+            company.crm_quotation_template_id.id != (vals['crm_quotation_template_id'] or False)
+            for company in self
+        )
+        res = super().write(vals)
+        if changed:
+            # cached by crm.quotation.template._get_quotation_template_settings
+            self.env.registry.clear_cache()
+        return res
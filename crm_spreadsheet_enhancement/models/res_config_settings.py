@@ -12,11 +12,19 @@ class ResConfigSettings(models.TransientModel):
         related='company_id.crm_quotation_template_id',
         readonly=False,
     )
+    crm_async_template_conversion = fields.Boolean(
+        string="Convert Calculation Templates in Background",
+        config_parameter='crm_spreadsheet_enhancement.async_template_conversion',
+    )
+    crm_consolidated_material_list = fields.Boolean(
+        string="Single Material Line List per Calculator",
+        config_parameter='crm_spreadsheet_enhancement.consolidated_material_list',
+    )
 
     def set_values(self):
         res = super().set_values()
         IrConfig = self.env['ir.config_parameter'].sudo()
-        IrConfig.set_param('crm_spreadsheet_enhancement.enable_crm_quotation_templates', self.enable_crm_quotation_templates)
+        self.env['crm.quotation.template']._set_quotation_template_settings(self.enable_crm_quotation_templates)
         
         # REAL-TIME SYNC - Using config parameters for UI refresh
         if self.enable_crm_quotation_templates and self.crm_quotation_template_id:
@@ -67,21 +75,9 @@ class ResConfigSettings(models.TransientModel):
     @api.model
     def get_values(self):
         res = super().get_values()
-        IrConfig = self.env['ir.config_parameter'].sudo()
-        
-        # Get CRM settings
-        enable_crm = IrConfig.get_param('crm_spreadsheet_enhancement.enable_crm_quotation_templates', False)
-        template_id_str = IrConfig.get_param('crm_spreadsheet_enhancement.crm_quotation_template_id', False)
-        template_rec = self.env['crm.quotation.template'].browse(int(template_id_str)) if template_id_str and template_id_str.isdigit() else False
-        
-        # Get Sales settings from config parameters for UI
-        sales_enabled = IrConfig.get_param('sale_management.group_sale_order_template', False)
-        sales_template_id = IrConfig.get_param('sale.default_sale_order_template_id', False)
-        sales_template = self.env['sale.order.template'].browse(int(sales_template_id)) if sales_template_id and sales_template_id.isdigit() else False
-        
-        res.update({
-            'enable_crm_quotation_templates': enable_crm,
-            'crm_quotation_template_id': template_rec,
 
-        })
+        # Get CRM settings, the default template is the related company field
+        enable_crm, _template_id = self.env['crm.quotation.template']._get_quotation_template_settings(
+            self.env.company.id)
+        res['enable_crm_quotation_templates'] = enable_crm
         return res
\ No newline at end of file
@@ -1,21 +1,33 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import UserError
+from collections import defaultdict
 import json
 import logging
 
+from ..tools import calculator_models, instrumentation, spreadsheet_codec
+from ..tools.spreadsheet_document import SpreadsheetDocument
+
 _logger = logging.getLogger(__name__)
 
-SALES_ORDER_LINE_FIELDS = [
-    'product_id',
-    'product_uom_qty', 
-    'price_unit',
-    'width',
-    'height',
-    'length',
-    'thickness',
-]
+SALES_ORDER_LINE_FIELDS = calculator_models.get_fields('sale.order.line')
+
+# crm.material.line field -> (sale.order.line field, value when unset), synced by _sync_order_lines_from_crm
+CRM_TO_ORDER_LINE_FIELDS = {
+    'quantity': ('product_uom_qty', 1.0),
+    'width': ('width', 0),
+    'height': ('height', 0),
+    'length': ('length', 0),
+    'thickness': ('thickness', 0),
+}
+
+def _get_line_ids(keys, prefix=''):
+    """Return the line ids encoded in sheet/list ``keys`` of the form ``<prefix><id>``"""
+    start = len(prefix)
+    return {int(key[start:]) for key in keys
+            if key and key.startswith(prefix) and key[start:].isdigit()}
+
 
 class SaleOrderSpreadsheet(models.Model):
     _name = 'sale.order.spreadsheet'
@@ -25,7 +37,38 @@ class SaleOrderSpreadsheet(models.Model):
     name = fields.Char(required=True)
     order_id = fields.Many2one('sale.order', string="Sales Order", ondelete='cascade')
     company_id = fields.Many2one('res.company', default=lambda self: self.env.company)
-    raw_spreadsheet_data = fields.Text("Raw Spreadsheet Data")
+    raw_spreadsheet_data = fields.Text(
+        "Raw Spreadsheet Data",
+        compute='_compute_raw_spreadsheet_data',
+        inverse='_inverse_raw_spreadsheet_data',
+    )
+    raw_spreadsheet_data_compressed = fields.Binary("Compressed Raw Spreadsheet Data", attachment=True)
+    replay_revision_count = fields.Integer(
+        "Revisions to Replay",
+        copy=False,
+        readonly=True,
+        help="Active revisions replayed when opening the spreadsheet (see spreadsheet.revision).",
+    )
+    replay_revision_bytes = fields.Integer(
+        "Revision Bytes to Replay",
+        copy=False,
+        readonly=True,
+        help="Size of the commands of the active revisions replayed when opening the spreadsheet.",
+    )
+
+    # -------------------------------------------------------------
+    # STORAGE
+    # -------------------------------------------------------------
+    @api.depends('raw_spreadsheet_data_compressed')
+    def _compute_raw_spreadsheet_data(self):
+        for spreadsheet in self.with_context(bin_size=False):
+            spreadsheet.raw_spreadsheet_data = spreadsheet_codec.from_binary_field(
+                spreadsheet.raw_spreadsheet_data_compressed)
+
+    def _inverse_raw_spreadsheet_data(self):
+        for spreadsheet in self:
+            spreadsheet.raw_spreadsheet_data_compressed = spreadsheet_codec.to_binary_field(
+                spreadsheet.raw_spreadsheet_data)
 
     # -------------------------------------------------------------
     # ACTIONS
@@ -49,34 +92,87 @@ class SaleOrderSpreadsheet(models.Model):
     # AUTO-SYNC METHODS
     # -------------------------------------------------------------
 
-    def _sync_order_lines_from_crm(self, crm_lead):
-        """Sync order lines from CRM material lines"""
+    def _sync_order_lines_from_crm(self, crm_lead, update_existing=False):
+        """Sync order lines from CRM material lines, in bulk.
+
+        Material lines whose product is not on the order yet get an order line,
+        all created with a single ``create``. With ``update_existing``, the
+        quantity and dimensions of the order lines already there are updated
+        from the material lines, one ``write`` per distinct set of values.
+
+        Errors are logged and leave the order lines unchanged.
+
+        :return: dict with the ``created`` and ``updated`` order lines, the
+            number of ``skipped`` material lines (no product) and whether the
+            sync ``failed``
+        """
+        self.ensure_one()
+        order = self.order_id
+        OrderLine = self.env['sale.order.line']
+        summary = {'created': OrderLine, 'updated': OrderLine, 'skipped': 0, 'failed': False}
+        if not order:
+            return summary
+
         try:
-            order = self.order_id
-            
-            for material_line in crm_lead.material_line_ids:
-                if material_line.product_id:
-                    # Check if product already exists in order
-                    existing_line = order.order_line.filtered(
-                        lambda l: l.product_id == material_line.product_id
-                    )
-                    
-                    if not existing_line:
-                        # Create new order line
-                        self.env['sale.order.line'].create({
-                            'order_id': order.id,
-                            'product_id': material_line.product_id.id,
-                            'product_uom_qty': material_line.quantity or 1.0,
-                            'price_unit': material_line.price or material_line.product_id.list_price,
-                            'width': material_line.width or 0,
-                            'height': material_line.height or 0,
-                            'length': material_line.length or 0,
-                            'thickness': material_line.thickness or 0,
-                            'name': material_line.product_id.name,
-                        })
-                        
-        except Exception as e:
-            print(f"[ORDER_SYNC] Error: {str(e)}")
+            with self.env.cr.savepoint():
+                self._apply_crm_material_lines(crm_lead, update_existing, summary)
+        except Exception:
+            # logged, not raised: callers (e.g. the CRM to sale conversion) go on without the lines
+            _logger.exception("Failed to sync order %s from the material lines of lead %s", order.id, crm_lead.id)
+            return dict(summary, created=OrderLine, updated=OrderLine, failed=True)
+
+        _logger.debug("Order %s synced from lead %s: %s lines created, %s updated, %s skipped", order.id,
+                      crm_lead.id, len(summary['created']), len(summary['updated']), summary['skipped'])
+        return summary
+
+    def _apply_crm_material_lines(self, crm_lead, update_existing, summary):
+        """Create and update the order lines of ``_sync_order_lines_from_crm``,
+        recording them in ``summary``."""
+        order = self.order_id
+        OrderLine = self.env['sale.order.line']
+        material_lines = crm_lead.material_line_ids
+        material_lines.fetch(list(CRM_TO_ORDER_LINE_FIELDS) + ['product_id', 'price'])
+
+        # product -> first order line, built once instead of a filtered() per material line
+        line_by_product = {}
+        for line in order.order_line:
+            line_by_product.setdefault(line.product_id.id, line)
+
+        vals_list = []
+        lines_by_vals = defaultdict(list)
+        for material_line in material_lines:
+            product = material_line.product_id
+            if not product:
+                summary['skipped'] += 1
+                continue
+            line_vals = {
+                order_field: material_line[crm_field] or default
+                for crm_field, (order_field, default) in CRM_TO_ORDER_LINE_FIELDS.items()
+            }
+            existing_line = line_by_product.get(product.id)
+            if existing_line is None:
+                vals_list.append(dict(
+                    line_vals,
+                    order_id=order.id,
+                    product_id=product.id,
+                    price_unit=material_line.price or product.list_price,
+                    name=product.name,
+                ))
+                # several material lines of the same product: only the first one creates a line
+                line_by_product[product.id] = False
+            elif existing_line and update_existing:
+                changed_vals = {field: value for field, value in line_vals.items() if existing_line[field] != value}
+                if changed_vals:
+                    lines_by_vals[tuple(sorted(changed_vals.items()))].append(existing_line.id)
+
+        with instrumentation.phase('sale.sync_from_crm', order=order.id, create=len(vals_list),
+                                   update=sum(map(len, lines_by_vals.values()))):
+            if vals_list:
+                summary['created'] = OrderLine.create(vals_list)
+            for vals, line_ids in lines_by_vals.items():
+                lines = OrderLine.browse(line_ids)
+                lines.write(dict(vals))
+                summary['updated'] |= lines
 
     # -------------------------------------------------------------
     # ENHANCED SESSION JOIN WITH AUTO-SYNC
@@ -84,120 +180,73 @@ class SaleOrderSpreadsheet(models.Model):
     def join_spreadsheet_session(self, access_token=None):
         """Sales order spreadsheet session - CRM STYLE"""
         self.ensure_one()
+        _logger.debug("join_spreadsheet_session start for sales spreadsheet %s (order %s)", self.id, self.order_id.id)
 
-        print("\n[SALES_SESSION_CRM] --- join_spreadsheet_session START ---")
-        print(f"[SALES_SESSION_CRM] Spreadsheet: {self.name}")
-        print(f"[SALES_SESSION_CRM] Has raw data: {bool(self.raw_spreadsheet_data)}")
+        # 🔥 CRITICAL: If we have converted CRM data, use it as base.
+        # It is parsed once, the sync and the join share it.
+        with instrumentation.phase('sale.join.load_json', spreadsheet=self.id):
+            document = self._load_raw_document()
 
         # Sync with current order lines
-        self._sync_sheets_with_order_lines()
+        self._sync_sheets_with_order_lines(document)
 
-        # Get base data from super
         data = super().join_spreadsheet_session(access_token)
-        
-        # 🔥 CRITICAL: If we have converted CRM data, use it as base
-        spreadsheet_json = {}
-        if self.raw_spreadsheet_data:
-            try:
-                spreadsheet_json = json.loads(self.raw_spreadsheet_data)
-                print(f"[SALES_SESSION_CRM] Using converted CRM data: {len(spreadsheet_json.get('lists', {}))} lists, {len(spreadsheet_json.get('sheets', []))} sheets")
-            except Exception as e:
-                print(f"[SALES_SESSION_CRM] Error loading converted data: {e}")
-                spreadsheet_json = data.get('data') or {}
-        else:
-            spreadsheet_json = data.get('data') or {}
-            print(f"[SALES_SESSION_CRM] Using empty/base data")
-
-        # Get lists and sheets from the data
-        lists = spreadsheet_json.get('lists') or {}
-        sheets = spreadsheet_json.get('sheets') or []
-
-        # Get current order line IDs
-        current_line_ids = set(self.order_id.order_line.ids) if self.order_id else set()
-        
-        # Get existing list IDs from spreadsheet
-        existing_list_ids = set()
-        for list_id in lists.keys():
-            try:
-                # Extract numeric ID from list ID (e.g., "185" from "185" or "sales_185")
-                if list_id.isdigit():
-                    existing_list_ids.add(int(list_id))
-                elif list_id.startswith('sales_'):
-                    existing_list_ids.add(int(list_id.replace('sales_', '')))
-            except ValueError:
-                continue
+        if document is None:
+            document = SpreadsheetDocument(data.get('data'))
 
-        print(f"[SALES_SESSION_CRM] Current order line IDs: {current_line_ids}")
-        print(f"[SALES_SESSION_CRM] Existing spreadsheet list IDs: {existing_list_ids}")
+        with instrumentation.phase('sale.join.line_diff', spreadsheet=self.id):
+            current_line_ids = set(self.order_id.order_line.ids) if self.order_id else set()
+            # List ids are "sales_185", or "185" for lists converted from CRM data
+            existing_list_ids = _get_line_ids(document.list_ids(), 'sales_') | _get_line_ids(document.list_ids())
 
-        # Find missing and removed lines
-        missing_ids = current_line_ids - existing_list_ids
-        removed_ids = existing_list_ids - current_line_ids
+            missing_ids = current_line_ids - existing_list_ids
+            removed_ids = existing_list_ids - current_line_ids
 
-        print(f"[SALES_SESSION_CRM] Missing line IDs to add: {missing_ids}")
-        print(f"[SALES_SESSION_CRM] Removed line IDs to delete: {removed_ids}")
+        _logger.debug("Sales spreadsheet %s: lines to add %s, lines to remove %s", self.id, missing_ids, removed_ids)
 
         # --- ADD NEW SHEETS FOR NEW ORDER LINES ---
-        for line_id in missing_ids:
-            new_sheet_data = self._create_sheet_for_order_line(line_id)
-            if new_sheet_data and new_sheet_data.get('list') and new_sheet_data.get('sheet'):
+        with instrumentation.phase('sale.join.add_sheets', spreadsheet=self.id, lines=len(missing_ids)):
+            for definition in self._prepare_order_line_sheets(missing_ids).values():
                 # Use sales_ prefix for list IDs
-                list_id = f"sales_{line_id}"
-                lists[list_id] = new_sheet_data['list']
-                sheets.append(new_sheet_data['sheet'])
-                print(f"[SALES_SESSION_CRM] Added sheet for new order line {line_id}")
+                document.set_list(definition['list']['id'], definition['list'])
+                document.add_sheet(definition['sheet'])
+        instrumentation.increment('sale.join.sheets_added', len(missing_ids))
 
         # --- REMOVE DELETED ORDER LINES ---
         if removed_ids:
-            # Remove lists
-            lists_to_remove = []
-            for list_key in list(lists.keys()):
-                for rid in removed_ids:
-                    if list_key == str(rid) or list_key == f"sales_{rid}":
-                        lists_to_remove.append(list_key)
-            
-            for list_key in lists_to_remove:
-                del lists[list_key]
-                print(f"[SALES_SESSION_CRM] Removed list {list_key}")
-
-            # Remove sheets related to deleted lines
-            sheets_to_keep = []
-            for sheet in sheets:
-                sheet_id = sheet.get('id', '')
-                should_keep = True
-                for rid in removed_ids:
-                    if sheet_id == f"sheet_sales_{rid}":
-                        should_keep = False
-                        break
-                if should_keep:
-                    sheets_to_keep.append(sheet)
-            
-            sheets = sheets_to_keep
-            print(f"[SALES_SESSION_CRM] Removed sheets for deleted order lines {removed_ids}")
+            with instrumentation.phase('sale.join.remove_sheets', spreadsheet=self.id, lines=len(removed_ids)):
+                document.remove_lists([str(rid) for rid in removed_ids] + [f"sales_{rid}" for rid in removed_ids])
+                document.remove_sheets(f"sheet_sales_{rid}" for rid in removed_ids)
+        instrumentation.increment('sale.join.sheets_removed', len(removed_ids))
 
         # Save back to data
-        spreadsheet_json['lists'] = lists
-        spreadsheet_json['sheets'] = sheets
+        spreadsheet_json = document.data
         data['data'] = spreadsheet_json
-        
+
         # Also update raw_spreadsheet_data for persistence (only if we made changes)
         if missing_ids or removed_ids:
-            self.raw_spreadsheet_data = json.dumps(spreadsheet_json)
-            print(f"[SALES_SESSION_CRM] Updated raw_spreadsheet_data with changes")
+            with instrumentation.phase('sale.join.save', spreadsheet=self.id):
+                self.raw_spreadsheet_data = spreadsheet_codec.dumps(spreadsheet_json)
 
         # Add sales order context
         data.update({
             'order_id': self.order_id.id if self.order_id else False,
             'order_display_name': self.order_id.display_name if self.order_id else False,
             'sale_order_id': self.order_id.id if self.order_id else False,
-            'sheet_id': self.id
+            'sheet_id': self.id,
+            'field_sync_schema': calculator_models.get_field_sync_schema(self.env),
         })
 
-        print(f"[SALES_SESSION_CRM] Final data: {len(lists)} lists, {len(sheets)} sheets")
-        print("[SALES_SESSION_CRM] --- join_spreadsheet_session END ---\n")
-
         return data
 
+    def _should_be_snapshotted(self):
+        """Also snapshot once the history replayed on open exceeds the revision budget."""
+        if super()._should_be_snapshotted():
+            return True
+        return self.env['spreadsheet.revision']._exceeds_revision_budget(
+            self.replay_revision_count, self.replay_revision_bytes,
+        )
+
     # -------------------------------------------------------------
     # EXISTING METHODS (UNCHANGED)
     # -------------------------------------------------------------
@@ -207,8 +256,10 @@ class SaleOrderSpreadsheet(models.Model):
         for rec in records:
             # Only create sheets if NO raw data (not from CRM)
             if rec.order_id and rec.order_id.order_line and not rec.raw_spreadsheet_data:
-                for line in rec.order_id.order_line:
-                    rec.with_context(order_line_id=line.id)._dispatch_insert_list_revision()
+                commands = []
+                for definition in rec._prepare_order_line_sheets(rec.order_id.order_line.ids).values():
+                    commands.extend(rec._get_insert_list_commands(definition))
+                rec._dispatch_commands(commands)
         return records
 
     def _empty_spreadsheet_data(self):
@@ -252,20 +303,82 @@ class SaleOrderSpreadsheet(models.Model):
         if not line_id:
             return
 
-        line = self.env['sale.order.line'].browse(line_id)
-        if not line.exists():
+        definition = self._prepare_order_line_sheets([line_id]).get(line_id)
+        if not definition:
             return
 
-        sheet_id = f"sheet_sales_{line.id}"
-        list_id = f"sales_{line.id}"
-        product_name = (line.product_id.display_name or "Item")[:31]
+        self._dispatch_commands(self._get_insert_list_commands(definition))
 
-        columns = [
-            {'name': f, 'type': self.env['sale.order.line']._fields.get(f).type}
-            for f in SALES_ORDER_LINE_FIELDS
-        ]
+    @api.model
+    @tools.ormcache()
+    def _get_order_line_field_types(self):
+        """Return ``(name, type)`` of SALES_ORDER_LINE_FIELDS, they only depend on the registry"""
+        line_fields = self.env['sale.order.line']._fields
+        return tuple((f, line_fields[f].type) for f in SALES_ORDER_LINE_FIELDS)
+
+    @api.model
+    def _get_order_line_columns(self):
+        """Return the list columns (name and field type) of SALES_ORDER_LINE_FIELDS"""
+        return [{'name': name, 'type': field_type} for name, field_type in self._get_order_line_field_types()]
+
+    def _prepare_order_line_sheets(self, order_line_ids):
+        """Build sheet + list definitions of several order lines in a single pass
+
+        :param order_line_ids: iterable of ``sale.order.line`` ids
+        :return: dict mapping each existing line id to ``{'sheet', 'list', 'columns', 'revision_sheet_name'}``,
+            ``revision_sheet_name`` being the name of the sheet created by the insert revision
+        """
+        lines = self.env['sale.order.line'].browse(order_line_ids).exists()
+        if not lines:
+            return {}
+        lines.fetch(['product_id'])
+        columns = self._get_order_line_columns()
+
+        definitions = {}
+        for line in lines:
+            sheet_id = f"sheet_sales_{line.id}"
+            list_id = f"sales_{line.id}"
+            product_name = (line.product_id.display_name or f"Sales Item {line.id}")[:31]
+            definitions[line.id] = {
+                'sheet': {
+                    'id': sheet_id,
+                    'name': product_name,
+                    'cells': {},
+                    'figures': [],
+                    'areGridLinesVisible': True,
+                    'rowCount': 1000,
+                    'colCount': 26,
+                },
+                'list': {
+                    'id': list_id,
+                    'model': 'sale.order.line',
+                    'columns': SALES_ORDER_LINE_FIELDS,
+                    'domain': [['id', '=', line.id]],
+                    'sheetId': sheet_id,
+                    'name': product_name,
+                    'context': {},
+                    'orderBy': [],
+                    'fieldMatching': {
+                        'order_line': {'chain': 'order_id', 'type': 'many2one'},
+                    },
+                },
+                'columns': columns,
+                'revision_sheet_name': (line.product_id.display_name or "Item")[:31],
+            }
+        return definitions
 
-        commands = [
+    def _get_insert_list_commands(self, definition):
+        """Return the revision commands creating the sheet, list and table of an order line
+
+        :param definition: one value of :meth:`_prepare_order_line_sheets`
+        """
+        sheet_id = definition['sheet']['id']
+        list_id = definition['list']['id']
+        product_name = definition['revision_sheet_name']
+        columns = definition['columns']
+        line_domain = definition['list']['domain']
+
+        return [
             {
                 'type': 'CREATE_SHEET',
                 'sheetId': sheet_id,
@@ -276,7 +389,7 @@ class SaleOrderSpreadsheet(models.Model):
                 'listId': list_id,
                 'model': 'sale.order.line',
                 'columns': SALES_ORDER_LINE_FIELDS,
-                'domain': [['id', '=', line.id]],
+                'domain': line_domain,
                 'context': {},
                 'orderBy': [],
             },
@@ -310,131 +423,123 @@ class SaleOrderSpreadsheet(models.Model):
                 'listId': list_id,
             }
         ]
-        self._dispatch_commands(commands)
 
-    def _sync_sheets_with_order_lines(self):
-        """Sync sheets with current sales order lines"""
+    def _load_raw_document(self):
+        """Return raw_spreadsheet_data parsed as a SpreadsheetDocument, None when empty or invalid"""
         self.ensure_one()
-        
+        if not self.raw_spreadsheet_data:
+            return None
+        try:
+            return SpreadsheetDocument(json.loads(self.raw_spreadsheet_data))
+        except Exception:
+            _logger.warning("Invalid raw_spreadsheet_data on sales spreadsheet %s, ignoring it", self.id, exc_info=True)
+            return None
+
+    def _sync_sheets_with_order_lines(self, document=None):
+        """Sync sheets with current sales order lines
+
+        :param document: raw_spreadsheet_data already parsed by the caller
+            (see ``_load_raw_document``), parsed here when not given
+        """
+        self.ensure_one()
+
         if not self.order_id:
             return
 
-        current_data = json.loads(self.raw_spreadsheet_data) if self.raw_spreadsheet_data else {}
-        current_sheets = current_data.get('sheets', [])
-        current_lists = current_data.get('lists', {})
-        
+        if document is None:
+            with instrumentation.phase('sale.sync.load_json', spreadsheet=self.id):
+                document = self._load_raw_document() or SpreadsheetDocument({})
+
         current_line_ids = set(self.order_id.order_line.ids)
-        
-        # Find and delete sheets for removed sales lines
-        for sheet in current_sheets:
-            sheet_id = sheet.get('id', '')
-            if sheet_id.startswith('sheet_sales_'):
-                try:
-                    line_id = int(sheet_id.replace('sheet_sales_', ''))
-                    if line_id not in current_line_ids:
-                        self._delete_sheet_for_order_line(line_id)
-                except ValueError:
-                    continue
-        
-        for list_id in list(current_lists.keys()):
-            if list_id.startswith('sales_'):
-                try:
-                    line_id = int(list_id.replace('sales_', ''))
-                    if line_id not in current_line_ids:
-                        self._delete_sheet_for_order_line(line_id)
-                except ValueError:
-                    continue
+        sheet_line_ids = _get_line_ids(document.sheet_ids(), 'sheet_sales_')
+        list_line_ids = _get_line_ids(document.list_ids(), 'sales_')
 
-        # Create sheets for new sales lines
-        existing_sheet_ids = {int(sheet['id'].replace('sheet_sales_', '')) for sheet in current_sheets 
-                            if sheet['id'].startswith('sheet_sales_')}
-        
-        for line in self.order_id.order_line:
-            if line.id not in existing_sheet_ids:
-                self.with_context(order_line_id=line.id)._dispatch_insert_list_revision()
-                
-    def _create_sheet_for_order_line(self, order_line_id):
-        """Return sheet + list data for sales order line - IMPROVED"""
-        self.ensure_one()
+        # Gather every add and delete so that the whole sync is a single revision
+        removed_line_ids = (sheet_line_ids | list_line_ids) - current_line_ids
 
-        line = self.env['sale.order.line'].browse(order_line_id)
-        if not line.exists():
-            return None  # ✅ Return None instead of empty dict
+        commands_per_line = [(line_id, self._get_delete_sheet_commands(line_id))
+                             for line_id in sorted(removed_line_ids)]
 
-        sheet_id = f"sheet_sales_{line.id}"
-        list_id = f"sales_{line.id}"
-        product_name = (line.product_id.display_name or f"Sales Item {line.id}")[:31]
-
-        sheet_data = {
-            'id': sheet_id,
-            'name': product_name,
-            'cells': {}, 
-            'figures': [],
-            'areGridLinesVisible': True,
-            'rowCount': 1000,
-            'colCount': 26,
-        }
+        # Create sheets for new sales lines
+        missing_line_ids = [line_id for line_id in self.order_id.order_line.ids
+                            if line_id not in sheet_line_ids]
+        commands_per_line += [(line_id, self._get_insert_list_commands(definition))
+                              for line_id, definition in self._prepare_order_line_sheets(missing_line_ids).items()]
 
-        list_data = {
-            'id': list_id,
-            'model': 'sale.order.line',
-            'columns': SALES_ORDER_LINE_FIELDS,
-            'domain': [['id', '=', line.id]],
-            'sheetId': sheet_id,
-            'name': product_name,
-            'context': {},
-            'orderBy': [],
-            'fieldMatching': {
-                'order_line': {'chain': 'order_id', 'type': 'many2one'},
-            },
+        if self._dispatch_sync_revision([command for _line_id, commands in commands_per_line for command in commands]):
+            return
+
+        # One revision per line, so that one bad line does not block the others
+        failed_line_ids = {commands_per_line[0][0]} if len(commands_per_line) == 1 else {
+            line_id for line_id, commands in commands_per_line if not self._dispatch_sync_revision(commands)
         }
+        self._cleanup_deleted_sales_sheets_from_data(failed_line_ids & removed_line_ids, document)
 
-        return {'sheet': sheet_data, 'list': list_data}
+    def _dispatch_sync_revision(self, commands):
+        """Dispatch ``commands`` as one revision and return whether it succeeded."""
+        self.ensure_one()
+        if not commands:
+            return True
+        try:
+            with self.env.cr.savepoint(), instrumentation.phase(
+                    'sale.sync.dispatch_revisions', spreadsheet=self.id, commands=len(commands)):
+                self._dispatch_commands(commands)
+        except Exception:
+            _logger.warning("Failed to dispatch a sync revision of sales spreadsheet %s", self.id, exc_info=True)
+            return False
+        return True
 
-    def _delete_sheet_for_order_line(self, order_line_id):
-        """Delete sheet for sales order line"""
+    def _create_sheet_for_order_line(self, order_line_id):
+        """Return sheet + list data for sales order line - IMPROVED"""
         self.ensure_one()
-        
-        sheet_id = f"sheet_sales_{order_line_id}"
-        list_id = f"sales_{order_line_id}"
 
-        commands = [
+        definition = self._prepare_order_line_sheets([order_line_id]).get(order_line_id)
+        if not definition:
+            return None  # ✅ Return None instead of empty dict
+
+        return {'sheet': definition['sheet'], 'list': definition['list']}
+
+    def _get_delete_sheet_commands(self, order_line_id):
+        """Return the revision commands removing the sheet and list of an order line"""
+        return [
             {
                 'type': 'DELETE_SHEET',
-                'sheetId': sheet_id,
+                'sheetId': f"sheet_sales_{order_line_id}",
             },
             {
                 'type': 'UNREGISTER_ODOO_LIST',
-                'listId': list_id,
+                'listId': f"sales_{order_line_id}",
             }
         ]
-        
+
+    def _delete_sheet_for_order_line(self, order_line_id):
+        """Delete sheet for sales order line"""
+        self.ensure_one()
+
         try:
-            self._dispatch_commands(commands)
+            self._dispatch_commands(self._get_delete_sheet_commands(order_line_id))
         except Exception:
-            self._cleanup_deleted_sales_sheets_from_data(order_line_id)
+            self._cleanup_deleted_sales_sheets_from_data([order_line_id])
 
-    def _cleanup_deleted_sales_sheets_from_data(self, order_line_id):
-        """Clean up deleted sales sheets from data"""
+    def _cleanup_deleted_sales_sheets_from_data(self, order_line_ids, document=None):
+        """Remove the sheets and lists of ``order_line_ids`` from the stored data, in one pass and one save
+
+        :param document: parsed raw_spreadsheet_data to update in place, parsed here when not given
+        """
         self.ensure_one()
-        
-        if not self.raw_spreadsheet_data:
+
+        if not order_line_ids or not self.raw_spreadsheet_data:
             return
-            
+
         try:
-            data = json.loads(self.raw_spreadsheet_data)
-            sheet_id = f"sheet_sales_{order_line_id}"
-            list_id = f"sales_{order_line_id}"
-            
-            if 'sheets' in data:
-                data['sheets'] = [s for s in data['sheets'] if s.get('id') != sheet_id]
-            
-            if 'lists' in data and list_id in data['lists']:
-                del data['lists'][list_id]
-            
-            self.raw_spreadsheet_data = json.dumps(data)
+            if document is None:
+                document = SpreadsheetDocument(json.loads(self.raw_spreadsheet_data))
+            removed = document.remove_sheets(f"sheet_sales_{line_id}" for line_id in order_line_ids)
+            removed += document.remove_lists(f"sales_{line_id}" for line_id in order_line_ids)
+            if removed:
+                self.raw_spreadsheet_data = spreadsheet_codec.dumps(document.data)
         except Exception:
-            pass
+            _logger.exception("Failed to clean up order lines %s from sales spreadsheet %s", order_line_ids, self.id)
 
     @api.model
     def _get_spreadsheet_selector(self):
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import api, fields, models, modules
+from odoo.tools import split_every
+import logging
+
+from ..tools import instrumentation
+
+_logger = logging.getLogger(__name__)
+
+# Spreadsheet models whose revision history is compacted by _cron_compact_calculator_revisions
+CALCULATOR_MODELS = ('crm.lead.spreadsheet', 'sale.order.spreadsheet')
+
+PRUNE_CHUNK_SIZE = 1000
+
+
+class SpreadsheetRevision(models.Model):
+    """Revision budget of the quote calculators.
+
+    Opening a calculator replays every active revision on the client. Each
+    calculator keeps the count and command bytes of its active revisions
+    (``replay_revision_count`` / ``replay_revision_bytes``), incremented as
+    revisions are added and recounted when they are archived or deleted. Past
+    the budget, the join asks the client for a snapshot (see
+    ``_should_be_snapshotted`` of the calculator models): the client folds the
+    history into a new snapshot and the server archives the replayed
+    revisions. The cron then deletes the archived revisions once they are
+    older than the retention delay.
+    """
+    _inherit = 'spreadsheet.revision'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        revisions = super().create(vals_list)
+        revisions._add_replay_costs()
+        return revisions
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'active' in vals:
+            self._recount_replay_costs(self._get_calculator_ids())
+        return res
+
+    def unlink(self):
+        # only the active revisions are replayed (the cron deletes archived ones)
+        calculator_ids = self.filtered('active')._get_calculator_ids()
+        res = super().unlink()
+        self._recount_replay_costs(calculator_ids)
+        return res
+
+    @api.model
+    def _get_calculator_revision_budget(self):
+        """Return ``(max revisions, max command bytes)`` replayed when opening a calculator."""
+        IrConfig = self.env['ir.config_parameter'].sudo()
+        return (
+            int(IrConfig.get_param('crm_spreadsheet_enhancement.snapshot_revision_count', 100)),
+            int(IrConfig.get_param('crm_spreadsheet_enhancement.snapshot_revision_bytes', 512 * 1024)),
+        )
+
+    @api.model
+    def _exceeds_revision_budget(self, count, size):
+        max_count, max_bytes = self._get_calculator_revision_budget()
+        return count >= max_count or size >= max_bytes
+
+    def _add_replay_costs(self):
+        """Add the new active revisions to the replay cost of their calculator."""
+        costs = defaultdict(lambda: [0, 0])
+        for revision in self:
+            if revision.active and revision.res_model in CALCULATOR_MODELS:
+                cost = costs[revision.res_model, revision.res_id]
+                cost[0] += 1
+                cost[1] += len((revision.commands or '').encode())
+        for (res_model, res_id), (count, size) in costs.items():
+            self._update_replay_cost(res_model, res_id, count, size, increment=True)
+
+    def _get_calculator_ids(self):
+        """Return ``{res_model: set(res_ids)}`` of the calculators of the revisions."""
+        res_ids_by_model = defaultdict(set)
+        for revision in self:
+            if revision.res_model in CALCULATOR_MODELS:
+                res_ids_by_model[revision.res_model].add(revision.res_id)
+        return res_ids_by_model
+
+    @api.model
+    def _recount_replay_costs(self, res_ids_by_model):
+        """Recount the replay cost of the calculators whose revisions were
+        (un)archived or deleted.
+
+        :param res_ids_by_model: see ``_get_calculator_ids``
+        """
+        for res_model, res_ids in res_ids_by_model.items():
+            costs = self._get_replay_costs(res_model, list(res_ids))
+            for res_id in res_ids:
+                count, size = costs.get(res_id, {}).get('active', (0, 0))
+                self._update_replay_cost(res_model, res_id, count, size)
+
+    @api.model
+    def _update_replay_cost(self, res_model, res_id, count, size, increment=False):
+        # In SQL: the counters are updated on every revision and must neither
+        # bump the calculator's write_date nor lose concurrent increments.
+        Calculator = self.env[res_model]
+        if increment:
+            query = f"""
+                UPDATE "{Calculator._table}"
+                   SET replay_revision_count = coalesce(replay_revision_count, 0) + %s,
+                       replay_revision_bytes = coalesce(replay_revision_bytes, 0) + %s
+                 WHERE id = %s
+            """
+        else:
+            query = f"""
+                UPDATE "{Calculator._table}"
+                   SET replay_revision_count = %s, replay_revision_bytes = %s
+                 WHERE id = %s
+            """
+        self.env.cr.execute(query, (count, size, res_id))
+        Calculator.browse(res_id).invalidate_recordset(['replay_revision_count', 'replay_revision_bytes'])
+
+    @api.model
+    def _get_replay_costs(self, res_model, res_ids=None):
+        """Return ``{res_id: {'active': (count, bytes), 'archived': (count, bytes)}}``
+        for the revisions of ``res_model``, restricted to ``res_ids`` if given."""
+        self.flush_model(['res_model', 'res_id', 'active', 'commands'])
+        query = """
+            SELECT res_id, active, count(*), coalesce(sum(octet_length(commands)), 0)
+              FROM spreadsheet_revision
+             WHERE res_model = %s
+        """
+        params = [res_model]
+        if res_ids is not None:
+            query += " AND res_id IN %s"
+            params.append(tuple(res_ids) or (None,))
+        self.env.cr.execute(query + " GROUP BY res_id, active", params)
+
+        costs = {}
+        for res_id, active, count, size in self.env.cr.fetchall():
+            cost = costs.setdefault(res_id, {'active': (0, 0), 'archived': (0, 0)})
+            cost['active' if active else 'archived'] = (count, size)
+        return costs
+
+    @api.model
+    def _cron_compact_calculator_revisions(self):
+        """Delete the archived (snapshotted) revisions of the quote calculators
+        and log, for each calculator, the revisions and bytes reclaimed.
+
+        Active revisions are never deleted: calculators over the revision budget
+        are folded into a snapshot the next time someone opens them.
+        """
+        IrConfig = self.env['ir.config_parameter'].sudo()
+        retention_days = int(IrConfig.get_param('crm_spreadsheet_enhancement.revision_retention_days', 30))
+        limit_date = fields.Datetime.now() - timedelta(days=retention_days)
+        report = []
+        for res_model in CALCULATOR_MODELS:
+            with instrumentation.phase('revisions.compact', model=res_model):
+                report += self._compact_calculator_revisions(res_model, limit_date)
+        return report
+
+    @api.model
+    def _compact_calculator_revisions(self, res_model, limit_date):
+        Revision = self.sudo().with_context(active_test=False)
+        to_prune = Revision.search([
+            ('res_model', '=', res_model),
+            ('active', '=', False),
+            ('write_date', '<', limit_date),
+        ])
+        if not to_prune:
+            return []
+
+        self.env.cr.execute("""
+            SELECT res_id, count(*), coalesce(sum(octet_length(commands)), 0)
+              FROM spreadsheet_revision
+             WHERE id IN %s
+          GROUP BY res_id
+        """, [tuple(to_prune.ids)])
+        reclaimed = self.env.cr.fetchall()
+
+        for revision_ids in split_every(PRUNE_CHUNK_SIZE, to_prune.ids, Revision.browse):
+            revision_ids.unlink()
+            self._commit_compaction()
+        instrumentation.increment('revisions.pruned', len(to_prune))
+
+        report = []
+        for res_id, count, size in reclaimed:
+            report.append({
+                'res_model': res_model,
+                'res_id': res_id,
+                'revisions': count,
+                'bytes': size,
+            })
+            _logger.info("%s(%s): deleted %s archived revisions, %s bytes reclaimed", res_model, res_id, count, size)
+        _logger.info(
+            "%s: deleted %s archived revisions, %s bytes reclaimed",
+            res_model, len(to_prune), sum(line['bytes'] for line in report),
+        )
+        return report
+
+    def _commit_compaction(self):
+        if not modules.module.current_test:
+            self.env.cr.commit()
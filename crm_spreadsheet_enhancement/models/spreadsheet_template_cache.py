@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+import hashlib
+import logging
+
+from psycopg2 import IntegrityError
+
+from ..tools import instrumentation, spreadsheet_codec, xlsx_import
+
+_logger = logging.getLogger(__name__)
+
+
+class SpreadsheetTemplateCache(models.Model):
+    """Converted calculation templates, shared by content.
+
+    Categories uploading the same XLSX bytes point to the same entry, so a
+    template is converted and stored once. Lead spreadsheets keep referencing
+    the entry they were created from. Entries nothing references any more are
+    removed (see ``_unlink_unreferenced``).
+    """
+    _name = 'crm.spreadsheet.template.cache'
+    _description = 'Converted Calculation Template'
+    _log_access = False
+
+    checksum = fields.Char(required=True, index=True, readonly=True, help="SHA-256 of the uploaded XLSX file.")
+    spreadsheet_data = fields.Text(
+        "Spreadsheet Data",
+        compute='_compute_spreadsheet_data',
+        inverse='_inverse_spreadsheet_data',
+        readonly=True,
+    )
+    spreadsheet_data_compressed = fields.Binary("Compressed Spreadsheet Data", attachment=True, readonly=True)
+
+    _sql_constraints = [
+        ('checksum_unique', 'unique(checksum)', "A template conversion already exists for this file."),
+    ]
+
+    @api.depends('spreadsheet_data_compressed')
+    def _compute_spreadsheet_data(self):
+        for cache in self.with_context(bin_size=False):
+            cache.spreadsheet_data = spreadsheet_codec.from_binary_field(cache.spreadsheet_data_compressed)
+
+    def _inverse_spreadsheet_data(self):
+        for cache in self:
+            cache.spreadsheet_data_compressed = spreadsheet_codec.to_binary_field(cache.spreadsheet_data)
+
+    @api.model
+    def _get_checksum(self, content):
+        return hashlib.sha256(content).hexdigest()
+
+    @api.model
+    def _get_for_content(self, content):
+        """Return the entry converted from the raw XLSX ``content``, converting
+        and storing it on a cache miss. Conversion errors are raised."""
+        checksum = self._get_checksum(content)
+        cache = self.search([('checksum', '=', checksum)], limit=1)
+        if cache:
+            instrumentation.increment('template_cache.hit')
+            return cache
+
+        instrumentation.increment('template_cache.miss')
+        with instrumentation.phase('category.convert_xlsx', checksum=checksum[:12]):
+            excel_data = xlsx_import.xlsx_to_spreadsheet(content)
+
+        with instrumentation.phase('category.dump_json', checksum=checksum[:12]):
+            spreadsheet_data = spreadsheet_codec.dumps(excel_data)
+        _logger.debug("Calculation template %s converted: %s sheets, %s cells", checksum[:12],
+                      len(excel_data['sheets']), sum(len(s['cells']) for s in excel_data['sheets']))
+        try:
+            with self.env.cr.savepoint():
+                cache = self.sudo().create({
+                    'checksum': checksum,
+                    'spreadsheet_data': spreadsheet_data,
+                })
+                cache.flush_recordset()
+        except IntegrityError:
+            # the same file was converted at the same time (checksum_unique):
+            # use that conversion when this transaction can see it
+            cache = self.search([('checksum', '=', checksum)], limit=1)
+            if not cache:
+                raise
+            _logger.debug("Calculation template %s converted concurrently, reusing it", checksum[:12])
+            return cache
+        return cache.sudo(self.env.su)
+
+    def _get_referenced(self):
+        """Return the entries of ``self`` still used by a product category or
+        by a lead spreadsheet created from them."""
+        referenced_ids = set()
+        for model_name in ('product.category', 'crm.lead.spreadsheet'):
+            groups = self.env[model_name].sudo()._read_group(
+                [('template_cache_id', 'in', self.ids)], groupby=['template_cache_id'])
+            referenced_ids.update(cache.id for cache, in groups)
+        return self.browse(referenced_ids)
+
+    def _unlink_unreferenced(self):
+        if not self:
+            return
+        orphans = (self - self._get_referenced()).exists()
+        if orphans:
+            _logger.debug("Evicting %s unreferenced template conversions", len(orphans))
+            orphans.sudo().unlink()
+
+    @api.autovacuum
+    def _gc_unreferenced_templates(self):
+        self.sudo().search([])._unlink_unreferenced()
@@ -62,7 +62,6 @@ export class SpreadsheetFieldSyncAction extends AbstractSpreadsheetAction {
 
     async writeToParent() {
         try {
-            const activeSheetId = this.model.getters.getActiveSheetId();
             const { commands, errors } = await this.model.getters.getFieldSyncX2ManyCommands();
 
             if (errors.length) {
@@ -73,26 +72,39 @@ export class SpreadsheetFieldSyncAction extends AbstractSpreadsheetAction {
                 return;
             }
 
-            // Process commands based on spreadsheet type
-            if (this.spreadsheetType === 'crm' && this.leadId) {
-                await this.orm.write("crm.lead", [this.leadId], {
-                    material_line_ids: commands,
-                });
-                
-            } else if (this.spreadsheetType === 'sale' && this.saleOrderId) {
-                await this.orm.write("sale.order", [this.saleOrderId], {
-                    order_line: commands,
+            await this._writeFieldSyncCommands(commands, _t("current sheet"));
+            this.env.config.historyBack();
+        } catch (error) {
+            this.dialogService.add(WarningDialog, {
+                title: _t("Save Error"),
+                message: _t("Failed to save changes: %s", error.message),
+            });
+        }
+    }
+
+    /**
+     * Save the field syncs of every sheet in a single write. Sheets with errors
+     * are skipped and reported, the others are saved.
+     */
+    async writeAllSheetsToParent() {
+        try {
+            const { commands, errors } =
+                await this.model.getters.getAllSheetsFieldSyncX2ManyCommands();
+
+            await this._writeFieldSyncCommands(commands, _t("all sheets"));
+            if (errors.length) {
+                if (commands.length) {
+                    // The action stays open: reload the lists, only the values
+                    // differing from the records as now saved are sent next time
+                    this.model.dispatch("REFRESH_ALL_DATA_SOURCES");
+                }
+                this.dialogService.add(WarningDialog, {
+                    title: _t("Some sheets were not saved"),
+                    message: errors.join("\n\n"),
                 });
-            } else {
-                throw new Error("No valid parent record found for saving");
+                return;
             }
-       
-            this.notificationService.add(_t("Successfully saved changes from current sheet"), {
-                type: "success",
-            });
-            
             this.env.config.historyBack();
-            
         } catch (error) {
             this.dialogService.add(WarningDialog, {
                 title: _t("Save Error"),
@@ -101,8 +113,42 @@ export class SpreadsheetFieldSyncAction extends AbstractSpreadsheetAction {
         }
     }
 
+    async _writeFieldSyncCommands(commands, source) {
+        if (!commands.length) {
+            this.notificationService.add(_t("No changes to save"), { type: "info" });
+            return;
+        }
+
+        // Process commands based on spreadsheet type
+        if (this.spreadsheetType === 'crm' && this.leadId) {
+            await this.orm.write("crm.lead", [this.leadId], {
+                material_line_ids: commands,
+            });
+        } else if (this.spreadsheetType === 'sale' && this.saleOrderId) {
+            await this.orm.write("sale.order", [this.saleOrderId], {
+                order_line: commands,
+            });
+        } else {
+            throw new Error("No valid parent record found for saving");
+        }
+
+        const fieldCount = commands.reduce((count, [, , values]) => count + Object.keys(values).length, 0);
+        this.notificationService.add(
+            _t("Saved %(fields)s fields on %(records)s records from %(source)s", {
+                fields: fieldCount,
+                records: commands.length,
+                source,
+            }),
+            { type: "success" }
+        );
+    }
+
     // Better initialization with backend data
     _initializeWith(data) {
+        // Supported models and field metadata, read by the field sync plugin on import
+        if (data.field_sync_schema && data.data) {
+            data.data.fieldSyncSchema = data.field_sync_schema;
+        }
         super._initializeWith(data);
         
         // CRM-specific data
@@ -1,8 +1,9 @@
-import { registries, coreTypes, stores } from "@odoo/o-spreadsheet";
+import { astToFormula, registries, coreTypes, stores } from "@odoo/o-spreadsheet";
 import { onMounted, onWillUnmount } from "@odoo/owl";
 
 import { _t } from "@web/core/l10n/translation";
 import { sum } from "@spreadsheet/helpers/helpers";
+import { getFirstListFunction } from "@spreadsheet/list/list_helpers";
 import { addToRegistryWithCleanup } from "@spreadsheet_edition/bundle/helpers/misc";
 
 import { FieldSyncCorePlugin } from "./model/field_sync_core_plugin";
@@ -22,7 +23,32 @@ const {
     sidePanelRegistry,
 } = registries;
 
-coreTypes.add("ADD_FIELD_SYNC").add("DELETE_FIELD_SYNCS");
+coreTypes.add("ADD_FIELD_SYNC").add("DELETE_FIELD_SYNCS").add("REMAP_FIELD_SYNCS");
+
+/**
+ * Index, in the shared list `listId`, of the record read by the first list
+ * formula of the sheet (each line sheet of the consolidated layout reads one
+ * record of the list). 0 when the sheet has no such formula.
+ */
+function getSheetListIndex(getters, sheetId, listId) {
+    const cells = getters.getCells(sheetId);
+    for (const cellId in cells) {
+        const cell = cells[cellId];
+        if (!cell.isFormula) {
+            continue;
+        }
+        const listFunction = getFirstListFunction(cell.compiledFormula.tokens);
+        const [listIdArg, positionArg] = listFunction?.args || [];
+        if (listFunction?.functionName !== "ODOO.LIST" || !listIdArg || !positionArg) {
+            continue;
+        }
+        if (getters.evaluateFormula(sheetId, astToFormula(listIdArg))?.toString() === listId) {
+            const position = getters.evaluateFormula(sheetId, astToFormula(positionArg));
+            return Number.isInteger(position) && position > 0 ? position - 1 : 0;
+        }
+    }
+    return 0;
+}
 
 /**
  * Adds the spreadsheet field sync plugins and menus
@@ -70,7 +96,7 @@ export function addSpreadsheetFieldSyncExtensionWithCleanUp(cleanUpHook = () =>
             // Choose target list: prefer list matching active sheet, otherwise first list
             let targetList = null;
             if (lists.length) {
-                targetList = lists.find((l) => l.sheetId === activeSheetId) || lists[0];
+                targetList = env.model.getters.getSheetMainLists(activeSheetId)[0] || lists[0];
             }
 
             const isNewlyCreate = Boolean(!fieldSync && targetList);
@@ -81,7 +107,9 @@ export function addSpreadsheetFieldSyncExtensionWithCleanUp(cleanUpHook = () =>
                     col: position.col,
                     row: position.row,
                     listId: targetList.id,
-                    indexInList: 0,
+                    indexInList: targetList.shared
+                        ? getSheetListIndex(env.model.getters, activeSheetId, targetList.id)
+                        : 0,
                     fieldName: "quantity",
                 });
             }
@@ -183,4 +211,5 @@ export function addSpreadsheetFieldSyncExtensionWithCleanUp(cleanUpHook = () =>
     const identity = (cmd) => cmd;
     addToRegistryWithCleanup(cleanUpHook, inverseCommandRegistry, "ADD_FIELD_SYNC", identity);
     addToRegistryWithCleanup(cleanUpHook, inverseCommandRegistry, "DELETE_FIELD_SYNCS", identity);
+    addToRegistryWithCleanup(cleanUpHook, inverseCommandRegistry, "REMAP_FIELD_SYNCS", identity);
 }
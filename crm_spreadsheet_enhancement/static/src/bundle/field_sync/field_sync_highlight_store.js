@@ -5,17 +5,90 @@ const { positionToZone } = helpers;
 
 const { SpreadsheetStore, HighlightStore, HoveredCellStore } = stores;
 
+// Arguments whose value never changes, evaluated once when the cell is indexed
+const CONSTANT_ARG_TYPES = ["NUMBER", "STRING", "BOOLEAN"];
+
+// Commands moving, removing or writing cells without an UPDATE_CELL per cell
+// reaching the store (cells written through sub-commands): the index is
+// rebuilt on next hover
+const INVALIDATING_COMMANDS = new Set([
+    "UNDO",
+    "REDO",
+    "PASTE",
+    "PASTE_FROM_OS_CLIPBOARD",
+    "AUTOFILL",
+    "SORT_CELLS",
+    "INSERT_CELL",
+    "DELETE_CELL",
+    "REMOVE_DUPLICATES",
+    "SPLIT_TEXT_INTO_COLUMNS",
+    "ADD_COLUMNS_ROWS",
+    "REMOVE_COLUMNS_ROWS",
+    "MOVE_RANGES",
+    "DELETE_SHEET",
+    "DUPLICATE_SHEET",
+    "DELETE_CONTENT",
+    "CLEAR_CELL",
+    "CLEAR_CELLS",
+]);
+
+function getPositionKey({ col, row }) {
+    return `${col},${row}`;
+}
+
+function getListValueKey(listId, position, fieldName) {
+    return `${listId}|${position}|${fieldName}`;
+}
+
 export class FieldSyncHighlightStore extends SpreadsheetStore {
     constructor(get) {
         super(get);
         this.hoveredCell = get(HoveredCellStore);
+        /**
+         * Per sheet index of the cells calling a list function:
+         * - byKey: "listId|position|fieldName" -> Map(positionKey -> position),
+         *   for the formulas with constant arguments
+         * - dynamic: positionKey -> position, for the formulas whose arguments
+         *   depend on other cells and are evaluated on hover
+         * - keys: positionKey -> "listId|position|fieldName" of byKey
+         */
+        this.formulaIndex = {};
+        // Whether the model update comes from a command handled by the store
+        this.commandHandled = false;
+        this.model.on("update", this, this._onModelUpdate);
         const highlightStore = get(HighlightStore);
         highlightStore.register(this);
         this.onDispose(() => {
             highlightStore.unRegister(this);
+            this.model.off("update", this);
         });
     }
 
+    handle(cmd) {
+        this.commandHandled = true;
+        if (cmd.type === "UPDATE_CELL") {
+            if ("content" in cmd && this.formulaIndex[cmd.sheetId]) {
+                this._indexCell(this.formulaIndex[cmd.sheetId], cmd.sheetId, {
+                    col: cmd.col,
+                    row: cmd.row,
+                });
+            }
+        } else if (INVALIDATING_COMMANDS.has(cmd.type)) {
+            this.formulaIndex = {};
+        }
+    }
+
+    /**
+     * Remote revisions update the model without dispatching their commands to
+     * the stores: drop the index, it is rebuilt on next hover.
+     */
+    _onModelUpdate() {
+        if (!this.commandHandled) {
+            this.formulaIndex = {};
+        }
+        this.commandHandled = false;
+    }
+
     get highlights() {
         if (this.hoveredCell.col === undefined || this.hoveredCell.row === undefined) {
             return [];
@@ -29,38 +102,97 @@ export class FieldSyncHighlightStore extends SpreadsheetStore {
         if (!fieldSync) {
             return [];
         }
-        const highlights = [];
-        const cells = this.getters.getCells(sheetId);
-        for (const cellId in cells) {
-            const cell = cells[cellId];
-            const cellPosition = this.getters.getCellPosition(cellId);
-            if (cell.isFormula && this.getters.isPositionVisible(cellPosition)) {
-                const listFunction = getFirstListFunction(cell.compiledFormula.tokens);
-                if (!listFunction) {
-                    continue;
-                }
-                const [listIdArg, positionArg, fieldNameArg] = listFunction.args;
-                if (!listIdArg || !positionArg || !fieldNameArg) {
-                    continue;
-                }
-                const listId = this.getters
-                    .evaluateFormula(sheetId, astToFormula(listIdArg))
-                    ?.toString();
-                const position = this.getters.evaluateFormula(sheetId, astToFormula(positionArg));
-                const fieldName = this.getters.evaluateFormula(sheetId, astToFormula(fieldNameArg));
-                if (
-                    listId === fieldSync.listId &&
-                    position - 1 === fieldSync.indexInList &&
-                    fieldName === fieldSync.fieldName
-                ) {
-                    highlights.push({
-                        zone: positionToZone(cellPosition),
-                        sheetId,
-                        color: "#875A7B",
-                    });
+        const index = this._getFormulaIndex(sheetId);
+        const key = getListValueKey(fieldSync.listId, fieldSync.indexInList + 1, fieldSync.fieldName);
+        const positions = [...(index.byKey.get(key)?.values() || [])];
+        for (const position of index.dynamic.values()) {
+            const args = this._evaluateListArgs(sheetId, position);
+            if (args && getListValueKey(...args) === key) {
+                positions.push(position);
+            }
+        }
+        return positions
+            .filter((position) => this.getters.isPositionVisible({ sheetId, ...position }))
+            .map((position) => ({
+                zone: positionToZone(position),
+                sheetId,
+                color: "#875A7B",
+            }));
+    }
+
+    _getFormulaIndex(sheetId) {
+        if (!this.formulaIndex[sheetId]) {
+            const index = { byKey: new Map(), dynamic: new Map(), keys: new Map() };
+            const cells = this.getters.getCells(sheetId);
+            for (const cellId in cells) {
+                if (cells[cellId].isFormula) {
+                    const { col, row } = this.getters.getCellPosition(cellId);
+                    this._indexCell(index, sheetId, { col, row });
                 }
             }
+            this.formulaIndex[sheetId] = index;
+        }
+        return this.formulaIndex[sheetId];
+    }
+
+    /**
+     * (Re)index the cell at `position` after its content changed.
+     */
+    _indexCell(index, sheetId, position) {
+        const positionKey = getPositionKey(position);
+        const previousKey = index.keys.get(positionKey);
+        if (previousKey !== undefined) {
+            index.byKey.get(previousKey)?.delete(positionKey);
+            index.keys.delete(positionKey);
+        }
+        index.dynamic.delete(positionKey);
+
+        const listFunction = this._getListFunction(sheetId, position);
+        if (!listFunction) {
+            return;
+        }
+        if (!listFunction.args.every((arg) => CONSTANT_ARG_TYPES.includes(arg.type))) {
+            index.dynamic.set(positionKey, { col: position.col, row: position.row });
+            return;
+        }
+        const args = this._evaluateListArgs(sheetId, position, listFunction);
+        if (!args) {
+            return;
+        }
+        const key = getListValueKey(...args);
+        if (!index.byKey.has(key)) {
+            index.byKey.set(key, new Map());
+        }
+        index.byKey.get(key).set(positionKey, { col: position.col, row: position.row });
+        index.keys.set(positionKey, key);
+    }
+
+    _getListFunction(sheetId, position) {
+        const cell = this.getters.getCell({ sheetId, ...position });
+        if (!cell?.isFormula) {
+            return undefined;
+        }
+        const listFunction = getFirstListFunction(cell.compiledFormula.tokens);
+        const [listIdArg, positionArg, fieldNameArg] = listFunction?.args || [];
+        if (!listIdArg || !positionArg || !fieldNameArg) {
+            return undefined;
+        }
+        return { args: [listIdArg, positionArg, fieldNameArg] };
+    }
+
+    /**
+     * Return the evaluated [listId, position, fieldName] of the list function
+     * of the cell at `position`.
+     */
+    _evaluateListArgs(sheetId, position, listFunction = this._getListFunction(sheetId, position)) {
+        if (!listFunction) {
+            return undefined;
         }
-        return highlights;
+        const [listIdArg, positionArg, fieldNameArg] = listFunction.args;
+        return [
+            this.getters.evaluateFormula(sheetId, astToFormula(listIdArg))?.toString(),
+            this.getters.evaluateFormula(sheetId, astToFormula(positionArg)),
+            this.getters.evaluateFormula(sheetId, astToFormula(fieldNameArg)),
+        ];
     }
 }
@@ -3,29 +3,61 @@ import { OdooCorePlugin } from "@spreadsheet/plugins";
 
 const { positionToZone, toCartesian, toXC } = helpers;
 
-// MODEL CONFIGURATION - Both CRM and Sales supported
-const SUPPORTED_MODELS = {
-    'crm.material.line': {
-        fields: ['product_template_id','attributes_description','quantity', 'width', 'height', 'length', 'thickness'],
-        displayName: 'Material Line'
-    },
-    'sale.order.line': {
-        fields: ['product_id', 'product_uom_qty', 'price_unit', 'width', 'height', 'length', 'thickness'],
-        displayName: 'Order Line'
-    }
-};
+// Single list over all the material lines of a lead (consolidated layout): it
+// isn't tied to one sheet, each line sheet reads its own position
+export const MATERIAL_LINES_LIST_ID = "material_lines";
+
+// Commands changing the list definitions read by getMainLists
+const LIST_COMMANDS = new Set([
+    "REGISTER_ODOO_LIST",
+    "UNREGISTER_ODOO_LIST",
+    "INSERT_ODOO_LIST",
+    "RE_INSERT_ODOO_LIST",
+    "DUPLICATE_ODOO_LIST",
+    "REMOVE_ODOO_LIST",
+    "UPDATE_ODOO_LIST",
+    "UPDATE_ODOO_LIST_DOMAIN",
+    "RENAME_ODOO_LIST",
+    "DELETE_SHEET",
+]);
 
 export class FieldSyncCorePlugin extends OdooCorePlugin {
     static getters = [
         "getAllFieldSyncs",
         "getFieldSync",
         "getFieldSyncs",
+        "getListFieldSyncs",
+        "getSheetFieldSyncs",
         "getMainLists",
+        "getMainList",
+        "getSheetMainLists",
         "getSupportedModels",
+        "getFieldSyncSchemaFields",
         "getCurrentSpreadsheetModel",
     ];
 
     fieldSyncs = {};
+    /**
+     * Supported models and metadata of their synced fields, sent by the server
+     * with the session join (`field_sync_schema`). Not exported: the server
+     * owns it and sends it again on every join.
+     */
+    fieldSyncSchema = { models: {}, fields: {} };
+    /**
+     * Secondary index of the field syncs: listId -> positionKey -> position.
+     * Updated through the history along with `fieldSyncs` so that it follows
+     * undo/redo.
+     */
+    fieldSyncsByList = {};
+    /**
+     * Replaced by a new object (through the history, so undo/redo restore it)
+     * by every command changing the list definitions. The memoized
+     * getMainLists result is only reused while it was computed with the
+     * current token: unlike a counter, a token is never handed out twice, so
+     * a command following an undo can't match a stale result.
+     */
+    listsToken = {};
+    mainListsCache = undefined;
 
     allowDispatch(cmd) {
         switch (cmd.type) {
@@ -77,19 +109,38 @@ export class FieldSyncCorePlugin extends OdooCorePlugin {
                     indexInList: cmd.indexInList,
                     fieldName: cmd.fieldName,
                 };
-                this.history.update("fieldSyncs", sheetId, col, row, fieldSync);
+                this._setFieldSync({ sheetId, col, row }, fieldSync);
                 break;
             }
             case "DELETE_FIELD_SYNCS": {
-                const { sheetId, zone } = cmd;
-                for (let col = zone.left; col <= zone.right; col++) {
-                    for (let row = zone.top; row <= zone.bottom; row++) {
-                        this.history.update("fieldSyncs", sheetId, col, row, undefined);
+                for (const [position] of this._getFieldSyncsInZone(cmd.sheetId, cmd.zone)) {
+                    this._setFieldSync(position, undefined);
+                }
+                break;
+            }
+            case "REMAP_FIELD_SYNCS": {
+                // Compute every target before applying any, remaps may chain (2 -> 1, 3 -> 2)
+                const changes = [];
+                for (const remap of cmd.remaps) {
+                    for (const [position, fieldSync] of this.getListFieldSyncs(remap.fromListId)) {
+                        if (fieldSync.indexInList !== remap.fromIndex) {
+                            continue;
+                        }
+                        const newFieldSync = remap.toListId
+                            ? { ...fieldSync, listId: remap.toListId, indexInList: remap.toIndex }
+                            : undefined;
+                        changes.push([position, newFieldSync]);
                     }
                 }
+                for (const [position, fieldSync] of changes) {
+                    this._setFieldSync(position, fieldSync);
+                }
                 break;
             }
             default:
+                if (LIST_COMMANDS.has(cmd.type)) {
+                    this.history.update("listsToken", {});
+                }
                 break;
         }
     }
@@ -97,21 +148,20 @@ export class FieldSyncCorePlugin extends OdooCorePlugin {
     adaptRanges(applyChange) {
         const all = Array.from(this.getAllFieldSyncs());
         for (const [position, fieldSync] of all) {
-            const { sheetId, col, row } = position;
             const change = applyChange(this._getFieldSyncRange(position));
             if (!change) {
                 continue;
             }
             switch (change.changeType) {
                 case "REMOVE":
-                    this.history.update("fieldSyncs", sheetId, col, row, undefined);
+                    this._setFieldSync(position, undefined);
                     break;
                 case "NONE":
                     break;
                 default: {
                     const { top, left } = change.range.zone;
-                    this.history.update("fieldSyncs", sheetId, col, row, undefined);
-                    this.history.update("fieldSyncs", sheetId, left, top, fieldSync);
+                    this._setFieldSync(position, undefined);
+                    this._setFieldSync({ sheetId: position.sheetId, col: left, row: top }, fieldSync);
                     break;
                 }
             }
@@ -119,42 +169,68 @@ export class FieldSyncCorePlugin extends OdooCorePlugin {
     }
 
     getSupportedModels() {
-        return SUPPORTED_MODELS;
+        return this.fieldSyncSchema.models;
+    }
+
+    /**
+     * Metadata (as returned by fields_get) of the synced fields of `modelName`
+     */
+    getFieldSyncSchemaFields(modelName) {
+        return this.fieldSyncSchema.fields[modelName];
     }
 
     _isSupportedModel(modelName) {
-        return modelName in SUPPORTED_MODELS;
+        return modelName in this.fieldSyncSchema.models;
     }
 
     getCurrentSpreadsheetModel() {
-        if (!this.getters || typeof this.getters.getListIds !== "function") {
-            return null;
-        }
-
-        const listIds = this.getters.getListIds() || [];
-        
-        for (const listId of listIds) {
-            const list = this.getters.getListDefinition(listId);
-            if (!list) continue;
-            
-            const modelName = list.model || list.modelName;
-            
-            if (this._isSupportedModel(modelName)) {
-                return modelName;
-            }
-        }
-        
-        return null;
+        const [firstList] = this.getMainLists();
+        return firstList ? firstList.model : null;
     }
 
     /**
      * GENERIC: Get all lists for supported models
      */
     getMainLists() {
+        return this._getMainListsIndex().lists;
+    }
+
+    getMainList(listId) {
+        return this._getMainListsIndex().byId[listId];
+    }
+
+    /**
+     * Lists of the sheet `sheetId`, shared lists (not tied to a sheet) included.
+     */
+    getSheetMainLists(sheetId) {
+        const { bySheet, shared } = this._getMainListsIndex();
+        const lists = bySheet[sheetId] || [];
+        return shared.length ? [...lists, ...shared] : lists;
+    }
+
+    _getMainListsIndex() {
+        if (this.mainListsCache?.token !== this.listsToken) {
+            const lists = this._computeMainLists();
+            const byId = {};
+            const bySheet = {};
+            const shared = [];
+            for (const list of lists) {
+                byId[list.id] = list;
+                if (list.shared) {
+                    shared.push(list);
+                } else {
+                    (bySheet[list.sheetId] ??= []).push(list);
+                }
+            }
+            this.mainListsCache = { token: this.listsToken, lists, byId, bySheet, shared };
+        }
+        return this.mainListsCache;
+    }
+
+    _computeMainLists() {
         if (!this.getters || typeof this.getters.getListIds !== "function") {
             return [];
         }
-
         const listIds = this.getters.getListIds() || [];
         const lists = [];
 
@@ -179,16 +255,18 @@ export class FieldSyncCorePlugin extends OdooCorePlugin {
                 columns = Object.keys(list.columns);
             } else {
                 // Fallback: Use model's default fields
-                columns = SUPPORTED_MODELS[modelName]?.fields || [];
+                columns = this.getSupportedModels()[modelName].fields;
             }
 
+            const shared = list.id === MATERIAL_LINES_LIST_ID;
             const processedList = {
                 id: list.id,
                 model: modelName,
                 columns,
                 field_names: columns,
-                name: list.name || `${SUPPORTED_MODELS[modelName].displayName} ${list.id}`,
-                sheetId: list.sheetId || `sheet_${list.id}`,
+                name: list.name || `${this.getSupportedModels()[modelName].displayName} ${list.id}`,
+                sheetId: shared ? null : list.sheetId || `sheet_${list.id}`,
+                shared,
                 domain: list.domain || [],
                 context: list.context || {},
                 rawDefinition: list,
@@ -223,17 +301,44 @@ export class FieldSyncCorePlugin extends OdooCorePlugin {
         return result;
     }
 
-    getFieldSyncs(sheetId, zone) {
-        const fieldSyncs = [];
-        for (let col = zone.left; col <= zone.right; col++) {
-            for (let row = zone.top; row <= zone.bottom; row++) {
-                const fieldSync = this.getFieldSync({ sheetId, col, row });
+    /**
+     * Return the [position, fieldSync] pairs of the list `listId`, without
+     * going through the syncs of the other lists.
+     */
+    getListFieldSyncs(listId) {
+        const result = [];
+        const positions = this.fieldSyncsByList[listId] || {};
+        for (const key in positions) {
+            const position = positions[key];
+            const fieldSync = position && this.getFieldSync(position);
+            if (fieldSync) {
+                result.push([position, fieldSync]);
+            }
+        }
+        return result;
+    }
+
+    /**
+     * Return the [position, fieldSync] pairs of the sheet `sheetId`.
+     */
+    getSheetFieldSyncs(sheetId) {
+        const result = [];
+        const cols = this.fieldSyncs[sheetId] || {};
+        for (const colKey in cols) {
+            const rows = cols[colKey] || {};
+            const col = parseInt(colKey, 10);
+            for (const rowKey in rows) {
+                const fieldSync = rows[rowKey];
                 if (fieldSync) {
-                    fieldSyncs.push(fieldSync);
+                    result.push([{ sheetId, col, row: parseInt(rowKey, 10) }, fieldSync]);
                 }
             }
         }
-        return fieldSyncs;
+        return result;
+    }
+
+    getFieldSyncs(sheetId, zone) {
+        return this._getFieldSyncsInZone(sheetId, zone).map(([position, fieldSync]) => fieldSync);
     }
 
     getFieldSync(position) {
@@ -241,6 +346,47 @@ export class FieldSyncCorePlugin extends OdooCorePlugin {
         return this.fieldSyncs?.[sheetId]?.[col]?.[row] ?? undefined;
     }
 
+    /**
+     * Return the [position, fieldSync] pairs inside `zone`. Only the columns
+     * and rows holding a field sync are visited, so the cost does not depend
+     * on the size of the zone (whole columns, whole sheet).
+     */
+    _getFieldSyncsInZone(sheetId, zone) {
+        const result = [];
+        const cols = this.fieldSyncs[sheetId] || {};
+        for (const colKey in cols) {
+            const col = parseInt(colKey, 10);
+            if (col < zone.left || col > zone.right) {
+                continue;
+            }
+            const rows = cols[colKey] || {};
+            for (const rowKey in rows) {
+                const row = parseInt(rowKey, 10);
+                if (row >= zone.top && row <= zone.bottom && rows[rowKey]) {
+                    result.push([{ sheetId, col, row }, rows[rowKey]]);
+                }
+            }
+        }
+        return result;
+    }
+
+    /**
+     * Set (or remove, when `fieldSync` is undefined) the field sync at
+     * `position`, keeping the list index consistent.
+     */
+    _setFieldSync(position, fieldSync) {
+        const { sheetId, col, row } = position;
+        const key = `${sheetId}!${col}!${row}`;
+        const previous = this.getFieldSync(position);
+        if (previous && previous.listId !== fieldSync?.listId) {
+            this.history.update("fieldSyncsByList", previous.listId, key, undefined);
+        }
+        this.history.update("fieldSyncs", sheetId, col, row, fieldSync);
+        if (fieldSync && previous?.listId !== fieldSync.listId) {
+            this.history.update("fieldSyncsByList", fieldSync.listId, key, { sheetId, col, row });
+        }
+    }
+
     _getFieldSyncRange(position) {
         return this.getters.getRangeFromZone(position.sheetId, positionToZone(position));
     }
@@ -278,6 +424,9 @@ export class FieldSyncCorePlugin extends OdooCorePlugin {
      * Import with proper handling
      */
     import(data) {
+        if (data.fieldSyncSchema) {
+            this.fieldSyncSchema = data.fieldSyncSchema;
+        }
         let totalImported = 0;
         
         for (const sheet of data.sheets || []) {
@@ -288,7 +437,7 @@ export class FieldSyncCorePlugin extends OdooCorePlugin {
             let sheetImported = 0;
             for (const [xc, fieldSync] of Object.entries(sheet.fieldSyncs)) {
                 const { col, row } = toCartesian(xc);
-                this.history.update("fieldSyncs", sheet.id, col, row, fieldSync);
+                this._setFieldSync({ sheetId: sheet.id, col, row }, fieldSync);
                 sheetImported++;
                 totalImported++;
             }
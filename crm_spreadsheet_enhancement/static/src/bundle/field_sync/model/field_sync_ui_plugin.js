@@ -6,7 +6,7 @@ import { OdooUIPlugin } from "@spreadsheet/plugins";
 const { positionToZone } = helpers;
 
 export class FieldSyncUIPlugin extends OdooUIPlugin {
-    static getters = ["getFieldSyncX2ManyCommands"];
+    static getters = ["getFieldSyncX2ManyCommands", "getAllSheetsFieldSyncX2ManyCommands"];
     static layers = ["Triangle"];
 
     handle(cmd) {
@@ -80,14 +80,7 @@ export class FieldSyncUIPlugin extends OdooUIPlugin {
         const map = {};
 
         // Get all field syncs for THIS specific list only
-        const allFieldSyncs = [...this.getters.getAllFieldSyncs()];
-        
-        for (const [position, fieldSync] of allFieldSyncs) {
-            // Filter: Only check syncs for THIS list
-            if (fieldSync.listId !== listId) {
-                continue;
-            }
-
+        for (const [position, fieldSync] of this.getters.getListFieldSyncs(listId)) {
             const { indexInList, fieldName } = fieldSync;
             const key = `${listId}-${indexInList}-${fieldName}`;
             const cell = this.getters.getEvaluatedCell(position);
@@ -121,29 +114,9 @@ export class FieldSyncUIPlugin extends OdooUIPlugin {
         return errors.length ? errors : undefined;
     }
 
-    /**
-     * Get max position for a SPECIFIC list
-     * @private
-     */
-    getFieldSyncMaxPositionForList(listId) {
-        const allFieldSyncs = [...this.getters.getAllFieldSyncs()];
-        const fieldSyncsForThisList = allFieldSyncs.filter(
-            ([position, sync]) => sync.listId === listId
-        );
-        
-        if (fieldSyncsForThisList.length === 0) {
-            return 0;
-        }
-        
-        return Math.max(...fieldSyncsForThisList.map(([position, sync]) => sync.indexInList));
-    }
     getActiveSheetListIds() {
         const activeSheetId = this.getters.getActiveSheetId();
-        const allLists = this.getters.getMainLists();
-        
-        return allLists
-            .filter(list => list.sheetId === activeSheetId)
-            .map(list => list.id);
+        return this.getters.getSheetMainLists(activeSheetId).map((list) => list.id);
     }
 
     /**
@@ -151,10 +124,10 @@ export class FieldSyncUIPlugin extends OdooUIPlugin {
      */
     isFieldSyncFromActiveSheet(fieldSync, position) {
         const activeSheetId = this.getters.getActiveSheetId();
-        const activeSheetLists = this.getActiveSheetListIds();
-        
-        return position.sheetId === activeSheetId && 
-               activeSheetLists.includes(fieldSync.listId);
+        return (
+            position.sheetId === activeSheetId &&
+            this.getters.getMainList(fieldSync.listId)?.sheetId === activeSheetId
+        );
     }
     
 
@@ -162,174 +135,212 @@ export class FieldSyncUIPlugin extends OdooUIPlugin {
      *  Correctly process field syncs by record
      */
     async getFieldSyncX2ManyCommands() {
-        const commands = [];
+        const activeSheetId = this.getters.getActiveSheetId();
+        const { valuesPerRecord, errors } = this.collectSheetValues(activeSheetId, activeSheetId);
+        return { commands: this.getUpdateCommands(valuesPerRecord), errors };
+    }
+
+    /**
+     *  Commands of the field syncs of every sheet, each sheet saved as if it
+     *  was the active one.
+     *  A sheet with errors is left out (its errors are reported in `sheetErrors`
+     *  and, prefixed with the sheet name, in `errors`), the other sheets are kept.
+     *  Sheets updating the same field of the same record with different values
+     *  are in error: there is no way to tell which one should win.
+     */
+    async getAllSheetsFieldSyncX2ManyCommands() {
         const errors = [];
+        const sheetErrors = {};
+        const addSheetErrors = (sheetId, sheetErrorMessages) => {
+            const sheetName = this.getSheetName(sheetId);
+            (sheetErrors[sheetId] ??= []).push(...sheetErrorMessages);
+            errors.push(
+                ...sheetErrorMessages.map((error) =>
+                    _t("%(sheet)s: %(error)s", { sheet: sheetName, error })
+                )
+            );
+        };
+
+        const valuesPerSheet = {};
+        for (const sheetId of this.getters.getSheetIds()) {
+            const sheet = this.collectSheetValues(sheetId, sheetId);
+            if (sheet.errors.length) {
+                addSheetErrors(sheetId, sheet.errors);
+                continue;
+            }
+            valuesPerSheet[sheetId] = sheet.valuesPerRecord;
+        }
 
-        try {
-            const activeSheetId = this.getters.getActiveSheetId();
-            
-            //  GET ALL LISTS but only process those linked to ACTIVE SHEET
-            const allLists = this.getters.getMainLists();
+        for (const [sheetId, conflictErrors] of Object.entries(
+            this.getConflictingSheetValues(valuesPerSheet)
+        )) {
+            addSheetErrors(sheetId, conflictErrors);
+            delete valuesPerSheet[sheetId];
+        }
 
-            if (!allLists || allLists.length === 0) {
-                return { commands: [], errors: [] };
+        const valuesPerRecord = {};
+        for (const sheetValuesPerRecord of Object.values(valuesPerSheet)) {
+            for (const recordId in sheetValuesPerRecord) {
+                valuesPerRecord[recordId] = {
+                    ...valuesPerRecord[recordId],
+                    ...sheetValuesPerRecord[recordId],
+                };
             }
+        }
+        return { commands: this.getUpdateCommands(valuesPerRecord), errors, sheetErrors };
+    }
 
-            //  PROCESS ONLY LISTS THAT BELONG TO ACTIVE SHEET
-            for (const list of allLists) {
-                try {
-                    //   Only process lists that are linked to active sheet
-                    if (list.sheetId !== activeSheetId) {
-                        continue; // Skip lists from other sheets
+    /**
+     *  Errors per sheet id of the sheets updating a field of a record with a
+     *  value different from the one of another sheet.
+     *  @param {Object} valuesPerSheet sheetId -> recordId -> fieldName -> value
+     */
+    getConflictingSheetValues(valuesPerSheet) {
+        const writes = {};
+        for (const [sheetId, valuesPerRecord] of Object.entries(valuesPerSheet)) {
+            for (const recordId in valuesPerRecord) {
+                for (const [fieldName, value] of Object.entries(valuesPerRecord[recordId])) {
+                    const key = `${recordId}-${fieldName}`;
+                    writes[key] ??= { recordId, fieldName, sheetIdsByValue: new Map() };
+                    const { sheetIdsByValue } = writes[key];
+                    if (!sheetIdsByValue.has(value)) {
+                        sheetIdsByValue.set(value, []);
                     }
+                    sheetIdsByValue.get(value).push(sheetId);
+                }
+            }
+        }
 
-                    // Get data source for THIS list
-                    const listDataSource = this.getters.getListDataSource(list.id);
-                    
-                    if (!listDataSource) {
-                        continue;
-                    }
+        const conflicts = {};
+        for (const { recordId, fieldName, sheetIdsByValue } of Object.values(writes)) {
+            if (sheetIdsByValue.size < 2) {
+                continue;
+            }
+            const sheetIds = [...sheetIdsByValue.values()].flat();
+            const error = _t(
+                'Multiple sheets are updating the field "%(field)s" of record %(record)s with different values! Unable to determine which one to choose: %(sheets)s',
+                {
+                    field: fieldName,
+                    record: recordId,
+                    sheets: sheetIds.map((sheetId) => this.getSheetName(sheetId)).join(", "),
+                }
+            );
+            for (const sheetId of sheetIds) {
+                (conflicts[sheetId] ??= []).push(error);
+            }
+        }
+        return conflicts;
+    }
 
-                    const fields = listDataSource.getFields();
-                    const valuesPerRecord = {};
+    getSheetName(sheetId) {
+        return this.getters.tryGetSheet(sheetId)?.name || sheetId;
+    }
 
-                    //  GET FIELD SYNCS ONLY FOR THIS LIST (which is already filtered by active sheet)
-                    const allFieldSyncs = this.getters.getAllFieldSyncs();
-                    let processedSyncs = 0;
+    getUpdateCommands(valuesPerRecord) {
+        return Object.entries(valuesPerRecord).map(([recordId, values]) =>
+            x2ManyCommands.update(Number(recordId), values)
+        );
+    }
 
-                    for (const [position, fieldSync] of allFieldSyncs) {
-                        //  Only process syncs for THIS list AND active sheet
-                        if (fieldSync.listId !== list.id || position.sheetId !== activeSheetId) {
-                            continue;
-                        }
+    /**
+     *  Changed values per record id of the lists linked to `sheetId`. When
+     *  `positionSheetId` is given, only the syncs located on that sheet count.
+     */
+    collectSheetValues(sheetId, positionSheetId = undefined) {
+        const valuesPerRecord = {};
+        const errors = [];
 
-                        processedSyncs++;
+        for (const list of this.getters.getSheetMainLists(sheetId)) {
+            try {
+                // Get data source for THIS list
+                const listDataSource = this.getters.getListDataSource(list.id);
+                if (!listDataSource) {
+                    continue;
+                }
+                //  Metadata of the synced fields comes with the session join, the
+                //  other writable fields are read from the list data source
+                const schemaFields = this.getters.getFieldSyncSchemaFields(list.model) || {};
 
-                        const { listId, indexInList, fieldName } = fieldSync;
-                        
-                        // Get the record ID
-                        const recordInfo = this.getters.getListCellValueAndFormat(
-                            listId,
-                            indexInList,
-                            "id"
-                        );
-                        const recordId = recordInfo ? recordInfo.value : null;
+                for (const [position, fieldSync] of this.getters.getListFieldSyncs(list.id)) {
+                    if (positionSheetId !== undefined && position.sheetId !== positionSheetId) {
+                        continue;
+                    }
 
-                        // Get the cell value
-                        const cell = this.getters.getEvaluatedCell(position);
-                        
-                        if (cell.type === "empty" || cell.value === "") {
-                            continue;
-                        }
+                    const { listId, indexInList, fieldName } = fieldSync;
 
-                        const field = fields[fieldName];
-                        if (!field) {
-                            continue;
-                        }
+                    // Get the record ID
+                    const recordInfo = this.getters.getListCellValueAndFormat(
+                        listId,
+                        indexInList,
+                        "id"
+                    );
+                    const recordId = recordInfo ? recordInfo.value : null;
 
-                        if (recordId) {
-                            const { checkType, castToServerValue } = this.getFieldTypeSpec(field.type);
-                            if (checkType(cell)) {
-                                valuesPerRecord[recordId] ??= {};
-                                valuesPerRecord[recordId][fieldName] = castToServerValue(cell);
-                            }
-                        }
+                    // Get the cell value
+                    const cell = this.getters.getEvaluatedCell(position);
+
+                    if (cell.type === "empty" || cell.value === "") {
+                        continue;
                     }
 
-                    // Create UPDATE commands only if we found syncs for this list
-                    if (processedSyncs > 0) {
-                        for (const recordId in valuesPerRecord) {
-                            const values = valuesPerRecord[recordId];
-                            commands.push(x2ManyCommands.update(Number(recordId), values));
-                        }
-                        
+                    const field = schemaFields[fieldName] || listDataSource.getFields()[fieldName];
+                    if (!field) {
+                        continue;
                     }
 
-                } catch (listError) {
-                    errors.push(_t("Error processing list %s: %s", list.id, listError.message));
+                    if (recordId) {
+                        const { checkType, castToServerValue } = this.getFieldTypeSpec(field.type);
+                        if (checkType(cell)) {
+                            const value = castToServerValue(cell);
+                            //  Only send the values differing from the loaded record
+                            if (this.isLoadedValue(listDataSource, indexInList, fieldName, field.type, value)) {
+                                continue;
+                            }
+                            valuesPerRecord[recordId] ??= {};
+                            valuesPerRecord[recordId][fieldName] = value;
+                        }
+                    }
                 }
+            } catch (listError) {
+                errors.push(_t("Error processing list %s: %s", list.id, listError.message));
             }
-
-        } catch (error) {
-            errors.push(_t("Critical error: %s", error.message));
         }
 
-        return { commands, errors };
+        return { valuesPerRecord, errors };
     }
+
     /**
-     *  Get all field syncs for a specific list
+     *  Whether `value` equals the value of `fieldName` loaded by the list for
+     *  the record at `indexInList`. Unknown when the record or field isn't loaded.
      */
-    getFieldSyncsForList(listId) {
-        const fieldSyncs = [];
-        
-        try {
-            // Get all field syncs from the model
-            const allFieldSyncs = this.getters.getAllFieldSyncs();
-            
-            //  Correct way to iterate - depends on actual structure
-            if (allFieldSyncs instanceof Map) {
-                for (const [key, fieldSync] of allFieldSyncs) {
-                    if (fieldSync.listId === listId) {
-                        // Reconstruct position from key or use fieldSync's position
-                        const position = this.parsePositionFromKey(key);
-                        fieldSyncs.push({
-                            ...fieldSync,
-                            ...position
-                        });
-                    }
-                }
-            } else if (Array.isArray(allFieldSyncs)) {
-                // If it's an array of objects
-                for (const fieldSync of allFieldSyncs) {
-                    if (fieldSync.listId === listId) {
-                        fieldSyncs.push(fieldSync);
-                    }
-                }
-            } else if (typeof allFieldSyncs === 'object') {
-                // If it's an object with positions as keys
-                for (const [positionKey, fieldSync] of Object.entries(allFieldSyncs)) {
-                    if (fieldSync.listId === listId) {
-                        const position = this.parsePositionFromKey(positionKey);
-                        fieldSyncs.push({
-                            ...fieldSync,
-                            ...position
-                        });
-                    }
-                }
-            }
-        } catch (error) {
+    isLoadedValue(listDataSource, indexInList, fieldName, fieldType, value) {
+        const record = listDataSource.data?.[indexInList];
+        if (!record || !(fieldName in record)) {
+            return false;
+        }
+        let loadedValue = record[fieldName];
+        switch (fieldType) {
+            case "many2one":
+                loadedValue = Array.isArray(loadedValue) ? loadedValue[0] : loadedValue?.id;
+                return (loadedValue || false) === value;
+            case "float":
+            case "monetary":
+                return typeof loadedValue === "number" && Math.abs(loadedValue - value) < 1e-9;
+            case "char":
+            case "text":
+                return (loadedValue || "") === value;
+            default:
+                return loadedValue === value;
         }
-        
-        return fieldSyncs;
     }
 
     /**
-     *  Parse position from storage key
+     *  Get all field syncs for a specific list
      */
-    parsePositionFromKey(key) {
-        try {
-            // Common formats: "sheetId_col_row" or JSON stringified position
-            if (key.includes('_')) {
-                const parts = key.split('_');
-                if (parts.length >= 3) {
-                    return {
-                        sheetId: parts[0],
-                        col: parseInt(parts[1]),
-                        row: parseInt(parts[2])
-                    };
-                }
-            }
-            
-            // Try JSON parsing
-            const position = JSON.parse(key);
-            if (position.sheetId && position.col !== undefined && position.row !== undefined) {
-                return position;
-            }
-        } catch {
-            // If parsing fails, return default
-        }
-        
-        return { sheetId: this.getters.getActiveSheetId(), col: 0, row: 0 };
+    getFieldSyncsForList(listId) {
+        return this.getters
+            .getListFieldSyncs(listId)
+            .map(([position, fieldSync]) => ({ ...fieldSync, ...position }));
     }
 
     /**
@@ -456,25 +467,7 @@ export class FieldSyncUIPlugin extends OdooUIPlugin {
         const activeSheetId = this.getters.getActiveSheetId();
         
         try {
-            const allFieldSyncs = this.getters.getAllFieldSyncs();
-            let fieldSyncEntries = [];
-
-            //  Handle different data structures
-            if (allFieldSyncs instanceof Map) {
-                fieldSyncEntries = Array.from(allFieldSyncs.entries());
-            } else if (Array.isArray(allFieldSyncs)) {
-                fieldSyncEntries = allFieldSyncs.map((sync, index) => [index, sync]);
-            } else if (typeof allFieldSyncs === 'object') {
-                fieldSyncEntries = Object.entries(allFieldSyncs);
-            }
-
-            for (const [key, fieldSync] of fieldSyncEntries) {
-                const position = this.parsePositionFromKey(key);
-                
-                if (position.sheetId !== activeSheetId) {
-                    continue;
-                }
-
+            for (const [position] of this.getters.getSheetFieldSyncs(activeSheetId)) {
                 const zone = this.getters.expandZone(activeSheetId, positionToZone(position));
                 if (zone.left !== position.col || zone.top !== position.row) {
                     continue;
@@ -36,8 +36,7 @@ export class FieldSyncSidePanel extends Component {
             return null;
         }
 
-        const lists = this.env.model.getters.getMainLists();
-        return lists.find(list => list.id === fieldSync.listId) || null;
+        return this.env.model.getters.getMainList(fieldSync.listId) || null;
     }
 
     /**
@@ -7,7 +7,7 @@ import { x2ManyCommands } from "@web/core/orm_service";
 
 import { mailModels } from "@mail/../tests/mail_test_helpers";
 
-import { setCellContent } from "@spreadsheet/../tests/helpers/commands";
+import { copy, paste, setCellContent } from "@spreadsheet/../tests/helpers/commands";
 import { getCellContent } from "@spreadsheet/../tests/helpers/getters";
 
 import {
@@ -20,7 +20,7 @@ import { addFieldSync } from "./helpers/commands";
 import { stores, helpers } from "@odoo/o-spreadsheet";
 
 const { HighlightStore, HoveredCellStore } = stores;
-const { toZone } = helpers;
+const { toZone, zoneToXc } = helpers;
 
 defineSpreadsheetSaleModels();
 defineModels(mailModels);
@@ -145,4 +145,24 @@ describe("field sync action", () => {
             },
         ]);
     });
+
+    test("hover field sync highlights edited and pasted list formulas", async () => {
+        const { model, env } = await mountSaleOrderSpreadsheetAction();
+        const hoverStore = env.getStore(HoveredCellStore);
+        const highlightStore = env.getStore(HighlightStore);
+        const getHighlightedXcs = () =>
+            highlightStore.highlights.map((highlight) => zoneToXc(highlight.zone)).sort();
+        addFieldSync(model, "B1", "product_uom_qty", 0);
+        setCellContent(model, "A1", '=ODOO.LIST(1,1,"product_uom_qty")');
+        hoverStore.hover({ col: 1, row: 0 });
+        expect(getHighlightedXcs()).toEqual(["A1"]);
+
+        // cells written by sub-commands of the paste
+        copy(model, "A1");
+        paste(model, "C1");
+        expect(getHighlightedXcs()).toEqual(["A1", "C1"]);
+
+        setCellContent(model, "A1", '=ODOO.LIST(1,2,"product_uom_qty")');
+        expect(getHighlightedXcs()).toEqual(["C1"]);
+    });
 });
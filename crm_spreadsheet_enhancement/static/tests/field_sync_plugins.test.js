@@ -1,7 +1,7 @@
 import { describe, before, expect, test } from "@odoo/hoot";
 import { animationFrame } from "@odoo/hoot-mock";
 
-import { Model } from "@odoo/o-spreadsheet";
+import { Model, helpers } from "@odoo/o-spreadsheet";
 
 import { x2ManyCommands } from "@web/core/orm_service";
 
@@ -17,6 +17,7 @@ import {
     setCellContent,
 } from "@spreadsheet/../tests/helpers/commands";
 import { getCellContent } from "@spreadsheet/../tests/helpers/getters";
+import { createModelWithDataSource } from "@spreadsheet/../tests/helpers/model";
 import { mailModels } from "@mail/../tests/mail_test_helpers";
 import { defineModels, onRpc } from "@web/../tests/web_test_helpers";
 import {
@@ -26,7 +27,14 @@ import {
 } from "./helpers/commands";
 import { addSpreadsheetFieldSyncExtensionWithCleanUp } from "../src/bundle/field_sync/field_sync_extension_hook";
 import { getFieldSync } from "./helpers/getters";
-import { SaleOrderLine, defineSpreadsheetSaleModels } from "./helpers/data";
+import {
+    SaleOrderLine,
+    defineSpreadsheetSaleModels,
+    getSaleOrderSpreadsheetData,
+} from "./helpers/data";
+import { MATERIAL_LINES_LIST_ID } from "../src/bundle/field_sync/model/field_sync_core_plugin";
+
+const { toCartesian, toZone } = helpers;
 
 describe.current.tags("headless");
 
@@ -85,6 +93,22 @@ describe("field sync plugins", () => {
         expect(result.isSuccessful).toBe(false);
     });
 
+    test("query and delete field syncs of a huge zone", async () => {
+        const model = await createSaleOrderSpreadsheetModel();
+        const sheetId = model.getters.getActiveSheetId();
+        addFieldSync(model, "B2", "product_uom_qty", 0);
+        addFieldSync(model, "C900000", "product_uom_qty", 1);
+        addFieldSync(model, "Z1", "product_uom_qty", 2);
+        const zone = toZone("A1:C1000000");
+        expect(model.getters.getFieldSyncs(sheetId, zone).map((sync) => sync.indexInList)).toEqual([
+            0, 1,
+        ]);
+        expect(deleteFieldSyncs(model, "A1:C1000000").isSuccessful).toBe(true);
+        expect(getFieldSync(model, "B2")).toBe(undefined);
+        expect(getFieldSync(model, "C900000")).toBe(undefined);
+        expect(getFieldSync(model, "Z1").indexInList).toBe(2);
+    });
+
     test("can't delete field sync that doesn't exist", async () => {
         const model = await createSaleOrderSpreadsheetModel();
         expect(deleteFieldSyncs(model, "A1").isSuccessful).toBe(false);
@@ -102,6 +126,54 @@ describe("field sync plugins", () => {
         });
     });
 
+    test("list and sheet field sync indexes follow changes", async () => {
+        const model = await createSaleOrderSpreadsheetModel();
+        const listId = model.getters.getMainSaleOrderLineList().id;
+        const sheetId = model.getters.getActiveSheetId();
+        addFieldSync(model, "A1", "product_uom_qty", 0);
+        addFieldSync(model, "A2", "product_uom_qty", 1);
+        expect(model.getters.getListFieldSyncs(listId).map(([position]) => position)).toEqual([
+            { sheetId, col: 0, row: 0 },
+            { sheetId, col: 0, row: 1 },
+        ]);
+        expect(model.getters.getSheetFieldSyncs(sheetId)).toHaveLength(2);
+
+        addColumns(model, "before", "A", 1);
+        expect(model.getters.getListFieldSyncs(listId).map(([position]) => position.col)).toEqual([
+            1, 1,
+        ]);
+        deleteFieldSyncs(model, "B1");
+        expect(model.getters.getListFieldSyncs(listId)).toHaveLength(1);
+        undo(model);
+        expect(model.getters.getListFieldSyncs(listId)).toHaveLength(2);
+        undo(model);
+        expect(model.getters.getListFieldSyncs(listId).map(([position]) => position.col)).toEqual([
+            0, 0,
+        ]);
+        expect(model.getters.getListFieldSyncs("unknown")).toEqual([]);
+    });
+
+    test("remap field syncs to other list positions", async () => {
+        const model = await createSaleOrderSpreadsheetModel();
+        const listId = model.getters.getMainSaleOrderLineList().id;
+        addFieldSync(model, "A1", "product_uom_qty", 0);
+        addFieldSync(model, "A2", "product_uom_qty", 1);
+        addFieldSync(model, "A3", "product_uom_qty", 2);
+        model.dispatch("REMAP_FIELD_SYNCS", {
+            remaps: [
+                { fromListId: listId, fromIndex: 0, toListId: null, toIndex: null },
+                { fromListId: listId, fromIndex: 1, toListId: listId, toIndex: 0 },
+                { fromListId: listId, fromIndex: 2, toListId: listId, toIndex: 1 },
+            ],
+        });
+        expect(getFieldSync(model, "A1")).toBe(undefined);
+        expect(getFieldSync(model, "A2").indexInList).toBe(0);
+        expect(getFieldSync(model, "A3").indexInList).toBe(1);
+        undo(model);
+        expect(getFieldSync(model, "A1").indexInList).toBe(0);
+        expect(getFieldSync(model, "A3").indexInList).toBe(2);
+    });
+
     test("field sync is deleted when column is removed", async () => {
         const model = await createSaleOrderSpreadsheetModel();
         addFieldSync(model, "A1", "product_uom_qty", 0);
@@ -135,6 +207,86 @@ describe("field sync plugins", () => {
         });
     });
 
+    test("x2many commands skip values equal to the loaded record", async () => {
+        SaleOrderLine._records = [{ id: 42, product_uom_qty: 111 }];
+        const model = await createSaleOrderSpreadsheetModel();
+        addFieldSync(model, "A1", "product_uom_qty", 0);
+        setCellContent(model, "A1", "111");
+        setCellContent(model, "B1", '=ODOO.LIST(1, 1, "product_uom_qty")');
+        await animationFrame();
+        expect(await model.getters.getFieldSyncX2ManyCommands()).toEqual({
+            commands: [],
+            errors: [],
+        });
+        setCellContent(model, "A1", "112");
+        expect(await model.getters.getFieldSyncX2ManyCommands()).toEqual({
+            commands: [x2ManyCommands.update(42, { product_uom_qty: 112 })],
+            errors: [],
+        });
+    });
+
+    test("all sheets x2many commands", async () => {
+        SaleOrderLine._records = [{ id: 42 }];
+        const model = await createSaleOrderSpreadsheetModel();
+        addFieldSync(model, "A1", "product_uom_qty", 0);
+        setCellContent(model, "A1", "111");
+        model.dispatch("CREATE_SHEET", { sheetId: "sh2", position: 1 });
+        model.dispatch("ACTIVATE_SHEET", {
+            sheetIdFrom: model.getters.getActiveSheetId(),
+            sheetIdTo: "sh2",
+        });
+        expect(await model.getters.getFieldSyncX2ManyCommands()).toEqual({
+            commands: [],
+            errors: [],
+        });
+        expect(await model.getters.getAllSheetsFieldSyncX2ManyCommands()).toEqual({
+            commands: [x2ManyCommands.update(42, { product_uom_qty: 111 })],
+            errors: [],
+            sheetErrors: {},
+        });
+    });
+
+    test("all sheets x2many commands with sheets updating a field differently", async () => {
+        SaleOrderLine._records = [{ id: 42 }];
+        const spreadsheetData = getSaleOrderSpreadsheetData();
+        spreadsheetData.sheets = [
+            { id: "sheet1", name: "First" },
+            { id: "sh2", name: "Second" },
+        ];
+        spreadsheetData.lists = {
+            [MATERIAL_LINES_LIST_ID]: { ...spreadsheetData.lists[1], id: MATERIAL_LINES_LIST_ID },
+        };
+        const model = await createModelWithDataSource({ spreadsheetData });
+        const syncCell = (sheetId, xc, fieldName, content) => {
+            model.dispatch("ADD_FIELD_SYNC", {
+                sheetId,
+                ...toCartesian(xc),
+                listId: MATERIAL_LINES_LIST_ID,
+                indexInList: 0,
+                fieldName,
+            });
+            setCellContent(model, xc, content, sheetId);
+        };
+        syncCell("sheet1", "A1", "product_uom_qty", "111");
+        syncCell("sh2", "A1", "product_uom_qty", "222");
+        syncCell("sh2", "B1", "price_unit", "5");
+        await animationFrame();
+        const error =
+            'Multiple sheets are updating the field "product_uom_qty" of record 42 with different values! Unable to determine which one to choose: First, Second';
+        expect(await model.getters.getAllSheetsFieldSyncX2ManyCommands()).toEqual({
+            commands: [],
+            errors: [`First: ${error}`, `Second: ${error}`],
+            sheetErrors: { sheet1: [error], sh2: [error] },
+        });
+
+        setCellContent(model, "A1", "111", "sh2");
+        expect(await model.getters.getAllSheetsFieldSyncX2ManyCommands()).toEqual({
+            commands: [x2ManyCommands.update(42, { product_uom_qty: 111, price_unit: 5 })],
+            errors: [],
+            sheetErrors: {},
+        });
+    });
+
     test("x2many commands with field sync position bigger than formula", async () => {
         SaleOrderLine._records = [{ id: 42 }, { id: 43 }];
         const model = await createSaleOrderSpreadsheetModel();
@@ -398,6 +550,43 @@ describe("field sync plugins", () => {
         expect(getFieldSync(model, "B1")).toBe(undefined);
     });
 
+    test("main lists are memoized until a list command", async () => {
+        const model = await createSaleOrderSpreadsheetModel();
+        const lists = model.getters.getMainLists();
+        expect(model.getters.getMainLists()).toBe(lists);
+        const [list] = lists;
+        expect(model.getters.getMainList(list.id)).toBe(list);
+        expect(model.getters.getSheetMainLists(list.sheetId)).toEqual([list]);
+
+        model.dispatch("RENAME_ODOO_LIST", { listId: list.id, name: "Renamed" });
+        expect(model.getters.getMainLists()).not.toBe(lists);
+        expect(model.getters.getMainList(list.id).name).toBe("Renamed");
+        undo(model);
+        expect(model.getters.getMainList(list.id).name).toBe(list.name);
+    });
+
+    test("main lists are recomputed for a list command following an undo", async () => {
+        const model = await createSaleOrderSpreadsheetModel();
+        const [list] = model.getters.getMainLists();
+        model.dispatch("RENAME_ODOO_LIST", { listId: list.id, name: "First" });
+        expect(model.getters.getMainList(list.id).name).toBe("First");
+        undo(model);
+        model.dispatch("RENAME_ODOO_LIST", { listId: list.id, name: "Second" });
+        expect(model.getters.getMainList(list.id).name).toBe("Second");
+        undo(model);
+        expect(model.getters.getMainList(list.id).name).toBe(list.name);
+    });
+
+    test("supported models and field metadata come from the schema", async () => {
+        const model = await createSaleOrderSpreadsheetModel();
+        expect(Object.keys(model.getters.getSupportedModels())).toEqual(["sale.order.line"]);
+        expect(model.getters.getFieldSyncSchemaFields("sale.order.line").product_uom_qty.type).toBe(
+            "float"
+        );
+        expect(model.getters.getMainLists().map((list) => list.model)).toEqual(["sale.order.line"]);
+        expect(model.exportData().fieldSyncSchema).toBe(undefined);
+    });
+
     test("can't delete main sale order line list", async () => {
         const model = await createSaleOrderSpreadsheetModel();
         const result = model.dispatch("REMOVE_ODOO_LIST", {
@@ -103,6 +103,21 @@ export function getSaleOrderSpreadsheetData() {
                 },
             },
         },
+        fieldSyncSchema: {
+            models: {
+                "sale.order.line": {
+                    fields: ["product_id", "product_uom_qty", "price_unit"],
+                    displayName: "Order Line",
+                },
+            },
+            fields: {
+                "sale.order.line": {
+                    product_id: { name: "product_id", type: "many2one", relation: "product" },
+                    product_uom_qty: { name: "product_uom_qty", type: "float" },
+                    price_unit: { name: "price_unit", type: "float" },
+                },
+            },
+        },
         globalFilters: [
             {
                 id: "order_filter_id",
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import test_crm_quote_spreadsheet
+from . import test_xlsx_import
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+import base64
+import importlib.util
+import json
+from io import BytesIO
+from unittest.mock import patch
+
+import openpyxl
+
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+from odoo.tools.misc import file_path
+from odoo.tools.sql import column_exists
+
+from odoo.addons.crm_spreadsheet_enhancement.models.crm_quote_spreadsheet import TEMPLATE_SHEET_KEY
+from odoo.addons.crm_spreadsheet_enhancement.models.product_category import MAX_CONVERSION_ATTEMPTS
+from odoo.addons.crm_spreadsheet_enhancement.tools import spreadsheet_codec
+
+
+@tagged('post_install', '-at_install')
+class TestCrmQuoteSpreadsheet(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.template_sheet = {'id': 'prices', 'name': 'Prices', 'cells': {'A1': {'content': '42'}}}
+        cls.template_cache = cls.env['crm.spreadsheet.template.cache'].create({
+            'checksum': 'test-calculation-template',
+            'spreadsheet_data': json.dumps({'version': 1, 'sheets': [cls.template_sheet], 'lists': {}}),
+        })
+        cls.product = cls.env['product.template'].create({'name': 'Panel'})
+
+    def _create_material_lines(self, lead, quantities):
+        return self.env['crm.material.line'].create([
+            {'lead_id': lead.id, 'product_template_id': self.product.id, 'quantity': quantity}
+            for quantity in quantities
+        ])
+
+    def _get_sheet_ids(self, spreadsheet):
+        return [sheet['id'] for sheet in json.loads(spreadsheet.raw_spreadsheet_data)['sheets']]
+
+    def test_raw_spreadsheet_data_includes_template_sheets(self):
+        spreadsheet = self.env['crm.lead.spreadsheet'].create({
+            'name': 'Calculator',
+            'template_cache_id': self.template_cache.id,
+        })
+        line_sheet = {'id': 'sheet_1', 'name': 'Line', 'cells': {'A1': {'content': '1'}}}
+        spreadsheet._save_raw_spreadsheet_data({
+            'version': 1,
+            'sheets': [self.template_sheet, line_sheet],
+            'lists': {},
+        })
+
+        stored = json.loads(spreadsheet._get_stored_raw_spreadsheet_data())
+        self.assertEqual(stored['sheets'], [{'id': 'prices', TEMPLATE_SHEET_KEY: True}, line_sheet])
+
+        document = json.loads(spreadsheet.raw_spreadsheet_data)
+        self.assertEqual(document['sheets'], [self.template_sheet, line_sheet])
+
+        # writing the whole document back still stores the template sheet as a reference
+        document['sheets'][1]['cells']['A2'] = {'content': '2'}
+        spreadsheet.raw_spreadsheet_data = json.dumps(document)
+        stored = json.loads(spreadsheet._get_stored_raw_spreadsheet_data())
+        self.assertEqual(stored['sheets'][0], {'id': 'prices', TEMPLATE_SHEET_KEY: True})
+        self.assertEqual(json.loads(spreadsheet.raw_spreadsheet_data)['sheets'], document['sheets'])
+
+    def test_raw_spreadsheet_data_without_stored_data(self):
+        spreadsheet = self.env['crm.lead.spreadsheet'].create({
+            'name': 'Calculator',
+            'template_cache_id': self.template_cache.id,
+        })
+        self.assertFalse(spreadsheet.raw_spreadsheet_data_compressed)
+        self.assertEqual(json.loads(spreadsheet.raw_spreadsheet_data)['sheets'], [self.template_sheet])
+
+        spreadsheet = self.env['crm.lead.spreadsheet'].create({'name': 'Calculator'})
+        self.assertFalse(spreadsheet.raw_spreadsheet_data)
+
+    def test_consolidated_sync_failure_keeps_document(self):
+        self.env['ir.config_parameter'].sudo().set_param(
+            'crm_spreadsheet_enhancement.consolidated_material_list', 'True')
+        lead = self.env['crm.lead'].create({'name': 'Opportunity'})
+        product = self.env['product.template'].create({'name': 'Panel'})
+        removed_line, kept_line = self.env['crm.material.line'].create([
+            {'lead_id': lead.id, 'product_template_id': product.id, 'quantity': 1},
+            {'lead_id': lead.id, 'product_template_id': product.id, 'quantity': 2},
+        ])
+        spreadsheet = self.env['crm.lead.spreadsheet'].create({'name': 'Calculator', 'lead_id': lead.id})
+        spreadsheet.join_spreadsheet_session()
+        fingerprint = spreadsheet.material_lines_fingerprint
+        self.assertTrue(fingerprint)
+
+        def get_sheet_ids():
+            return [sheet['id'] for sheet in json.loads(spreadsheet.raw_spreadsheet_data)['sheets']]
+
+        def count_revisions():
+            return self.env['spreadsheet.revision'].search_count([
+                ('res_model', '=', spreadsheet._name),
+                ('res_id', '=', spreadsheet.id),
+            ])
+
+        self.assertIn(f"sheet_{removed_line.id}", get_sheet_ids())
+        revision_count = count_revisions()
+
+        removed_line.unlink()
+        Spreadsheet = type(spreadsheet)
+        with patch.object(Spreadsheet, '_dispatch_commands', side_effect=UserError("Dispatch failed")), \
+                self.assertLogs('odoo.addons.crm_spreadsheet_enhancement.models.crm_quote_spreadsheet', 'WARNING'):
+            spreadsheet.join_spreadsheet_session()
+        # nothing half done: no revision, the sheet of the removed line is
+        # still stored and the sync is retried on the next join
+        self.assertEqual(spreadsheet.material_lines_fingerprint, fingerprint)
+        self.assertIn(f"sheet_{removed_line.id}", get_sheet_ids())
+        self.assertEqual(count_revisions(), revision_count)
+
+        spreadsheet.join_spreadsheet_session()
+        self.assertEqual(spreadsheet.material_lines_fingerprint, spreadsheet._get_material_lines_fingerprint())
+        self.assertNotIn(f"sheet_{removed_line.id}", get_sheet_ids())
+        self.assertIn(f"sheet_{kept_line.id}", get_sheet_ids())
+        self.assertEqual(count_revisions(), revision_count + 1)
+
+    def test_cron_provision_lead_spreadsheets(self):
+        template = self.env['crm.quotation.template'].create({'name': 'Quotation Template'})
+        lead = self.env['crm.lead'].create({
+            'name': 'Opportunity',
+            'type': 'opportunity',
+            'template_id': template.id,
+        })
+        product = self.env['product.template'].create({'name': 'Panel'})
+        line = self.env['crm.material.line'].create({
+            'lead_id': lead.id, 'product_template_id': product.id, 'quantity': 1,
+        })
+
+        self.env['crm.lead']._cron_provision_lead_spreadsheets()
+
+        spreadsheet = lead.spreadsheet_id
+        self.assertTrue(spreadsheet)
+        self.assertFalse(spreadsheet.provisioning_failed)
+        self.assertEqual(spreadsheet.material_lines_fingerprint, spreadsheet._get_material_lines_fingerprint())
+        sheet_ids = [sheet['id'] for sheet in json.loads(spreadsheet.raw_spreadsheet_data)['sheets']]
+        self.assertIn(f"sheet_{line.id}", sheet_ids)
+
+    def test_cron_provision_lead_spreadsheets_creation_failure(self):
+        template = self.env['crm.quotation.template'].create({'name': 'Quotation Template'})
+        lead = self.env['crm.lead'].create({
+            'name': 'Opportunity',
+            'type': 'opportunity',
+            'template_id': template.id,
+        })
+        product = self.env['product.template'].create({'name': 'Panel'})
+        self.env['crm.material.line'].create({
+            'lead_id': lead.id, 'product_template_id': product.id, 'quantity': 1,
+        })
+
+        Spreadsheet = type(self.env['crm.lead.spreadsheet'])
+        with patch.object(Spreadsheet, 'create', side_effect=UserError("Creation failed")) as create, \
+                self.assertLogs('odoo.addons.crm_spreadsheet_enhancement.models.crm_lead', 'WARNING'):
+            self.env['crm.lead']._cron_provision_lead_spreadsheets()
+            self.assertTrue(create.called)
+            self.assertFalse(lead.spreadsheet_id)
+            self.assertTrue(lead.spreadsheet_provisioning_failed)
+
+            # the failed lead no longer takes a place in the next batches
+            create.reset_mock()
+            self.env['crm.lead']._cron_provision_lead_spreadsheets()
+            self.assertFalse(create.called)
+
+        # opening the calculator retries
+        lead.action_open_lead_spreadsheet()
+        self.assertTrue(lead.spreadsheet_id)
+        self.assertFalse(lead.spreadsheet_provisioning_failed)
+
+    def test_replay_costs_follow_deleted_revisions(self):
+        spreadsheet = self.env['crm.lead.spreadsheet'].create({'name': 'Calculator'})
+        spreadsheet._dispatch_commands([{'type': 'UPDATE_CELL', 'sheetId': 'sheet1', 'col': 0, 'row': 0,
+                                         'content': '42'}])
+        spreadsheet._dispatch_commands([{'type': 'UPDATE_CELL', 'sheetId': 'sheet1', 'col': 0, 'row': 1,
+                                         'content': '43'}])
+        self.assertEqual(spreadsheet.replay_revision_count, 2)
+        self.assertTrue(spreadsheet.replay_revision_bytes)
+
+        revisions = self.env['spreadsheet.revision'].search([
+            ('res_model', '=', spreadsheet._name),
+            ('res_id', '=', spreadsheet.id),
+        ], order='id')
+        revisions[0].unlink()
+        self.assertEqual(spreadsheet.replay_revision_count, 1)
+        revisions[1].unlink()
+        self.assertEqual((spreadsheet.replay_revision_count, spreadsheet.replay_revision_bytes), (0, 0))
+
+    def test_join_skips_sync_when_material_lines_unchanged(self):
+        lead = self.env['crm.lead'].create({'name': 'Opportunity'})
+        line = self._create_material_lines(lead, [1])
+        spreadsheet = self.env['crm.lead.spreadsheet'].create({'name': 'Calculator', 'lead_id': lead.id})
+        spreadsheet.join_spreadsheet_session()
+        fingerprint = spreadsheet.material_lines_fingerprint
+        self.assertEqual(fingerprint, spreadsheet._get_material_lines_fingerprint())
+        self.assertEqual(self._get_sheet_ids(spreadsheet), [f"sheet_{line.id}"])
+        stored = spreadsheet._get_stored_raw_spreadsheet_data()
+
+        Spreadsheet = type(spreadsheet)
+        with patch.object(Spreadsheet, '_sync_sheets_with_material_lines') as sync, \
+                patch.object(Spreadsheet, '_store_material_lines_sync') as store:
+            data = spreadsheet.join_spreadsheet_session()
+        sync.assert_not_called()
+        store.assert_not_called()
+        self.assertEqual(data['lead_id'], lead.id)
+        self.assertEqual(spreadsheet.material_lines_fingerprint, fingerprint)
+        self.assertEqual(spreadsheet._get_stored_raw_spreadsheet_data(), stored)
+
+        # a new line changes the fingerprint: its sheet is added on the next join
+        new_line = self._create_material_lines(lead, [2])
+        self.assertNotEqual(spreadsheet._get_material_lines_fingerprint(), fingerprint)
+        spreadsheet.join_spreadsheet_session()
+        self.assertEqual(spreadsheet.material_lines_fingerprint, spreadsheet._get_material_lines_fingerprint())
+        self.assertEqual(self._get_sheet_ids(spreadsheet), [f"sheet_{line.id}", f"sheet_{new_line.id}"])
+
+    def test_get_crm_material_lines(self):
+        lead = self.env['crm.lead'].create({'name': 'Opportunity'})
+        self._create_material_lines(lead, [1, 2, 3])
+        spreadsheet = self.env['crm.lead.spreadsheet'].create({'name': 'Calculator', 'lead_id': lead.id})
+        lines = lead.material_line_ids
+
+        items = spreadsheet.get_crm_material_lines()
+        self.assertEqual([item['id'] for item in items], lines.ids)
+        self.assertEqual(items[0]['name'], self.product.display_name)
+        self.assertEqual(items[0]['quantity'], lines[0].quantity)
+        self.assertEqual(items[0]['description'], '')
+
+        page = spreadsheet.get_crm_material_lines(offset=1, limit=1, field_names=['quantity', 'unknown'])
+        self.assertEqual(page, [{'id': lines[1].id, 'quantity': lines[1].quantity}])
+        self.assertEqual(
+            [item['id'] for item in spreadsheet.get_crm_material_lines(offset=1)], lines[1:].ids)
+        self.assertEqual(spreadsheet.get_crm_material_lines(offset=3, limit=2), [])
+
+        # a record method: the lines are those of the calculator's lead
+        self.assertEqual(self.env['crm.lead.spreadsheet'].create({'name': 'Empty'}).get_crm_material_lines(), [])
+        with self.assertRaises(ValueError):
+            self.env['crm.lead.spreadsheet'].get_crm_material_lines()
+
+    def _create_template_category(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.title = "Pricing"
+        workbook.active['A1'] = "Price"
+        content = BytesIO()
+        workbook.save(content)
+        self.env['ir.config_parameter'].sudo().set_param(
+            'crm_spreadsheet_enhancement.async_template_conversion', 'True')
+        return self.env['product.category'].create({
+            'name': 'Panels',
+            'template_file': base64.b64encode(content.getvalue()),
+            'template_filename': 'pricing.xlsx',
+        })
+
+    def test_cron_convert_templates(self):
+        category = self._create_template_category()
+        self.assertEqual(category.template_conversion_state, 'pending')
+        self.assertFalse(category.template_cache_id)
+
+        self.env['product.category']._cron_convert_templates()
+        self.assertEqual(category.template_conversion_state, 'done')
+        self.assertEqual(category.template_conversion_attempts, 1)
+        sheets = json.loads(category.spreadsheet_data)['sheets']
+        self.assertEqual(sheets[0]['cells']['A1']['content'], "Price")
+
+    def test_cron_convert_templates_gives_up_interrupted_conversions(self):
+        category = self._create_template_category()
+        ProductCategory = type(category)
+        # a conversion killing the worker never records its outcome
+        with patch.object(ProductCategory, '_convert_templates') as convert:
+            for attempt in range(1, MAX_CONVERSION_ATTEMPTS + 1):
+                self.env['product.category']._cron_convert_templates()
+                self.assertEqual(category.template_conversion_state, 'running')
+                self.assertEqual(category.template_conversion_attempts, attempt)
+            self.assertEqual(convert.call_count, MAX_CONVERSION_ATTEMPTS)
+
+            with self.assertLogs('odoo.addons.crm_spreadsheet_enhancement.models.product_category', 'WARNING'):
+                self.env['product.category']._cron_convert_templates()
+            self.assertEqual(convert.call_count, MAX_CONVERSION_ATTEMPTS)
+        self.assertEqual(category.template_conversion_state, 'failed')
+        self.assertTrue(category.template_conversion_error)
+
+        # uploading the template again starts over
+        category.template_file = category.template_file
+        self.assertEqual(category.template_conversion_state, 'pending')
+        self.assertEqual(category.template_conversion_attempts, 0)
+
+    def test_raw_spreadsheet_data_stored_compressed(self):
+        spreadsheet = self.env['sale.order.spreadsheet'].create({'name': 'Calculator'})
+        text = spreadsheet_codec.dumps({'version': 1, 'sheets': [{'id': 'sheet1', 'cells': {}}], 'lists': {}})
+        spreadsheet.raw_spreadsheet_data = text
+
+        attachment = self.env['ir.attachment'].search([
+            ('res_model', '=', 'sale.order.spreadsheet'),
+            ('res_id', '=', spreadsheet.id),
+            ('res_field', '=', 'raw_spreadsheet_data_compressed'),
+        ])
+        self.assertEqual(len(attachment), 1)
+        self.assertLess(len(attachment.raw), len(text))
+        self.assertEqual(spreadsheet_codec.decompress(attachment.raw), text)
+        spreadsheet.invalidate_recordset()
+        self.assertEqual(spreadsheet.raw_spreadsheet_data, text)
+
+    def test_migrate_legacy_raw_spreadsheet_data(self):
+        spec = importlib.util.spec_from_file_location('post_migrate', file_path(
+            'crm_spreadsheet_enhancement/migrations/18.0.1.1.0/post-migrate.py'))
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+
+        spreadsheet = self.env['sale.order.spreadsheet'].create({'name': 'Calculator'})
+        document = {'version': 1, 'sheets': [{'id': 'sheet1', 'cells': {}}], 'lists': {}}
+        self.env.flush_all()
+        self.env.cr.execute('ALTER TABLE sale_order_spreadsheet ADD COLUMN raw_spreadsheet_data text')
+        self.env.cr.execute('UPDATE sale_order_spreadsheet SET raw_spreadsheet_data = %s WHERE id = %s',
+                            [json.dumps(document, indent=2), spreadsheet.id])
+
+        migration.migrate(self.env.cr, '18.0.1.0.1')
+
+        self.assertFalse(column_exists(self.env.cr, 'sale_order_spreadsheet', 'raw_spreadsheet_data'))
+        spreadsheet.invalidate_recordset()
+        # compacted while moved to the compressed attachment
+        self.assertEqual(spreadsheet.raw_spreadsheet_data, spreadsheet_codec.dumps(document))
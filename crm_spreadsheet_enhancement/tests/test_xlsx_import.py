@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import re
+import zipfile
+from io import BytesIO
+
+import openpyxl
+
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.crm_spreadsheet_enhancement.tools.xlsx_import import xlsx_to_spreadsheet
+
+
+@tagged('post_install', '-at_install')
+class TestXlsxImport(TransactionCase):
+
+    def test_stale_dimension(self):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Pricing"
+        for row in range(1, 6):
+            for col in range(1, 4):
+                ws.cell(row=row, column=col, value=row * col)
+        content = BytesIO()
+        wb.save(content)
+
+        # the <dimension> declared by some tools only covers the first cell
+        stale = BytesIO()
+        with zipfile.ZipFile(BytesIO(content.getvalue())) as source, zipfile.ZipFile(stale, 'w') as target:
+            for item in source.infolist():
+                data = source.read(item.filename)
+                if item.filename.startswith('xl/worksheets/sheet'):
+                    data = re.sub(rb'<dimension ref="[^"]*"', b'<dimension ref="A1"', data)
+                target.writestr(item, data)
+
+        [sheet] = xlsx_to_spreadsheet(stale.getvalue())['sheets']
+        self.assertEqual(len(sheet['cells']), 15)
+        self.assertEqual(sheet['cells']['C5'], {'content': 15, 'format': 1})
+        self.assertEqual((sheet['colNumber'], sheet['rowNumber']), (3, 5))
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+
+from . import instrumentation
+from . import xlsx_import
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Models whose lines quote calculators read and write through field syncs.
+
+Single source of the supported models and of their synced fields: the server
+builds its lists from it and sends it to the client with the session join (see
+``get_field_sync_schema``), together with the metadata of those fields.
+"""
+
+SUPPORTED_MODELS = {
+    'crm.material.line': {
+        'fields': ('product_template_id', 'attributes_description', 'quantity', 'width', 'height', 'length',
+                   'thickness'),
+        'display_name': 'Material Line',
+    },
+    'sale.order.line': {
+        'fields': ('product_id', 'product_uom_qty', 'price_unit', 'width', 'height', 'length', 'thickness'),
+        'display_name': 'Order Line',
+    },
+}
+
+FIELD_ATTRIBUTES = ['name', 'string', 'type', 'relation', 'selection', 'readonly', 'required', 'store',
+                    'searchable', 'sortable', 'groupable', 'aggregator']
+
+
+def get_fields(model_name):
+    """Return the list of synced fields of ``model_name``."""
+    return list(SUPPORTED_MODELS[model_name]['fields'])
+
+
+def get_field_sync_schema(env):
+    """Return the schema payload of the field sync client plugins.
+
+    ``models`` is the registry of the supported models installed, ``fields``
+    the metadata (``fields_get``) of their synced fields, per model.
+    """
+    schema = {'models': {}, 'fields': {}}
+    for model_name, model_info in SUPPORTED_MODELS.items():
+        if model_name not in env:
+            continue
+        Model = env[model_name]
+        field_names = [name for name in model_info['fields'] if name in Model._fields]
+        schema['models'][model_name] = {
+            'fields': field_names,
+            'displayName': model_info['display_name'],
+        }
+        schema['fields'][model_name] = Model.fields_get(field_names, attributes=FIELD_ATTRIBUTES)
+    return schema
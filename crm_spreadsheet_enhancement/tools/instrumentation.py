@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""Timing instrumentation for the spreadsheet hot paths.
+
+Phases (JSON loading, line diff, sheet add/remove, revision dispatch, save,
+template conversion...) are timed with :func:`phase`. Each timing is emitted
+on the ``odoo.addons.crm_spreadsheet_enhancement.perf`` logger and aggregated
+in the worker process into counters and latency histograms, which
+:func:`get_stats` returns.
+
+The logger level drives everything, like any other Odoo logger::
+
+    --log-handler=odoo.addons.crm_spreadsheet_enhancement.perf:DEBUG    # log every phase
+    --log-handler=odoo.addons.crm_spreadsheet_enhancement.perf:WARNING  # disable
+
+At INFO (the default) timings are aggregated and only slow phases are
+logged. When disabled, :func:`phase` returns a shared no-op context manager.
+"""
+import logging
+import threading
+import time
+
+_logger = logging.getLogger('odoo.addons.crm_spreadsheet_enhancement.perf')
+
+# Upper bounds (in ms) of the latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Phases taking longer than this (in ms) are logged at INFO instead of DEBUG
+SLOW_PHASE_MS = 1000
+
+_lock = threading.Lock()
+_timings = {}
+_counters = {}
+
+
+def is_enabled():
+    return _logger.isEnabledFor(logging.INFO)
+
+
+class _NoopPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NOOP_PHASE = _NoopPhase()
+
+
+class _Phase:
+    __slots__ = ('name', 'tags', 'start')
+
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration_ms = (time.perf_counter() - self.start) * 1000.0
+        record_timing(self.name, duration_ms)
+        level = logging.INFO if duration_ms >= SLOW_PHASE_MS else logging.DEBUG
+        if _logger.isEnabledFor(level):
+            _logger.log(level, "%s: %.2f ms%s%s", self.name, duration_ms,
+                        " (failed)" if exc_type else "",
+                        "".join(f" {key}={value}" for key, value in self.tags.items()))
+        return False
+
+
+def phase(name, **tags):
+    """Return a context manager timing the ``name`` phase.
+
+    :param name: dotted phase name, e.g. ``crm.join.load_json``
+    :param tags: extra values appended to the log line (record id, sizes...)
+    """
+    if not is_enabled():
+        return _NOOP_PHASE
+    return _Phase(name, tags)
+
+
+def record_timing(name, duration_ms):
+    """Aggregate one timing of the ``name`` phase."""
+    with _lock:
+        stats = _timings.get(name)
+        if stats is None:
+            stats = _timings[name] = {
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            }
+        stats['count'] += 1
+        stats['total_ms'] += duration_ms
+        stats['max_ms'] = max(stats['max_ms'], duration_ms)
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if duration_ms <= bound:
+                stats['buckets'][index] += 1
+                break
+        else:
+            stats['buckets'][-1] += 1
+
+
+def increment(name, value=1):
+    """Add ``value`` to the ``name`` counter (lines added, sheets removed...)."""
+    if not value or not is_enabled():
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def get_stats():
+    """Return a snapshot of the counters and latency histograms of this process."""
+    labels = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+    with _lock:
+        timings = {
+            name: {
+                'count': stats['count'],
+                'total_ms': round(stats['total_ms'], 3),
+                'avg_ms': round(stats['total_ms'] / stats['count'], 3),
+                'max_ms': round(stats['max_ms'], 3),
+                'histogram': dict(zip(labels, stats['buckets'])),
+            }
+            for name, stats in _timings.items()
+        }
+        counters = dict(_counters)
+    return {'timings': timings, 'counters': counters}
+
+
+def reset_stats():
+    with _lock:
+        _timings.clear()
+        _counters.clear()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Compact, compressed representation of spreadsheet JSON documents.
+
+Documents are serialized without whitespace and zlib-compressed before being
+stored in binary (attachment) fields. Spreadsheet JSON is very repetitive
+(cell keys, style and format dicts), it typically shrinks 8-15x.
+"""
+import base64
+import json
+import zlib
+
+COMPRESSION_LEVEL = 6
+
+
+def dumps(document):
+    """Serialize ``document`` to compact JSON."""
+    return json.dumps(document, separators=(',', ':'), ensure_ascii=False)
+
+
+def compress(text):
+    """Return the compressed bytes of the JSON string ``text``."""
+    return zlib.compress(text.encode(), COMPRESSION_LEVEL)
+
+
+def decompress(data):
+    """Return the JSON string stored in the compressed bytes ``data``."""
+    return zlib.decompress(data).decode()
+
+
+def to_binary_field(text):
+    """Return the value to write in a Binary field for the JSON string ``text``."""
+    return base64.b64encode(compress(text)) if text else False
+
+
+def from_binary_field(value):
+    """Return the JSON string stored in a Binary field value, False if empty."""
+    return decompress(base64.b64decode(value)) if value else False
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Indexed access to a spreadsheet JSON document.
+
+Wraps the ``sheets`` list and ``lists`` dict of a parsed document with a
+sheet-id index, so looking up, adding and removing sheets costs O(1) per sheet
+instead of a scan of the whole list. Removals are done in batch, in a single
+pass over the sheets. The wrapped dict is modified in place.
+"""
+
+
+class SpreadsheetDocument:
+    __slots__ = ('data', '_sheets_by_id')
+
+    def __init__(self, data):
+        self.data = data if data is not None else {}
+        self.data['sheets'] = self.data.get('sheets') or []
+        self.data['lists'] = self.data.get('lists') or {}
+        self._sheets_by_id = {sheet.get('id'): sheet for sheet in self.data['sheets']}
+
+    @property
+    def sheets(self):
+        return self.data['sheets']
+
+    @property
+    def lists(self):
+        return self.data['lists']
+
+    def sheet_ids(self):
+        return self._sheets_by_id.keys()
+
+    def list_ids(self):
+        return self.lists.keys()
+
+    def has_sheet(self, sheet_id):
+        return sheet_id in self._sheets_by_id
+
+    def get_sheet(self, sheet_id):
+        return self._sheets_by_id.get(sheet_id)
+
+    def add_sheet(self, sheet):
+        """Append ``sheet`` unless a sheet with the same id exists. Return whether it was added."""
+        if sheet['id'] in self._sheets_by_id:
+            return False
+        self.sheets.append(sheet)
+        self._sheets_by_id[sheet['id']] = sheet
+        return True
+
+    def set_list(self, list_id, list_definition):
+        self.lists[list_id] = list_definition
+
+    def remove_sheets(self, sheet_ids):
+        """Remove the sheets of ``sheet_ids`` in one pass. Return the number removed."""
+        to_remove = self._sheets_by_id.keys() & set(sheet_ids)
+        if not to_remove:
+            return 0
+        self.data['sheets'] = [sheet for sheet in self.sheets if sheet.get('id') not in to_remove]
+        for sheet_id in to_remove:
+            del self._sheets_by_id[sheet_id]
+        return len(to_remove)
+
+    def remove_lists(self, list_ids):
+        """Remove the lists of ``list_ids``. Return the number removed."""
+        removed = 0
+        for list_id in list_ids:
+            if self.lists.pop(list_id, None) is not None:
+                removed += 1
+        return removed
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Streaming XLSX -> Odoo spreadsheet JSON conversion.
+
+The workbook is opened with openpyxl in read-only mode and only the populated
+cells are visited through ``iter_rows``, so the memory footprint is bounded by
+the converted output rather than by the ``max_row x max_col`` rectangle of the
+sheet. Read-only worksheets do not expose merges nor column/row dimensions:
+those are collected by a second, lightweight ``iterparse`` pass over the sheet
+XML (lxml, filtered on ``<col>``, ``<row>`` and ``<mergeCell>``).
+
+This module does not depend on Odoo so it can be benchmarked standalone.
+"""
+import datetime
+import logging
+import posixpath
+import zipfile
+from io import BytesIO
+
+import openpyxl
+from lxml import etree
+from openpyxl.utils import column_index_from_string, get_column_letter
+
+_logger = logging.getLogger(__name__)
+
+SPREADSHEET_VERSION = 16
+
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_DATE_TYPES = (datetime.date, datetime.datetime, datetime.time)
+
+
+def parse_range(range_str):
+    """Convert ``'A1:B3'`` into ``{'top': 0, 'left': 0, 'bottom': 2, 'right': 1}``.
+
+    Indices are 0-based, a single cell reference gives a 1x1 box. Returns
+    ``None`` when the reference cannot be parsed.
+    """
+    try:
+        start, _sep, end = range_str.partition(':')
+        end = end or start
+        col1 = ''.join(c for c in start if c.isalpha())
+        row1 = ''.join(c for c in start if c.isdigit())
+        col2 = ''.join(c for c in end if c.isalpha())
+        row2 = ''.join(c for c in end if c.isdigit())
+        return {
+            'top': int(row1) - 1,
+            'left': column_index_from_string(col1) - 1,
+            'bottom': int(row2) - 1,
+            'right': column_index_from_string(col2) - 1,
+        }
+    except Exception:
+        _logger.debug("Could not parse range %s", range_str, exc_info=True)
+        return None
+
+
+def _worksheet_paths(archive):
+    """Return the archive paths of the worksheets, in workbook order."""
+    targets = {}
+    for _event, elem in etree.iterparse(archive.open('xl/_rels/workbook.xml.rels'), tag='{*}Relationship'):
+        if elem.get('Type', '').endswith('/worksheet'):
+            target = elem.get('Target', '')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join('xl', target))
+            targets[elem.get('Id')] = target
+    paths = []
+    for _event, elem in etree.iterparse(archive.open('xl/workbook.xml'), tag='{*}sheet'):
+        path = targets.get(elem.get(f'{{{_REL_NS}}}id'))
+        if path:
+            paths.append(path)
+    return paths
+
+
+def _read_sheet_layout(stream, sheet_json):
+    """Fill the merges, cols and rows of ``sheet_json`` from the sheet XML.
+
+    lxml only reports the ``<row>``, ``<col>`` and ``<mergeCell>`` elements and
+    each one is dropped as soon as it is read, so the pass runs in constant
+    memory whatever the size of the sheet.
+    """
+    row_counter = 0
+    for _event, elem in etree.iterparse(stream, events=('end',), tag=('{*}row', '{*}col', '{*}mergeCell')):
+        tag = etree.QName(elem).localname
+        if tag == 'row':
+            row_counter = int(elem.get('r') or row_counter + 1)
+            height = elem.get('ht')
+            if height is not None:
+                sheet_json['rows'][str(row_counter - 1)] = {'size': float(height)}
+        elif tag == 'col':
+            width = elem.get('width')
+            if width is not None and elem.get('min'):
+                sheet_json['cols'][str(int(elem.get('min')) - 1)] = {'width': float(width)}
+        else:
+            parsed = parse_range(elem.get('ref', ''))
+            if parsed:
+                sheet_json['merges'].append(parsed)
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def _cell_content(cell):
+    if cell.data_type == 'f':
+        raw = str(cell.value)
+        return raw if raw.startswith('=') else '=' + raw
+    if isinstance(cell.value, _DATE_TYPES):
+        return cell.value.isoformat()
+    return cell.value
+
+
+def xlsx_to_spreadsheet(content):
+    """Convert the raw bytes of an XLSX file into an Odoo spreadsheet dict."""
+    spreadsheet = {
+        "version": SPREADSHEET_VERSION,
+        "sheets": [],
+        "revisionId": 1,
+        "settings": {},
+        "lists": {},
+    }
+    with zipfile.ZipFile(BytesIO(content)) as archive:
+        sheet_paths = _worksheet_paths(archive)
+        wb = openpyxl.load_workbook(BytesIO(content), read_only=True, data_only=False)
+        try:
+            for index, sheet in enumerate(wb.worksheets):
+                title = sheet.title or "Sheet"
+                cells = {}
+                max_row = max_col = 1
+                # Read-only worksheets stop at the <dimension> declared in the
+                # file, which many tools write stale: visit every stored row and
+                # size the sheet from them (styled-only cells included).
+                sheet.reset_dimensions()
+                for row_index, row in enumerate(sheet.iter_rows(), 1):
+                    if row:
+                        max_row = row_index
+                        max_col = max(max_col, len(row))
+                    for cell in row:
+                        if cell.value is None:
+                            continue
+                        cells[f"{get_column_letter(cell.column)}{cell.row}"] = {
+                            "content": _cell_content(cell),
+                            "format": 1,
+                        }
+
+                sheet_json = {
+                    # unique id to avoid collision with sheet_<line.id>: prefix template_
+                    "id": ("template_" + title).replace(" ", "_")[:60],
+                    "name": title[:31],
+                    "colNumber": max_col,
+                    "rowNumber": max_row,
+                    "cells": cells,
+                    "merges": [],
+                    "rows": {},  # numeric-string keys: "0","1"
+                    "cols": {},  # numeric-string keys: "0","1"
+                }
+                if index < len(sheet_paths):
+                    try:
+                        with archive.open(sheet_paths[index]) as stream:
+                            _read_sheet_layout(stream, sheet_json)
+                    except Exception:
+                        _logger.debug("Reading merges/dimensions failed for sheet %s", title, exc_info=True)
+                spreadsheet["sheets"].append(sheet_json)
+        finally:
+            wb.close()
+    return spreadsheet